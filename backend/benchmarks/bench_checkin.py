@@ -0,0 +1,96 @@
+# backend/benchmarks/bench_checkin.py
+"""
+Check-in throughput of the ticket registry (bots/tickets.py) with several
+scanners at once.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_checkin [--tickets 20000] [--scanners 4] [--processes]
+
+Imports a synthetic attendee list from CSV into a scratch database. Every
+ticket is then scanned by two different scanners at the same time (threads,
+or separate processes with --processes). The benchmark checks that each
+ticket was admitted exactly once and prints the sustained scans per second.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+
+
+def _scan(ticket_ids, scanner_id):
+    from backend.bots import tickets
+    admitted = 0
+    for ticket_id in ticket_ids:
+        if tickets.check_in(ticket_id, scanner_id)['status'] == 'success':
+            admitted += 1
+    return admitted
+
+
+def _scan_in_process(args):
+    return _scan(*args)
+
+
+def _scan_lists(n_tickets: int, n_scanners: int, seed: int = 11) -> list:
+    # Each ticket goes to two different scanners, in a random order per scanner
+    rng = random.Random(seed)
+    lists = [[] for _ in range(n_scanners)]
+    for i in range(n_tickets):
+        first, second = rng.sample(range(n_scanners), 2)
+        lists[first].append(f"TKT-{i:08d}")
+        lists[second].append(f"TKT-{i:08d}")
+    for scan_list in lists:
+        rng.shuffle(scan_list)
+    return lists
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=20_000)
+    parser.add_argument('--scanners', type=int, default=4)
+    parser.add_argument('--processes', action='store_true', help="Run each scanner in its own process")
+    args = parser.parse_args()
+    if args.scanners < 2:
+        parser.error("--scanners must be at least 2 (every ticket is scanned twice)")
+
+    scratch = tempfile.mkdtemp(prefix="bench_checkin_")
+    # Set before the registry is imported, so spawned scanner processes use it too
+    os.environ['TICKETS_DB_PATH'] = os.path.join(scratch, "tickets.sqlite3")
+    from backend.bots import tickets
+
+    csv_text = "ticket_id,name,email\n" + "".join(
+        f"TKT-{i:08d},Attendee {i},attendee{i}@example.com\n" for i in range(args.tickets)
+    )
+    began = time.perf_counter()
+    tickets.import_csv(csv_text, event="benchmark")
+    print(f"import      tickets={args.tickets} elapsed={time.perf_counter() - began:.2f}s")
+
+    lists = _scan_lists(args.tickets, args.scanners)
+    began = time.perf_counter()
+    if args.processes:
+        with multiprocessing.get_context('spawn').Pool(args.scanners) as pool:
+            admitted = pool.map(_scan_in_process, [(lst, f"door-{i}") for i, lst in enumerate(lists)])
+    else:
+        admitted = [0] * args.scanners
+
+        def run(i):
+            admitted[i] = _scan(lists[i], f"door-{i}")
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(args.scanners)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    elapsed = time.perf_counter() - began
+
+    scans = sum(len(lst) for lst in lists)
+    assert sum(admitted) == args.tickets, f"{sum(admitted)} admissions for {args.tickets} tickets"
+    assert tickets.get_stats("benchmark") == {'used': args.tickets}, "tickets left unchecked"
+    mode = "processes" if args.processes else "threads"
+    print(f"check-in    scanners={args.scanners} ({mode}) scans={scans} admitted={sum(admitted)} "
+          f"elapsed={elapsed:.2f}s throughput={scans / elapsed:,.0f} scans/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+# backend/benchmarks/bench_pipeline.py
+"""
+End-to-end pipeline benchmark with in-process fakes (see fakes.py): no
+OpenAI, Google Sheets, GCS, Graph API or Twitter account is needed.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_pipeline [--sizes small,medium] [--platform-counts 1,3]
+        [--articles 2] [--openai-latency 0.05] [--json results.json] [--baseline old.json] [--max-ms 1000]
+
+For every article size and platform count the benchmark runs the three
+workflows back to back on fresh sheets:
+
+1. orchestrator.run_ingestion_to_generation for each article;
+2. every generated post is approved, then orchestrator.run_scheduling_for_all_platforms;
+3. the schedule is made due, then orchestrator.run_publishing_for_all_platforms.
+
+It prints per-stage latency, calls per external service and posts per
+minute. --json writes the same numbers for CI. The run exits with status 1
+when a post fails to publish, when a scenario takes more than --max-ms
+end to end per published post, or, with --baseline (an earlier --json
+file), when a scenario's posts per minute dropped by more than --tolerance.
+CI runs it on every push (.github/workflows/benchmarks.yml).
+"""
+import argparse
+import functools
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+# Local state goes to a scratch directory, set before the bots read their config
+os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix="bench_pipeline_")
+os.environ['NOTIFY_AUTOSTART_DISPATCHER'] = "false"
+for _name in ("FB_PAGE_ID", "FB_ACCESS_TOKEN", "IG_ACCOUNT_ID", "IG_ACCESS_TOKEN"):
+    os.environ.setdefault(_name, "bench")
+
+from backend.benchmarks import fakes  # noqa: E402
+from backend.benchmarks.graph_stub import GraphApiStub  # noqa: E402
+
+# Article size -> (paragraphs, chart images, other images, conclusions the summary yields)
+ARTICLE_SIZES = {
+    'small': (8, 1, 1, 2),
+    'medium': (30, 3, 2, 4),
+    'large': (120, 8, 4, 6),
+}
+PLATFORM_ORDER = ['facebook', 'instagram', 'twitter']
+STEP3_COLUMNS = ['post_id', 'article_url', 'Name', 'Summary', 'Conclusion', 'Image_Paths',
+                 'Requires_human_approval', 'Approved_by_human', 'Approver_Emails', 'Matched_Image_Path']
+PLATFORM_COLUMNS = {
+    'facebook': ['Facebook_Post_Text', 'Facebook_Hashtags'],
+    'instagram': ['Instagram_Caption', 'Instagram_Hashtags'],
+    'twitter': ['Tweet'],
+}
+# Pipeline functions timed as stages: (module, function, stage name)
+TIMED_STAGES = [
+    ('step1_ingestion', 'process_article_url', 'ingest'),
+    ('step1_ingestion', '_get_summary_from_text', 'summarize'),
+    ('step1_ingestion', '_is_image_a_chart', 'chart_detection'),
+    ('step1_ingestion', '_upload_image_to_gcs', 'image_upload'),
+    ('step3_generation', 'generate_post_for_platform', 'generate'),
+    ('step3_generation', 'find_best_image_for_post', 'match_image'),
+    ('step4_scheduling', 'create_posting_schedule', 'schedule'),
+    ('media_preparation', 'prepare_media_for_posts', 'prepare_media'),
+    ('step5_publishing', 'publish_post', 'publish'),
+    ('step5_publishing', 'publish_facebook_batch', 'publish_batch'),
+]
+
+
+class StageTimer:
+    def __init__(self):
+        self.durations = defaultdict(list)
+
+    def wrap(self, module, name, stage):
+        func = getattr(module, name)
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            began = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.durations[stage].append(time.perf_counter() - began)
+        setattr(module, name, timed)
+
+    def summary(self) -> dict:
+        return {stage: {'calls': len(d), 'total_s': sum(d), 'mean_ms': statistics.mean(d) * 1000,
+                        'max_ms': max(d) * 1000}
+                for stage, d in self.durations.items()}
+
+
+def _approve_all(gc, config):
+    # Stands in for the Approval Queue; done on the fake sheets directly so it is not counted
+    for platform_config in config.PLATFORMS.values():
+        ws = gc.worksheet(platform_config.sheet_name, platform_config.steps['step3'])
+        if not ws.rows:
+            continue
+        col = ws.rows[0].index('Approved_by_human')
+        for row in ws.rows[1:]:
+            row.extend([''] * (col + 1 - len(row)))
+            row[col] = 'yes'
+
+
+def _make_due(gc, config):
+    # Moves every slot into the past, as if the scheduled times had come
+    for platform_config in config.PLATFORMS.values():
+        ws = gc.worksheet(platform_config.sheet_name, platform_config.steps['step4'])
+        if not ws.rows or 'Scheduled_Time_UTC' not in ws.rows[0]:
+            continue
+        col = ws.rows[0].index('Scheduled_Time_UTC')
+        for row in ws.rows[1:]:
+            row[col] = '2000-01-01T00:00:00Z'
+
+
+def _count_posted(gc, config) -> tuple[int, int]:
+    posted = failed = 0
+    for platform_config in config.PLATFORMS.values():
+        ws = gc.worksheet(platform_config.sheet_name, platform_config.steps['step4'])
+        if not ws.rows or 'Posted_Status' not in ws.rows[0]:
+            continue
+        col = ws.rows[0].index('Posted_Status')
+        for row in ws.rows[1:]:
+            status = row[col] if col < len(row) else ''
+            posted += status == 'Posted'
+            failed += status.startswith('Error')
+    return posted, failed
+
+
+def run_scenario(services, content, size, n_platforms, n_articles, modules) -> dict:
+    config, orchestrator = modules['config'], modules['orchestrator']
+    paragraphs, charts, photos, conclusions = ARTICLE_SIZES[size]
+    platforms = PLATFORM_ORDER[:n_platforms]
+    services.openai.conclusions = conclusions
+    services.gspread_client.seed(config.PLATFORMS, {
+        p: {'step3': STEP3_COLUMNS + PLATFORM_COLUMNS[p]} for p in config.PLATFORMS
+    })
+    urls = [content.add_article(paragraphs, charts, photos) for _ in range(n_articles)]
+
+    services.calls.reset()
+    timer = StageTimer()
+    for module_name, name, stage in TIMED_STAGES:
+        timer.wrap(modules[module_name], name, stage)
+    workflows = {}
+    try:
+        began = time.perf_counter()
+        for url in urls:
+            orchestrator.run_ingestion_to_generation(url, platforms, approver_emails=[])
+        workflows['ingestion_to_generation'] = time.perf_counter() - began
+
+        _approve_all(services.gspread_client, config)
+        began = time.perf_counter()
+        orchestrator.run_scheduling_for_all_platforms()
+        workflows['scheduling'] = time.perf_counter() - began
+
+        _make_due(services.gspread_client, config)
+        began = time.perf_counter()
+        orchestrator.run_publishing_for_all_platforms(max_posts_per_platform=10_000)
+        workflows['publishing'] = time.perf_counter() - began
+    finally:
+        # Unwrap, so the next scenario does not time everything twice
+        for module_name, name, _ in TIMED_STAGES:
+            func = getattr(modules[module_name], name)
+            setattr(modules[module_name], name, getattr(func, '__wrapped__', func))
+
+    posted, failed = _count_posted(services.gspread_client, config)
+    total = sum(workflows.values())
+    return {
+        'scenario': f"{size}/{n_platforms}p", 'article_size': size, 'platforms': platforms, 'articles': n_articles,
+        'posts_published': posted, 'posts_failed': failed,
+        'workflow_seconds': workflows, 'stages': timer.summary(),
+        'calls': {f"{s}.{op}": n for (s, op), n in sorted(services.calls.snapshot().items())},
+        'calls_by_service': services.calls.by_service(),
+        'posts_per_minute': posted / total * 60 if total else 0.0,
+        'ms_per_post': total / posted * 1000 if posted else float('inf'),
+        'publish_posts_per_minute': posted / workflows['publishing'] * 60 if workflows['publishing'] else 0.0,
+    }
+
+
+def _print_result(result):
+    wf = result['workflow_seconds']
+    print(f"\n=== {result['scenario']}  articles={result['articles']} platforms={','.join(result['platforms'])} ===")
+    print(f"workflows   ingestion+generation={wf['ingestion_to_generation']:.2f}s "
+          f"scheduling={wf['scheduling']:.2f}s publishing={wf['publishing']:.2f}s")
+    for stage, s in sorted(result['stages'].items(), key=lambda kv: -kv[1]['total_s']):
+        print(f"  {stage:<16} calls={s['calls']:<4} total={s['total_s']:7.2f}s mean={s['mean_ms']:8.1f}ms max={s['max_ms']:8.1f}ms")
+    print("services    " + " ".join(f"{k}={v}" for k, v in sorted(result['calls_by_service'].items())))
+    print("calls       " + " ".join(f"{k}={v}" for k, v in result['calls'].items()))
+    print(f"posts       published={result['posts_published']} failed={result['posts_failed']} "
+          f"end-to-end={result['posts_per_minute']:,.1f} posts/min ({result['ms_per_post']:,.0f} ms/post) publishing={result['publish_posts_per_minute']:,.1f} posts/min")
+
+
+def _regressions(results, baseline_path, tolerance) -> list:
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {r['scenario']: r for r in json.load(f)['results']}
+    slower = []
+    for result in results:
+        before = baseline.get(result['scenario'])
+        if before and result['posts_per_minute'] < before['posts_per_minute'] * (1 - tolerance):
+            slower.append(f"{result['scenario']}: {result['posts_per_minute']:.1f} posts/min "
+                          f"(baseline {before['posts_per_minute']:.1f})")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=','.join(ARTICLE_SIZES), help="Article sizes to run")
+    parser.add_argument('--platform-counts', default="1,2,3", help="Numbers of platforms to generate posts for")
+    parser.add_argument('--articles', type=int, default=2, help="Articles per scenario")
+    parser.add_argument('--openai-latency', type=float, default=0.05)
+    parser.add_argument('--sheets-latency', type=float, default=0.02)
+    parser.add_argument('--graph-latency', type=float, default=0.02)
+    parser.add_argument('--web-latency', type=float, default=0.005, help="Article pages, images and GCS downloads")
+    parser.add_argument('--json', help="Write the results to this file")
+    parser.add_argument('--baseline', help="Fail if posts/min dropped against this earlier --json file")
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--max-ms', type=float, help="Fail if a scenario takes longer than this per published post")
+    args = parser.parse_args()
+
+    content = fakes.ContentServer(latency=args.web_latency).start()
+    graph = GraphApiStub(latency=args.graph_latency, container_processing=0).start()
+    services = fakes.install(content, openai_latency=args.openai_latency, sheets_latency=args.sheets_latency,
+                             gcs_latency=args.web_latency, twitter_latency=args.graph_latency)
+
+    # Imported only now: these modules open their clients at import
+    from backend.bots import (config, orchestrator, step1_ingestion, step3_generation, step4_scheduling,
+                              step5_publishing, media_preparation)
+    config.GRAPH_API_BASE = graph.base_url
+    modules = {'config': config, 'orchestrator': orchestrator, 'step1_ingestion': step1_ingestion,
+               'step3_generation': step3_generation, 'step4_scheduling': step4_scheduling,
+               'step5_publishing': step5_publishing, 'media_preparation': media_preparation}
+
+    results = []
+    try:
+        for size in args.sizes.split(','):
+            for n_platforms in (int(n) for n in args.platform_counts.split(',')):
+                graph_before = graph.http_requests
+                result = run_scenario(services, content, size, n_platforms, args.articles, modules)
+                result['calls_by_service']['graph_api'] = graph.http_requests - graph_before
+                results.append(result)
+    finally:
+        content.stop()
+        graph.stop()
+
+    # Printed after the runs, so the pipeline's own output does not bury it
+    for result in results:
+        _print_result(result)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'created_at': time.time(), 'args': vars(args), 'results': results}, f, indent=2)
+    failed = [r['scenario'] for r in results if r['posts_failed']]
+    if failed:
+        print(f"\nFAILED: posts could not be published in {', '.join(failed)}")
+        sys.exit(1)
+    if args.max_ms is not None:
+        over = [f"{r['scenario']}: {r['ms_per_post']:,.0f} ms/post" for r in results if r['ms_per_post'] > args.max_ms]
+        if over:
+            print(f"\nOVER BUDGET ({args.max_ms:,.0f} ms/post): " + "; ".join(over))
+            sys.exit(1)
+    if args.baseline:
+        slower = _regressions(results, args.baseline, args.tolerance)
+        if slower:
+            print("\nREGRESSION: " + "; ".join(slower))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+# backend/benchmarks/bench_publishing.py
+"""
+Publishing throughput against a local Graph API stub: the sequential
+publisher (step5_publishing.publish_post, one post after the other) versus
+the async engine (async_publishing.publish_post_async, all posts at once).
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_publishing [--posts 12] [--processing 3]
+
+Only Facebook and Instagram are exercised; Twitter goes through Tweepy. The
+Facebook posts are also published once more as Graph API batch requests
+(step5_publishing.publish_facebook_batch).
+"""
+import argparse
+import asyncio
+import os
+import time
+from backend.bots import clients
+
+# The pipeline modules open Sheets/OpenAI clients at import; none is needed here
+clients.get_gspread_client = lambda: None
+clients.get_openai_client = lambda: None
+
+from backend.bots import config, step5_publishing, async_publishing  # noqa: E402
+from backend.benchmarks.graph_stub import GraphApiStub  # noqa: E402
+
+
+def _make_posts(n_posts: int) -> list:
+    posts = []
+    for i in range(n_posts):
+        platform = 'instagram' if i % 2 else 'facebook'
+        posts.append((platform, {
+            'post_id': f"post-{i}", 'Name': f"Article {i}",
+            'Facebook_Post_Text': f"Facebook post {i}" if platform == 'facebook' else '',
+            'Instagram_Caption': f"Instagram caption {i}" if platform == 'instagram' else '',
+            'Matched_Image_Path': f"https://example.com/chart-{i}.jpg",
+            'article_url': f"https://example.com/article-{i}",
+        }))
+    return posts
+
+
+def _run_sequential(posts) -> list:
+    return [step5_publishing.publish_post(platform, post) for platform, post in posts]
+
+
+async def _run_async(posts, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(platform, post):
+        async with semaphore:
+            return await async_publishing.publish_post_async(platform, post)
+    return await asyncio.gather(*(one(p, post) for p, post in posts))
+
+
+def _run_facebook_batch(posts) -> list:
+    return step5_publishing.publish_facebook_batch([post for platform, post in posts if platform == 'facebook'])
+
+
+def _report(label, results, elapsed):
+    ok = sum(1 for success, _ in results if success)
+    print(f"{label:<11} posts={len(results)} ok={ok} elapsed={elapsed:.2f}s "
+          f"throughput={len(results) / elapsed * 60:,.1f} posts/min")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posts', type=int, default=12)
+    parser.add_argument('--latency', type=float, default=0.05, help="Seconds per Graph API round trip")
+    parser.add_argument('--processing', type=float, default=3.0, help="Seconds an Instagram container takes")
+    parser.add_argument('--concurrency', type=int, default=config.PUBLISHER_CONCURRENCY)
+    parser.add_argument('--skip-sequential', action='store_true')
+    args = parser.parse_args()
+
+    stub = GraphApiStub(latency=args.latency, container_processing=args.processing).start()
+    config.GRAPH_API_BASE = stub.base_url
+    for name in ("FB_PAGE_ID", "FB_ACCESS_TOKEN", "IG_ACCOUNT_ID", "IG_ACCESS_TOKEN"):
+        os.environ.setdefault(name, "bench")
+    posts = _make_posts(args.posts)
+
+    try:
+        if not args.skip_sequential:
+            began = time.perf_counter()
+            results = _run_sequential(posts)
+            _report("sequential", results, time.perf_counter() - began)
+
+        began = time.perf_counter()
+        results = asyncio.run(_run_async(posts, args.concurrency))
+        _report("async", results, time.perf_counter() - began)
+
+        http_before = stub.http_requests
+        began = time.perf_counter()
+        results = _run_facebook_batch(posts)
+        _report("fb-batch", results, time.perf_counter() - began)
+        print(f"graph_api_calls={stub.requests} http_requests={stub.http_requests} "
+              f"(fb-batch: {stub.http_requests - http_before})")
+    finally:
+        stub.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+# backend/benchmarks/bench_qr_decoding.py
+"""
+Decode rate and latency of the scanner's QR pipeline (bots/qr_decoding.py)
+against plain pyzbar on the full colour frame.
+
+Run from the repository root (needs the `qrcode` package and the zbar library):
+    pip install qrcode
+    python -m backend.benchmarks.bench_qr_decoding [--frames 12] [--seed 5]
+
+Builds a corpus of synthetic camera frames: QR tickets pasted at random
+positions into frames of several sizes, at several code sizes, with Gaussian
+sensor noise and an uneven lighting gradient, plus group frames holding
+several tickets. Prints, per case, how many frames each decoder read
+completely and the mean/p95 time per frame, and which pipeline stage did it.
+"""
+import argparse
+import random
+import statistics
+import time
+from collections import Counter
+import numpy as np
+from PIL import Image
+
+# (frame size, code side as a fraction of the frame's short side, codes per frame)
+CASES = [
+    ((1280, 720), 0.35, 1),
+    ((1920, 1080), 0.25, 1),
+    ((3024, 4032), 0.30, 1),
+    ((3024, 4032), 0.12, 1),
+    ((3024, 4032), 0.18, 3),
+    ((3024, 4032), 0.06, 1),  # far from the camera: too small for the downscaled frame
+]
+NOISE_LEVELS = [0, 12, 28]
+
+
+def _make_frame(rng, size, code_fraction, n_codes, noise) -> tuple[Image.Image, set]:
+    import qrcode
+    width, height = size
+    side = int(min(size) * code_fraction)
+    # Mid-grey background with a lighting gradient, like a badge under a ceiling light
+    gradient = np.linspace(200, 120, width)[None, :] + np.linspace(0, 30, height)[:, None]
+    frame = Image.fromarray(gradient.astype(np.uint8), mode='L')
+
+    ticket_ids, boxes = set(), []
+    while len(ticket_ids) < n_codes:
+        left, top = rng.randrange(0, width - side), rng.randrange(0, height - side)
+        if any(left < b[2] and b[0] < left + side and top < b[3] and b[1] < top + side for b in boxes):
+            continue
+        ticket_id = f"TKT-{rng.randrange(10 ** 8):08d}"
+        code = qrcode.make(ticket_id, border=2).convert('L').resize((side, side), Image.NEAREST)
+        frame.paste(code, (left, top))
+        ticket_ids.add(ticket_id)
+        boxes.append((left, top, left + side, top + side))
+
+    pixels = np.asarray(frame, dtype=np.float64)
+    if noise:
+        pixels = pixels + np.random.default_rng(rng.randrange(2 ** 32)).normal(0, noise, pixels.shape)
+    gray = np.clip(pixels, 0, 255).astype(np.uint8)
+    # Camera frames arrive as colour images
+    return Image.fromarray(gray, mode='L').convert('RGB'), ticket_ids
+
+
+def _baseline(image):
+    from pyzbar.pyzbar import decode
+    began = time.perf_counter()
+    data = {s.data.decode('utf-8') for s in decode(image)}
+    return data, (time.perf_counter() - began) * 1000, 'baseline'
+
+
+def _pipeline(image):
+    from backend.bots import qr_decoding
+    result = qr_decoding.decode_codes(image)
+    return {c['data'] for c in result['codes']}, result['elapsed_ms'], result['stage']
+
+
+def _report(label, frames, decoder):
+    read, times, stages = 0, [], Counter()
+    for image, expected in frames:
+        data, elapsed_ms, stage = decoder(image)
+        times.append(elapsed_ms)
+        if data >= expected:
+            read += 1
+            stages[stage] += 1
+    p95 = sorted(times)[max(0, int(len(times) * 0.95) - 1)]
+    stage_text = ' '.join(f"{k}={v}" for k, v in stages.most_common())
+    print(f"  {label:<9} read={read}/{len(frames)} mean={statistics.mean(times):7.1f}ms p95={p95:7.1f}ms  {stage_text}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=12, help="Frames per case and noise level")
+    parser.add_argument('--seed', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for size, code_fraction, n_codes in CASES:
+        for noise in NOISE_LEVELS:
+            frames = [_make_frame(rng, size, code_fraction, n_codes, noise) for _ in range(args.frames)]
+            print(f"frame={size[0]}x{size[1]} code={code_fraction:.0%} codes={n_codes} noise={noise}")
+            _report('baseline', frames, _baseline)
+            _report('pipeline', frames, _pipeline)
+
+
+if __name__ == '__main__':
+    main()
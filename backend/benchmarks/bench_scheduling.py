@@ -0,0 +1,76 @@
+# backend/benchmarks/bench_scheduling.py
+"""
+Benchmark for the Step 4 slot allocation engine.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_scheduling [--posts 10000] [--articles 2000]
+
+Schedules synthetic posts across a DST change, checks every constraint of
+the platform config on the result and prints the allocation time.
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from backend.bots import config, scheduling_engine
+
+
+def _make_posts(n_posts: int, n_articles: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    articles = rng.integers(0, n_articles, size=n_posts)
+    return pd.DataFrame({
+        'post_id': [f"post-{i}" for i in range(n_posts)],
+        'article_url': [f"https://example.com/article-{a}" for a in articles],
+    })
+
+
+def _check(posts: pd.DataFrame, slots: pd.Series, platform_cfg) -> None:
+    local = slots.dt.tz_convert(config.TIMEZONE)
+    assert slots.is_unique, "two posts share a slot"
+
+    window_start, window_end = platform_cfg.posting_window
+    clock = local.dt.strftime('%H:%M')
+    assert ((clock >= window_start) & (clock <= window_end)).all(), "slot outside the posting window"
+
+    if platform_cfg.blackout_dates:
+        assert not local.dt.strftime('%Y-%m-%d').isin(platform_cfg.blackout_dates).any(), "slot on a blackout date"
+    if platform_cfg.daily_cap is not None:
+        assert local.dt.date.value_counts().max() <= platform_cfg.daily_cap, "daily cap exceeded"
+    if platform_cfg.min_article_spacing_minutes:
+        gaps = (pd.DataFrame({'article': posts['article_url'], 'slot': slots})
+                .sort_values('slot').groupby('article')['slot'].diff().dropna())
+        assert (gaps >= pd.Timedelta(minutes=platform_cfg.min_article_spacing_minutes)).all(), "article spacing violated"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posts', type=int, default=10_000)
+    parser.add_argument('--articles', type=int, default=2_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    platform_cfg = config.PlatformConfig(
+        sheet_name="Benchmark", steps=["Step 1", "Step 2", "Step 3", "Step 4", "Step 5"],
+        posting_window=("08:00", "22:00"), interval_minutes=30, daily_cap=24,
+        min_article_spacing_minutes=180, blackout_dates=("2025-12-25", "2026-01-01"),
+    )
+    posts = _make_posts(args.posts, args.articles)
+    # Starts shortly before the end of DST so the calendar crosses the clock change
+    start = pd.Timestamp("2025-10-20 07:00", tz=config.TIMEZONE)
+
+    timings = []
+    for _ in range(args.repeat):
+        began = time.perf_counter()
+        slots = scheduling_engine.assign_slots(posts, platform_cfg, start)
+        timings.append(time.perf_counter() - began)
+    _check(posts, slots, platform_cfg)
+
+    best = min(timings)
+    print(f"posts={args.posts} articles={args.articles} "
+          f"best={best * 1000:.1f}ms median={np.median(timings) * 1000:.1f}ms "
+          f"throughput={args.posts / best:,.0f} posts/s "
+          f"last_slot={slots.max().tz_convert(config.TIMEZONE)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,470 @@
+# backend/benchmarks/fakes.py
+"""
+In-process stand-ins for the external services the pipeline talks to, so the
+whole workflow can run (and be timed) without any account:
+
+    content = ContentServer().start()           # article pages, images, GCS objects over HTTP
+    services = install(content, openai_latency=0.2, sheets_latency=0.05)
+    # ... only now import the pipeline modules (they open their clients at import)
+    services.gspread_client.seed(config.PLATFORMS, {'facebook': {'step3': [...]}})
+    ...
+    services.calls        # Counter of {(service, operation): n}
+
+- FakeGspreadClient: spreadsheets and worksheets kept in memory, with the
+  gspread calls the bots use (row_values, get_all_records, append_rows,
+  batch_update, ...). It is not wrapped in the Sheets access layer, whose
+  quota would otherwise dominate every measurement.
+- FakeOpenAI: answers chat.completions.create with correctly tagged output for
+  each prompt (summary with [CONCLUSION] tags, chart detection JSON, post text
+  with [POST_TEXT]/[HASHTAGS], image match scores), with usage counts.
+- FakeGcsClient: a bucket whose objects are served by the ContentServer, so
+  public URLs can be downloaded again (media preparation, Twitter uploads).
+- FakeTwitterApi / FakeTwitterClient: the Tweepy v1.1 media upload and v2
+  create_tweet calls.
+Facebook and Instagram go to graph_stub.GraphApiStub.
+"""
+import hashlib
+import io
+import itertools
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import urlparse
+import gspread
+from gspread.utils import a1_to_rowcol
+from PIL import Image, ImageDraw
+
+
+class CallCounter:
+    """Thread-safe counts of calls per (service, operation)."""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, service: str, operation: str, n: int = 1):
+        with self._lock:
+            self._counts[(service, operation)] += n
+
+    def snapshot(self) -> Counter:
+        with self._lock:
+            return Counter(self._counts)
+
+    def by_service(self) -> dict:
+        totals = Counter()
+        for (service, _), n in self.snapshot().items():
+            totals[service] += n
+        return dict(totals)
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+# --- Google Sheets ---
+
+class FakeWorksheet:
+    def __init__(self, title: str, calls: CallCounter, latency: float = 0.0, rows=None):
+        self.title = title
+        self.id = abs(hash(title)) % 10 ** 9
+        self.rows = [list(r) for r in rows or []]
+        self._calls = calls
+        self._latency = latency
+        self._lock = threading.Lock()
+
+    def _call(self, kind: str, operation: str):
+        self._calls.add('sheets', f"{kind}.{operation}")
+        if self._latency:
+            time.sleep(self._latency)
+
+    def _set_cell(self, row: int, col: int, value):
+        while len(self.rows) < row:
+            self.rows.append([])
+        cells = self.rows[row - 1]
+        cells.extend([''] * (col - len(cells)))
+        cells[col - 1] = '' if value is None else str(value)
+
+    def _write_block(self, start: str, values):
+        row, col = a1_to_rowcol(start.split('!')[-1].split(':')[0])
+        for i, values_row in enumerate(values):
+            for j, value in enumerate(values_row):
+                self._set_cell(row + i, col + j, value)
+
+    # Reads
+    def row_values(self, row: int, **kwargs):
+        self._call('read', 'row_values')
+        with self._lock:
+            values = list(self.rows[row - 1]) if len(self.rows) >= row else []
+        while values and values[-1] == '':
+            values.pop()
+        return values
+
+    def col_values(self, col: int, **kwargs):
+        self._call('read', 'col_values')
+        with self._lock:
+            return [r[col - 1] if len(r) >= col else '' for r in self.rows]
+
+    def get_all_values(self, **kwargs):
+        self._call('read', 'get_all_values')
+        with self._lock:
+            width = max((len(r) for r in self.rows), default=0)
+            return [list(r) + [''] * (width - len(r)) for r in self.rows]
+
+    def get_all_records(self, **kwargs):
+        self._call('read', 'get_all_records')
+        with self._lock:
+            if not self.rows:
+                return []
+            headers = self.rows[0]
+            return [dict(zip(headers, list(r) + [''] * (len(headers) - len(r)))) for r in self.rows[1:]]
+
+    # Writes
+    def update(self, values=None, range_name=None, **kwargs):
+        if isinstance(values, str):
+            # Older gspread argument order: update(range_name, values)
+            values, range_name = range_name, values
+        self._call('write', 'update')
+        with self._lock:
+            self._write_block(range_name or 'A1', values)
+
+    def append_row(self, values, **kwargs):
+        self.append_rows([values], **kwargs)
+
+    def append_rows(self, values, **kwargs):
+        self._call('write', 'append_rows')
+        with self._lock:
+            self.rows.extend([['' if v is None else str(v) for v in row] for row in values])
+
+    def batch_update(self, data, **kwargs):
+        self._call('write', 'batch_update')
+        with self._lock:
+            for item in data:
+                self._write_block(item['range'], item['values'])
+
+    def delete_rows(self, start_index, end_index=None):
+        self._call('write', 'delete_rows')
+        with self._lock:
+            del self.rows[start_index - 1:end_index or start_index]
+
+
+class FakeSpreadsheet:
+    def __init__(self, title: str, worksheets: dict):
+        self.title = title
+        self.id = hashlib.sha1(title.encode('utf-8')).hexdigest()[:20]
+        self._worksheets = worksheets
+
+    def worksheet(self, title: str):
+        if title not in self._worksheets:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return self._worksheets[title]
+
+    def worksheets(self):
+        return list(self._worksheets.values())
+
+
+class FakeGspreadClient:
+    def __init__(self, calls: CallCounter, latency: float = 0.0):
+        self.calls = calls
+        self.latency = latency
+        self._spreadsheets = {}
+
+    def seed(self, platforms: dict, headers: dict):
+        """
+        Creates (or empties) each platform's spreadsheet.
+
+        Args:
+            platforms: config.PLATFORMS.
+            headers: {platform_name: {step_key: [column, ...]}} for the
+                     worksheets that start with a header row (e.g. 'step3').
+        """
+        self._spreadsheets.clear()
+        for platform_name, platform_config in platforms.items():
+            worksheets = {}
+            for step_key, title in platform_config.steps.items():
+                step_headers = headers.get(platform_name, {}).get(step_key)
+                worksheets[title] = FakeWorksheet(title, self.calls, self.latency,
+                                                  [step_headers] if step_headers else [])
+            self._spreadsheets[platform_config.sheet_name] = FakeSpreadsheet(platform_config.sheet_name, worksheets)
+
+    def worksheet(self, sheet_name: str, title: str) -> FakeWorksheet:
+        """Direct access for the benchmark itself (not counted as a call)."""
+        return self._spreadsheets[sheet_name].worksheet(title)
+
+    def open(self, title: str):
+        self.calls.add('sheets', 'read.open')
+        if title not in self._spreadsheets:
+            raise gspread.exceptions.SpreadsheetNotFound(title)
+        return self._spreadsheets[title]
+
+
+# --- OpenAI ---
+
+class FakeOpenAI:
+    """
+    Mimics `openai.chat.completions.create`, recognising the pipeline's
+    prompts by their shape:
+
+    - summary: a plain-text user message (the article) -> `conclusions`
+      [CONCLUSION] blocks;
+    - chart detection: an image-only user message -> is_chart JSON (images
+      whose URL contains 'chart' are charts);
+    - image matching: text plus image -> a score JSON between 0 and 10;
+    - post generation: the 'CONTEXTUAL SUMMARY' prompt -> [POST_TEXT] and
+      [HASHTAGS] blocks.
+    """
+
+    def __init__(self, calls: CallCounter, latency: float = 0.0, conclusions: int = 3, seed: int = 3):
+        self.calls = calls
+        self.latency = latency
+        self.conclusions = conclusions
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model=None, messages=(), **kwargs):
+        user = messages[-1]['content']
+        if isinstance(user, list):
+            kinds = {part['type'] for part in user}
+            if kinds == {'image_url'}:
+                kind = 'chart_detection'
+                url = user[0]['image_url']['url']
+                content = json.dumps({'is_chart': 'chart' in url, 'confidence': 0.9})
+            else:
+                kind = 'image_matching'
+                with self._rng_lock:
+                    score = self._rng.randint(3, 10)
+                content = json.dumps({'score': score})
+        elif user.startswith("CONTEXTUAL SUMMARY:"):
+            kind = 'generation'
+            focus = user.rsplit("CONCLUSION TO FOCUS ON:", 1)[-1].strip()
+            content = (f"[POST_TEXT]Why it matters: {focus[:200]}[/POST_TEXT]\n"
+                       f"[HASHTAGS]#economy #data #charts[/HASHTAGS]")
+        else:
+            kind = 'summarize'
+            sentences = [s.strip() for s in user.split('.') if s.strip()]
+            picks = sentences[:self.conclusions] or ["The article makes no claim"]
+            content = "Summary of the article.\n" + "\n".join(
+                f"[CONCLUSION]{s}.[/CONCLUSION]" for s in picks
+            )
+
+        self.calls.add('openai', kind)
+        if self.latency:
+            time.sleep(self.latency)
+        prompt_tokens = sum(len(json.dumps(m['content'])) for m in messages) // 4
+        completion_tokens = len(content) // 4
+        usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                total_tokens=prompt_tokens + completion_tokens)
+        return SimpleNamespace(model=model, usage=usage,
+                               choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+# --- Google Cloud Storage ---
+
+class FakeBlob:
+    def __init__(self, bucket, name: str):
+        self.bucket = bucket
+        self.name = name
+
+    @property
+    def public_url(self) -> str:
+        return f"{self.bucket.base_url}/gcs/{self.bucket.name}/{self.name}"
+
+    def exists(self) -> bool:
+        self.bucket.calls.add('gcs', 'exists')
+        return (self.bucket.name, self.name) in self.bucket.objects
+
+    def upload_from_file(self, file, content_type=None, **kwargs):
+        self.bucket.calls.add('gcs', 'upload')
+        if self.bucket.latency:
+            time.sleep(self.bucket.latency)
+        self.bucket.objects[(self.bucket.name, self.name)] = (file.read(), content_type or 'application/octet-stream')
+
+
+class FakeBucket:
+    def __init__(self, name, objects: dict, base_url: str, calls: CallCounter, latency: float):
+        self.name = name or 'bench-bucket'
+        self.objects = objects
+        self.base_url = base_url
+        self.calls = calls
+        self.latency = latency
+
+    def blob(self, name: str):
+        return FakeBlob(self, name)
+
+
+class FakeGcsClient:
+    def __init__(self, content_server, calls: CallCounter, latency: float = 0.0):
+        self._server = content_server
+        self.calls = calls
+        self.latency = latency
+
+    def bucket(self, name):
+        return FakeBucket(name, self._server.objects, self._server.base_url, self.calls, self.latency)
+
+
+# --- Twitter (Tweepy) ---
+
+class FakeTwitterApi:
+    """The part of tweepy.API (v1.1) the publisher uses: media_upload."""
+
+    def __init__(self, calls: CallCounter, latency: float = 0.0):
+        self.calls = calls
+        self.latency = latency
+        self._ids = itertools.count(1)
+
+    def media_upload(self, filename=None, file=None, **kwargs):
+        self.calls.add('twitter', 'media_upload')
+        if self.latency:
+            time.sleep(self.latency)
+        return SimpleNamespace(media_id_string=str(next(self._ids)))
+
+
+class FakeTwitterClient:
+    """The part of tweepy.Client (v2) the publisher uses: create_tweet."""
+
+    def __init__(self, calls: CallCounter, latency: float = 0.0):
+        self.calls = calls
+        self.latency = latency
+        self._ids = itertools.count(10 ** 18)
+
+    def create_tweet(self, text=None, media_ids=None, **kwargs):
+        self.calls.add('twitter', 'create_tweet')
+        if self.latency:
+            time.sleep(self.latency)
+        return SimpleNamespace(data={'id': str(next(self._ids)), 'text': text})
+
+
+# --- Article pages, images and GCS objects over HTTP ---
+
+def make_chart_png(seed: int, size=(1200, 700)) -> bytes:
+    """Draws a bar chart (or, for odd seeds, a busier 'photo') as a PNG."""
+    rng = random.Random(seed)
+    image = Image.new('RGB', size, 'white')
+    draw = ImageDraw.Draw(image)
+    bars = rng.randint(5, 12)
+    width = size[0] // (bars + 1)
+    for i in range(bars):
+        height = rng.randint(size[1] // 8, size[1] - 60)
+        colour = tuple(rng.randint(30, 200) for _ in range(3))
+        draw.rectangle([30 + i * width, size[1] - 30 - height, 30 + i * width + width * 2 // 3, size[1] - 30], fill=colour)
+    draw.line([25, size[1] - 30, size[0] - 25, size[1] - 30], fill='black', width=3)
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class ContentServer:
+    """
+    Serves synthetic article pages (/articles/<id>), their images
+    (/images/<name>.png) and the fake GCS bucket (/gcs/<bucket>/<name>).
+    """
+
+    def __init__(self, latency: float = 0.0, host: str = '127.0.0.1', port: int = 0):
+        self.latency = latency
+        self.articles = {}
+        self.objects = {}
+        self.calls = CallCounter()
+        self._images = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def add_article(self, paragraphs: int = 20, charts: int = 3, photos: int = 2) -> str:
+        """Registers an article page and returns its URL."""
+        article_id = next(self._ids)
+        sentences = [f"Indicator {article_id}.{i} rose {i % 7 + 1} percent over the quarter as demand recovered. "
+                     f"Analysts attribute the change to factor {i % 5} and expect it to persist."
+                     for i in range(paragraphs)]
+        images = [f"chart-{article_id}-{i}" for i in range(charts)] + [f"photo-{article_id}-{i}" for i in range(photos)]
+        body = "".join(f"<p>{s}</p>" for s in sentences)
+        body += "".join(f'<img src="/images/{name}.png" alt="{name}">' for name in images)
+        html = f"<html><head><title>Article {article_id}</title></head><body><h1>Article {article_id}</h1>{body}</body></html>"
+        self.articles[str(article_id)] = html.encode('utf-8')
+        return f"{self.base_url}/articles/{article_id}"
+
+    def _image(self, name: str) -> bytes:
+        with self._lock:
+            if name not in self._images:
+                self._images[name] = make_chart_png(int(hashlib.md5(name.encode()).hexdigest()[:8], 16))
+            return self._images[name]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                parts = [p for p in urlparse(self.path).path.split('/') if p]
+                body, content_type = None, 'text/html'
+                if len(parts) == 2 and parts[0] == 'articles':
+                    server.calls.add('web', 'article')
+                    body = server.articles.get(parts[1])
+                elif len(parts) == 2 and parts[0] == 'images':
+                    server.calls.add('web', 'image')
+                    body, content_type = server._image(parts[1].rsplit('.', 1)[0]), 'image/png'
+                elif len(parts) >= 3 and parts[0] == 'gcs':
+                    server.calls.add('gcs', 'download')
+                    stored = server.objects.get((parts[1], '/'.join(parts[2:])))
+                    if stored:
+                        body, content_type = stored
+                if body is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+# --- Wiring ---
+
+def install(content_server: ContentServer, openai_latency: float = 0.0, sheets_latency: float = 0.0,
+            gcs_latency: float = 0.0, twitter_latency: float = 0.0, conclusions: int = 3):
+    """
+    Points backend.bots.clients at the fakes. Call it before importing any
+    pipeline module: several bind their clients at import.
+
+    Returns:
+        A namespace with the fakes and the shared `calls` counter.
+    """
+    from backend.bots import clients
+    calls = content_server.calls
+    services = SimpleNamespace(
+        calls=calls,
+        gspread_client=FakeGspreadClient(calls, sheets_latency),
+        openai=FakeOpenAI(calls, openai_latency, conclusions),
+        gcs_client=FakeGcsClient(content_server, calls, gcs_latency),
+        tweepy_clients=(FakeTwitterApi(calls, twitter_latency), FakeTwitterClient(calls, twitter_latency)),
+    )
+    clients.get_gspread_client = lambda: services.gspread_client
+    clients.get_openai_client = lambda: services.openai
+    clients.get_gcs_client = lambda: services.gcs_client
+    clients.get_tweepy_clients = lambda: services.tweepy_clients
+    return services
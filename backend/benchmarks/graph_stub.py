@@ -0,0 +1,122 @@
+# backend/benchmarks/graph_stub.py
+"""
+A local stand-in for the parts of the Facebook Graph API the publisher uses.
+
+    stub = GraphApiStub(latency=0.05, container_processing=2.0)
+    stub.start()          # serves on http://127.0.0.1:<port>
+    config.GRAPH_API_BASE = stub.base_url
+    ...
+    stub.stop()
+
+Instagram containers report IN_PROGRESS until `container_processing` seconds
+after creation. Every request sleeps `latency` seconds first, like a round trip;
+a batch request (POST / with a `batch` parameter) pays it once for all its
+operations.
+"""
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class GraphApiStub:
+    def __init__(self, latency: float = 0.05, container_processing: float = 2.0, host: str = '127.0.0.1', port: int = 0):
+        self.latency = latency
+        self.container_processing = container_processing
+        self.containers = {}
+        self.requests = 0
+        self.http_requests = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _next_id(self) -> str:
+        with self._lock:
+            self.requests += 1
+            return str(next(self._ids))
+
+    # --- Request handling ---
+
+    def handle(self, method: str, path: str, params: dict):
+        """Returns (status_code, json_body) for one Graph API call."""
+        parts = [p for p in path.split('/') if p]
+        if method == 'POST' and not parts and 'batch' in params:
+            return 200, [self._handle_batch_item(op) for op in json.loads(params['batch'])]
+        if method == 'POST' and len(parts) == 2 and parts[1] == 'photos':
+            new_id = self._next_id()
+            return 200, {'id': new_id, 'post_id': f"{parts[0]}_{new_id}"}
+        if method == 'POST' and len(parts) == 2 and parts[1] == 'media':
+            container_id = f"container-{self._next_id()}"
+            self.containers[container_id] = time.monotonic()
+            return 200, {'id': container_id}
+        if method == 'POST' and len(parts) == 2 and parts[1] == 'media_publish':
+            self._next_id()
+            if params.get('creation_id') not in self.containers:
+                return 400, {'error': {'message': 'Unknown creation_id'}}
+            return 200, {'id': f"media-{params['creation_id'].split('-')[-1]}"}
+        if method == 'GET' and len(parts) == 1 and params.get('fields') == 'status_code':
+            self._next_id()
+            created = self.containers.get(parts[0])
+            if created is None:
+                return 404, {'error': {'message': 'Unknown container'}}
+            done = time.monotonic() - created >= self.container_processing
+            return 200, {'status_code': 'FINISHED' if done else 'IN_PROGRESS', 'id': parts[0]}
+        if method == 'GET' and len(parts) == 1 and params.get('fields') == 'permalink':
+            self._next_id()
+            return 200, {'permalink': f"https://www.instagram.com/p/{parts[0]}/", 'id': parts[0]}
+        return 404, {'error': {'message': f"Unsupported call {method} {path}"}}
+
+    def _handle_batch_item(self, op: dict) -> dict:
+        url = urlparse(op.get('relative_url', ''))
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        params.update({k: v[0] for k, v in parse_qs(op.get('body', '')).items()})
+        status, body = self.handle(op.get('method', 'GET').upper(), url.path, params)
+        return {'code': status, 'headers': [], 'body': json.dumps(body)}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _respond(self, method, params):
+                time.sleep(stub.latency)
+                with stub._lock:
+                    stub.http_requests += 1
+                status, body = stub.handle(method, urlparse(self.path).path, params)
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                self._respond('GET', {k: v[0] for k, v in query.items()})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                form = parse_qs(self.rfile.read(length).decode('utf-8'))
+                self._respond('POST', {k: v[0] for k, v in form.items()})
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,75 @@
+# backend/bots/approvals.py
+from gspread.utils import rowcol_to_a1
+from . import config, changefeed
+
+# Approval decisions are collected by the dashboard (or sent to the API) and
+# written in bulk: one read of the header row and post_id column plus one
+# batch_update per Step 3 worksheet, however many posts were reviewed.
+
+# Decision -> value written to 'Approved_by_human'
+DECISION_VALUES = {'approve': 'yes', 'reject': 'no'}
+# Why a decision was not applied ('reason' of a failed decision)
+FAILURE_REASONS = ['platform_not_found', 'invalid_decision', 'post_not_found', 'sheet_error']
+
+
+def apply_decisions(gspread_client, decisions: list[dict]) -> dict:
+    """
+    Writes approval decisions to the 'Step 3' sheets.
+
+    Args:
+        gspread_client: An authorized gspread client.
+        decisions: A list of {'platform', 'post_id', 'decision'} dicts, where
+                   decision is 'approve' or 'reject'.
+
+    Returns:
+        A dict with 'applied' (the decisions that were written) and 'failed'
+        (the other decisions, each with a 'reason' from FAILURE_REASONS and
+        an 'error' message).
+    """
+    applied, failed = [], []
+    by_worksheet = {}
+    for decision in decisions:
+        platform_cfg = config.PLATFORMS.get(decision.get('platform'))
+        if platform_cfg is None:
+            failed.append({**decision, 'reason': 'platform_not_found', 'error': "Platform not found."})
+        elif decision.get('decision') not in DECISION_VALUES:
+            failed.append({**decision, 'reason': 'invalid_decision',
+                           'error': f"Invalid decision '{decision.get('decision')}'."})
+        else:
+            key = (platform_cfg.sheet_name, platform_cfg.steps['step3'])
+            by_worksheet.setdefault(key, []).append(decision)
+
+    for (sheet_name, worksheet_name), group in by_worksheet.items():
+        written, missing = [], []
+        try:
+            worksheet = gspread_client.open(sheet_name).worksheet(worksheet_name)
+            headers = [h.strip().lower() for h in worksheet.row_values(1)]
+            if 'approved_by_human' not in headers or 'post_id' not in headers:
+                raise ValueError("Could not find the 'Approved_by_human' or 'post_id' column in the sheet.")
+            approval_col = headers.index('approved_by_human') + 1
+            post_ids = worksheet.col_values(headers.index('post_id') + 1)
+            row_of = {str(pid).strip(): i + 1 for i, pid in enumerate(post_ids) if i > 0}
+
+            data = []
+            for decision in group:
+                row_number = row_of.get(str(decision['post_id']).strip())
+                if row_number is None:
+                    missing.append({**decision, 'reason': 'post_not_found',
+                                    'error': f"Post with ID {decision['post_id']} not found."})
+                    continue
+                data.append({'range': rowcol_to_a1(row_number, approval_col),
+                             'values': [[DECISION_VALUES[decision['decision']]]]})
+                written.append(decision)
+            if data:
+                worksheet.batch_update(data, value_input_option='RAW')
+        except Exception as e:
+            print(f"APPROVALS: -> ERROR! Could not write decisions to {sheet_name}. Error: {e}")
+            failed.extend({**d, 'reason': 'sheet_error', 'error': str(e)} for d in group)
+            continue
+
+        failed.extend(missing)
+        for decision in written:
+            changefeed.record_change(decision['platform'], decision['post_id'], 'step3', 'update',
+                                     {'Approved_by_human': DECISION_VALUES[decision['decision']]})
+        applied.extend(written)
+    return {'applied': applied, 'failed': failed}
@@ -0,0 +1,164 @@
+# backend/bots/archive.py
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+from . import config, changefeed
+from .step4_scheduling import scheduled_times_utc
+
+# Published Step 4 rows older than the retention window are moved out of the
+# sheets into Parquet files partitioned by platform and month:
+#   <ARCHIVE_DIR>/platform=<platform>/month=<YYYY-MM>/part-<uuid>.parquet
+# Every column is stored as a string, plus 'scheduled_epoch' (UTC seconds).
+
+
+def archive_posted_rows(gspread_client, platform_name: str, retention_days: int = config.ARCHIVE_RETENTION_DAYS) -> int:
+    """
+    Moves 'Posted' rows scheduled more than `retention_days` ago from the
+    platform's 'Step 4' sheet into the columnar archive.
+
+    The Parquet files are written before any row is deleted, so an
+    interrupted run can at worst leave a row in both places (readers
+    de-duplicate on post_id).
+
+    Returns:
+        The number of archived rows.
+    """
+    print(f"--- Archiving published posts for {platform_name.capitalize()} ---")
+    platform_cfg = config.PLATFORMS[platform_name]
+    worksheet = gspread_client.open(platform_cfg.sheet_name).worksheet(platform_cfg.steps['step4'])
+    records = worksheet.get_all_records()
+    if not records:
+        print("  - Schedule is empty. Nothing to archive.")
+        return 0
+
+    df = pd.DataFrame(records)
+    if 'Posted_Status' not in df.columns or 'Scheduled_Time' not in df.columns:
+        print("  - Schedule has no Posted_Status/Scheduled_Time columns. Nothing to archive.")
+        return 0
+
+    scheduled = scheduled_times_utc(df)
+    cutoff = pd.Timestamp(datetime.now(timezone.utc) - timedelta(days=retention_days))
+    cold = (df['Posted_Status'].astype(str).str.strip() == 'Posted') & (scheduled < cutoff)
+    if not cold.any():
+        print(f"  - No published posts older than {retention_days} days.")
+        return 0
+
+    cold_df = df[cold].fillna('').astype(str)
+    cold_df['scheduled_epoch'] = (scheduled[cold] - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)
+    months = scheduled[cold].dt.tz_convert(config.TIMEZONE).dt.strftime('%Y-%m')
+    for month, month_df in cold_df.groupby(months):
+        partition_dir = os.path.join(config.ARCHIVE_DIR, f"platform={platform_name}", f"month={month}")
+        os.makedirs(partition_dir, exist_ok=True)
+        month_df.to_parquet(os.path.join(partition_dir, f"part-{uuid.uuid4().hex}.parquet"), index=False)
+
+    # Delete archived rows bottom-up, one API call per contiguous block,
+    # so the row numbers of blocks still to be deleted do not shift
+    sheet_rows = sorted((cold_df.index + 2).tolist(), reverse=True)
+    block_end = block_start = sheet_rows[0]
+    for row in sheet_rows[1:] + [None]:
+        if row is not None and row == block_start - 1:
+            block_start = row
+            continue
+        worksheet.delete_rows(block_start, block_end)
+        if row is not None:
+            block_end = block_start = row
+
+    for post_id in cold_df.get('post_id', []):
+        changefeed.record_change(platform_name, post_id, 'step4', 'delete')
+    print(f"  - Archived {len(cold_df)} published posts.")
+    return len(cold_df)
+
+
+def query_archive(platforms: list[str] | None = None, since=None, until=None) -> pd.DataFrame:
+    """
+    Reads archived posts, pruning partitions by platform and month.
+
+    Args:
+        platforms: Platforms to include (default: all).
+        since / until: Optional inclusive bounds on the scheduled time;
+                       naive datetimes are interpreted in config.TIMEZONE.
+
+    Returns:
+        A DataFrame of archived rows with a 'platform' column, de-duplicated
+        on post_id (empty if nothing is archived yet).
+    """
+    if not os.path.isdir(config.ARCHIVE_DIR):
+        return pd.DataFrame()
+
+    since_ts, until_ts = _to_utc(since), _to_utc(until)
+    since_month = since_ts.tz_convert(config.TIMEZONE).strftime('%Y-%m') if since_ts is not None else None
+    until_month = until_ts.tz_convert(config.TIMEZONE).strftime('%Y-%m') if until_ts is not None else None
+
+    # Files are read one by one and concatenated: a dataset read would take
+    # the schema of the first file and drop the columns only other platforms
+    # (e.g. 'Tweet') or newer files (e.g. 'Prepared_Image_Path') have
+    frames = []
+    for platform_name in platforms or config.PLATFORMS:
+        for month, path in _partition_files(platform_name):
+            if (since_month and month < since_month) or (until_month and month > until_month):
+                continue
+            df = pd.read_parquet(path)
+            df['platform'] = platform_name
+            frames.append(df)
+    if not frames:
+        return pd.DataFrame()
+
+    df = pd.concat(frames, ignore_index=True)
+    epoch = pd.to_numeric(df['scheduled_epoch'], errors='coerce')
+    if since_ts is not None:
+        df = df[epoch >= int(since_ts.timestamp())]
+    if until_ts is not None:
+        df = df[epoch <= int(until_ts.timestamp())]
+    if df.empty:
+        return df.reset_index(drop=True)
+    # Columns missing from older files or other platforms read as empty, like blank sheet cells
+    text_columns = [c for c in df.columns if c != 'scheduled_epoch']
+    df[text_columns] = df[text_columns].fillna('')
+    if 'post_id' in df.columns:
+        df = df.drop_duplicates(['platform', 'post_id'], keep='last')
+    return df.reset_index(drop=True)
+
+
+def archived_post_ids(platform_name: str) -> set:
+    """
+    Returns the post_ids of every archived post of a platform, so the
+    scheduler does not put a post back on the schedule once its row has
+    been moved out of 'Step 4'. Only the post_id column is read.
+    """
+    post_ids = set()
+    for _, path in _partition_files(platform_name):
+        try:
+            column = pd.read_parquet(path, columns=['post_id'])['post_id']
+        except ValueError:
+            # Archived from a sheet without a post_id column
+            continue
+        post_ids.update(column.dropna().astype(str).str.strip())
+    post_ids.discard('')
+    return post_ids
+
+
+def _partition_files(platform_name: str) -> list:
+    """Returns the (month, path) of every archive file of a platform, oldest file first."""
+    platform_dir = os.path.join(config.ARCHIVE_DIR, f"platform={platform_name}")
+    if not os.path.isdir(platform_dir):
+        return []
+    files = []
+    for month_dir in os.listdir(platform_dir):
+        if not month_dir.startswith('month='):
+            continue
+        month_path = os.path.join(platform_dir, month_dir)
+        for name in os.listdir(month_path):
+            if name.endswith('.parquet'):
+                files.append((month_dir.split('=', 1)[1], os.path.join(month_path, name)))
+    # Written order, so de-duplication keeps the most recently archived copy
+    return sorted(files, key=lambda f: os.path.getmtime(f[1]))
+
+
+def _to_utc(value):
+    if value is None:
+        return None
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize(config.TIMEZONE, ambiguous=False, nonexistent='shift_forward')
+    return ts.tz_convert('UTC')
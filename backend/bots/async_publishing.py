@@ -0,0 +1,141 @@
+# backend/bots/async_publishing.py
+import asyncio
+import os
+import time
+import pandas as pd
+from . import config, orchestrator, step4_scheduling, step5_publishing, tracing
+
+# Concurrent publishing engine. Posts for all platforms are published at the
+# same time, bounded by a semaphore. Blocking HTTP calls run on worker threads,
+# and Instagram containers are driven as a non-blocking state machine
+# (CREATE -> POLL with backoff -> PUBLISH): waiting for one container only
+# suspends its own coroutine, never another post.
+
+
+async def _post_to_instagram_async(account_id, access_token, image_url, caption):
+    """Async counterpart of step5_publishing._post_to_instagram."""
+    state, container_id = 'CREATE', None
+    delay = config.IG_POLL_INITIAL_DELAY
+    deadline = time.monotonic() + config.IG_CONTAINER_TIMEOUT
+    try:
+        while True:
+            if state == 'CREATE':
+                container_id = await asyncio.to_thread(
+                    step5_publishing._ig_create_container, account_id, access_token, image_url, caption
+                )
+                state = 'POLL'
+            elif state == 'POLL':
+                status = await asyncio.to_thread(step5_publishing._ig_container_status, container_id, access_token)
+                if status == 'FINISHED':
+                    state = 'PUBLISH'
+                elif status == 'ERROR':
+                    return False, "Instagram media container failed processing."
+                elif time.monotonic() + delay > deadline:
+                    return False, "Instagram media container did not finish processing in time."
+                else:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, config.IG_POLL_MAX_DELAY)
+            else:
+                permalink = await asyncio.to_thread(
+                    step5_publishing._ig_publish_container, account_id, access_token, container_id
+                )
+                return True, permalink
+    except Exception as e:
+        print(f"ERROR: Instagram post failed. Error: {e}")
+        # Nothing is live before media_publish; after it, only a clear refusal is safe to retry
+        retryable = state != 'PUBLISH' or step5_publishing._rejected(e)
+        return (False if retryable else None), str(e)
+
+
+async def publish_post_async(platform_name: str, post_data: dict) -> tuple[bool | None, str]:
+    """Async counterpart of step5_publishing.publish_post (same arguments and result)."""
+    if platform_name != 'instagram':
+        return await asyncio.to_thread(step5_publishing.publish_post, platform_name, post_data)
+
+    print(f"--- Starting Step 5: Publishing to {platform_name.capitalize()} ---")
+    _, full_caption, image_url = step5_publishing.build_post_content(platform_name, post_data)
+    with tracing.span('publish', platform=platform_name, post_id=str(post_data.get('post_id', ''))) as span:
+        try:
+            success, result = await _post_to_instagram_async(
+                account_id=os.getenv("IG_ACCOUNT_ID"),
+                access_token=os.getenv("IG_ACCESS_TOKEN"),
+                image_url=image_url,
+                caption=full_caption
+            )
+        except Exception as e:
+            success, result = None, f"An unexpected error occurred in the dispatcher: {e}"
+        if not success:
+            span.fail(result)
+    return success, result
+
+
+async def publish_rows_async(platform_name, worksheet, headers, rows, semaphore: asyncio.Semaphore):
+    """
+    Concurrent counterpart of orchestrator.publish_rows: publishes the rows
+    at the same time (bounded by `semaphore`), claiming each one in the
+    publish outbox once it gets its turn, and logs all results in one batch.
+    """
+    async def publish_one(row_number, post):
+        async with semaphore:
+            # Claimed only now, so rows waiting for the semaphore hold no lease
+            claimed, recovered = await asyncio.to_thread(orchestrator.claim_rows, platform_name, [(row_number, post)])
+            if not claimed:
+                return recovered[0] if recovered else None
+            try:
+                print(f"  - POSTING DUE: {platform_name.capitalize()} row {row_number}, '{str(post.get('Name', 'N/A'))[:40]}...'")
+                success, result = await publish_post_async(platform_name, post)
+            except Exception as e:
+                print(f"  - ERROR processing {platform_name.capitalize()} row {row_number}. Error: {e}")
+                success, result = None, str(e)
+        settled = await asyncio.to_thread(orchestrator.settle_result, platform_name, row_number, post, success, result)
+        if settled:
+            print(f"  - Published {platform_name.capitalize()} row {row_number}. Status: {settled[2]}")
+        return settled
+
+    rows, results = list(rows), []
+    if orchestrator.uses_facebook_batch(platform_name, rows):
+        # One request carries all the posts; no point in fanning out
+        async with semaphore:
+            results += await asyncio.to_thread(orchestrator.publish_facebook_batch_rows, rows)
+    else:
+        results += [r for r in await asyncio.gather(*(publish_one(n, p) for n, p in rows)) if r]
+    await asyncio.to_thread(orchestrator._write_publish_results, platform_name, worksheet, headers, results)
+    return results
+
+
+async def run_publishing_for_all_platforms_async(max_posts_per_platform: int = 1,
+                                                 concurrency: int = config.PUBLISHER_CONCURRENCY):
+    """
+    Concurrent version of orchestrator.run_publishing_for_all_platforms:
+    every platform's due posts are published at the same time.
+    """
+    print("\nASYNC_PUBLISHING: Starting concurrent publishing run for all platforms...")
+    now = pd.Timestamp.now(tz=config.TIMEZONE)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    def load_due(platform_name):
+        platform_config = config.PLATFORMS[platform_name]
+        worksheet = orchestrator.gspread_client.open(platform_config.sheet_name).worksheet(platform_config.steps['step4'])
+        all_posts_df = pd.DataFrame(worksheet.get_all_records())
+        if all_posts_df.empty:
+            return worksheet, [], []
+        due_df = step4_scheduling.find_due_posts(all_posts_df, now)
+        due_df = orchestrator.drop_unready_posts(platform_name, due_df).head(max_posts_per_platform)
+        return worksheet, list(all_posts_df.columns), [(idx + 2, post) for idx, post in due_df.iterrows()]
+
+    async def run_platform(platform_name):
+        try:
+            worksheet, headers, rows = await asyncio.to_thread(load_due, platform_name)
+            if not rows:
+                print(f"  - {platform_name.capitalize()}: nothing due.")
+                return []
+            return await publish_rows_async(platform_name, worksheet, headers, rows, semaphore)
+        except Exception as e:
+            print(f"ASYNC_PUBLISHING: -> ERROR! Failed to run publishing for {platform_name}. Error: {e}")
+            return []
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(run_platform(p) for p in config.PLATFORMS))
+    total = sum(len(r) for r in results)
+    print(f"ASYNC_PUBLISHING: Published {total} post(s) in {time.perf_counter() - started:.1f}s.")
+    return total
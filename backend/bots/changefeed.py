@@ -0,0 +1,187 @@
+# backend/bots/changefeed.py
+import json
+import os
+import sqlite3
+import time
+from . import config
+
+# Every insert/update of a post bumps a global version number (the SQLite rowid),
+# so readers can ask for "everything since version N" instead of reloading whole
+# sheets. The store is a local SQLite file shared by the API and the dashboard.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS changes (
+    version    INTEGER PRIMARY KEY AUTOINCREMENT,
+    platform   TEXT NOT NULL,
+    post_id    TEXT NOT NULL,
+    stage      TEXT NOT NULL,
+    kind       TEXT NOT NULL,
+    data       TEXT NOT NULL,
+    changed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+STAGES = ['step3', 'step4']
+KINDS = ['insert', 'update', 'delete']
+
+_last_prune = None  # time.monotonic() of this process's last prune
+
+
+def _connect():
+    os.makedirs(os.path.dirname(config.CHANGEFEED_DB_PATH), exist_ok=True)
+    conn = sqlite3.connect(config.CHANGEFEED_DB_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def record_change(platform: str, post_id: str, stage: str, kind: str, data: dict | None = None) -> int | None:
+    """
+    Records that a post was inserted into or updated in a workflow sheet.
+
+    Args:
+        platform: 'facebook', 'instagram' or 'twitter'.
+        post_id: The post_id of the affected row.
+        stage: 'step3' (approval queue) or 'step4' (schedule).
+        kind: 'insert', 'update' or 'delete'.
+        data: The full row for inserts, or only the changed columns for updates.
+
+    Returns:
+        The new version number, or None if the change could not be recorded.
+        Failures are logged but never raised: the sheets stay the source of
+        truth and readers fall back to a full reload.
+    """
+    try:
+        with _connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO changes (platform, post_id, stage, kind, data, changed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (platform, str(post_id), stage, kind, json.dumps(data or {}, default=str), time.time())
+            )
+            return cur.lastrowid
+    except Exception as e:
+        print(f"CHANGEFEED: -> WARNING! Could not record {kind} of {platform}/{post_id}. Error: {e}")
+        return None
+
+
+def current_token() -> str:
+    """Returns the token for the latest recorded change (use it as `since` later)."""
+    with _connect() as conn:
+        row = conn.execute("SELECT MAX(version) FROM changes").fetchone()
+        pruned = conn.execute("SELECT value FROM meta WHERE key = 'pruned_through'").fetchone()
+    return str(max(row[0] or 0, pruned[0] if pruned else 0))
+
+
+def changes_since(since: str | None, stage: str | None = None, limit: int = 1000) -> dict:
+    """
+    Returns the posts inserted or updated after the given token.
+
+    Multiple changes of the same post are folded into one entry, so the
+    response size is bounded by the number of changed posts.
+
+    Returns:
+        A dict with 'changes' (list of {platform, post_id, stage, kind, data, version}),
+        'next_token' to pass as `since` next time, and 'reset' which is True
+        when the token is older than the retained history and the caller
+        must do a full reload instead.
+    """
+    try:
+        since_version = int(since) if since not in (None, '') else None
+    except ValueError as e:
+        raise ValueError(f"Invalid change token: {since}") from e
+    if since_version is None:
+        return {'changes': [], 'next_token': current_token(), 'reset': True}
+
+    with _connect() as conn:
+        pruned = conn.execute("SELECT value FROM meta WHERE key = 'pruned_through'").fetchone()
+        if pruned and since_version < pruned[0]:
+            return {'changes': [], 'next_token': current_token(), 'reset': True}
+        query = "SELECT version, platform, post_id, stage, kind, data FROM changes WHERE version > ?"
+        params = [since_version]
+        if stage:
+            query += " AND stage = ?"
+            params.append(stage)
+        rows = conn.execute(query + " ORDER BY version LIMIT ?", params + [limit]).fetchall()
+
+    folded = {}
+    for version, platform, post_id, row_stage, kind, data in rows:
+        key = (platform, post_id, row_stage)
+        entry = folded.get(key)
+        if entry is None:
+            folded[key] = {'platform': platform, 'post_id': post_id, 'stage': row_stage,
+                           'kind': kind, 'data': json.loads(data), 'version': version}
+        else:
+            entry['data'].update(json.loads(data))
+            entry['version'] = version
+            if kind == 'delete' or entry['kind'] != 'insert':
+                entry['kind'] = kind
+
+    next_token = str(rows[-1][0]) if rows else str(max(since_version, int(current_token())))
+    return {'changes': sorted(folded.values(), key=lambda c: c['version']), 'next_token': next_token, 'reset': False}
+
+
+def prune(retention_days: int = config.CHANGEFEED_RETENTION_DAYS) -> int:
+    """Deletes changes older than the retention window. Returns the number of rows removed."""
+    cutoff = time.time() - retention_days * 86400
+    with _connect() as conn:
+        row = conn.execute("SELECT MAX(version) FROM changes WHERE changed_at < ?", (cutoff,)).fetchone()
+        if not row[0]:
+            return 0
+        deleted = conn.execute("DELETE FROM changes WHERE version <= ?", (row[0],)).rowcount
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('pruned_through', ?)", (row[0],))
+    return deleted
+
+
+def prune_if_due(interval_seconds: float = config.CHANGEFEED_PRUNE_INTERVAL_SECONDS) -> int:
+    """
+    Runs prune() at most once per interval in this process; called from the
+    API and publisher daemon loops. Failures are logged, never raised.
+    """
+    global _last_prune
+    now = time.monotonic()
+    if _last_prune is not None and now - _last_prune < interval_seconds:
+        return 0
+    _last_prune = now
+    try:
+        return prune()
+    except Exception as e:
+        print(f"CHANGEFEED: -> WARNING! Could not prune old changes. Error: {e}")
+        return 0
+
+
+def post_key(record: dict) -> tuple[str, str]:
+    """
+    The identity of a post: (platform, post_id). A post_id is shared by the
+    platform variants generated from one conclusion, so it never identifies
+    a post on its own.
+    """
+    return (str(record.get('platform') or ''), str(record.get('post_id') or '').strip())
+
+
+def apply_changes(records: list[dict], changes: list[dict]) -> list[dict]:
+    """
+    Client-side helper: merges a list of changes into rows already held by
+    the caller (dicts with 'platform' and 'post_id'), keeping their order.
+
+    Inserted posts are appended, updated posts get the changed columns
+    merged in, deleted posts are dropped. Callers re-apply their own filter
+    afterwards (e.g. the approval queue drops posts that are now approved).
+    """
+    index = {post_key(r): i for i, r in enumerate(records)}
+    merged = [dict(r) for r in records]
+    dropped = set()
+    for change in changes:
+        key = post_key(change)
+        if change['kind'] == 'delete':
+            if key in index:
+                dropped.add(index[key])
+            continue
+        if key in index:
+            merged[index[key]].update(change['data'])
+            dropped.discard(index[key])
+        elif change['kind'] == 'insert':
+            row = dict(change['data'])
+            row['platform'], row['post_id'] = key
+            index[key] = len(merged)
+            merged.append(row)
+    return [r for i, r in enumerate(merged) if i not in dropped]
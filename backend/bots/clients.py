@@ -2,10 +2,12 @@
 
 import os
 import json
+import threading
 import gspread
 from google.oauth2.service_account import Credentials
 from google.cloud import storage
 from google.oauth2 import service_account
+from . import sheets
 
 try:
     import streamlit as st  # noqa: F401
@@ -25,16 +27,22 @@ _SCOPES = [
 # ----------------------------
 def _client_from_info(info: dict):
     creds = Credentials.from_service_account_info(info, scopes=_SCOPES)
-    return gspread.authorize(creds)
+    return sheets.wrap_client(gspread.authorize(creds))
 
 
 def _client_from_file(path: str):
     creds = Credentials.from_service_account_file(path, scopes=_SCOPES)
-    return gspread.authorize(creds)
+    return sheets.wrap_client(gspread.authorize(creds))
 
 
 def get_gspread_client():
-    """Return an authorized gspread client."""
+    """
+    Return an authorized gspread client.
+
+    The client is wrapped in the process-wide Sheets access layer
+    (see sheets.py), so all calls share one quota, retry policy and
+    read coalescing.
+    """
     if _HAS_STREAMLIT:
         try:
             if "gcp_service_account" in st.secrets:
@@ -106,15 +114,28 @@ def get_gcs_client():
     # ----------------------------
 # Twitter (Tweepy)
 # ----------------------------
+_tweepy_clients = None
+_tweepy_lock = threading.Lock()
+
+
 def get_tweepy_clients():
     """
     Returns (api_v1, client_v2) using credentials from Streamlit secrets or env.
+    The clients are built once and reused for the life of the process.
     Requires:
       TWITTER_API_KEY
       TWITTER_API_SECRET
       TWITTER_ACCESS_TOKEN
       TWITTER_ACCESS_TOKEN_SECRET
     """
+    global _tweepy_clients
+    with _tweepy_lock:
+        if _tweepy_clients is None:
+            _tweepy_clients = _build_tweepy_clients()
+        return _tweepy_clients
+
+
+def _build_tweepy_clients():
     import tweepy
     # Read from secrets first, then env
     def _get(name):
@@ -8,28 +8,65 @@ PROMPT_FILES_DIR = os.path.join(os.path.dirname(__file__), '..', 'prompt_files')
 # --- File Paths ---
 PROMPT_FILES_DIR = os.path.join(os.path.dirname(__file__), '..', 'prompt_files')
 GOOGLE_CREDENTIALS_PATH = os.path.join(os.path.dirname(__file__), '..', 'credentials.json')
+# Local state (SQLite stores, archives) shared by the API and the dashboard
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(os.path.dirname(__file__), '..', 'data'))
 
 # --- Google Cloud Storage ---
 GCS_BUCKET_NAME = os.getenv("GCS_BUCKET_NAME")
+# Dashboard thumbnails stored next to each uploaded image (bounding box in pixels, WebP quality)
+THUMBNAIL_MAX_SIZE = (320, 320)
+THUMBNAIL_QUALITY = 75
+# Prepared (per-platform) image variants are stored under this prefix, named by content hash
+GCS_PREPARED_MEDIA_PREFIX = "prepared"
+
+# --- Graph API (Facebook / Instagram) ---
+# Overridable so the publisher can be pointed at a local stub
+GRAPH_API_BASE = os.getenv("GRAPH_API_BASE", "https://graph.facebook.com/v19.0")
 
 # --- Platform-Specific Settings ---
+class MediaProfile:
+    def __init__(self, max_size=(1080, 1350), min_aspect=None, max_aspect=None,
+                 max_bytes=5 * 1024 * 1024, image_format="JPEG"):
+        # Prepared image variant: bounding box in pixels, allowed width/height
+        # ratio range (images outside it are padded, never cropped), file size
+        # limit and Pillow output format
+        self.max_size = max_size
+        self.min_aspect = min_aspect
+        self.max_aspect = max_aspect
+        self.max_bytes = max_bytes
+        self.image_format = image_format
+
 class PlatformConfig:
-    def __init__(self, sheet_name, steps):
+    def __init__(self, sheet_name, steps, posting_window=("09:00", "21:00"), interval_minutes=240,
+                 daily_cap=None, min_article_spacing_minutes=0, blackout_dates=(), media_profile=None):
         self.sheet_name = sheet_name
         self.steps = {f"step{i+1}": name for i, name in enumerate(steps)}
+        # Scheduling: local posting window (inclusive), slot interval, max posts
+        # per local day, minimum gap between posts of the same article and
+        # 'YYYY-MM-DD' dates on which nothing is posted
+        self.posting_window = posting_window
+        self.interval_minutes = interval_minutes
+        self.daily_cap = daily_cap
+        self.min_article_spacing_minutes = min_article_spacing_minutes
+        self.blackout_dates = tuple(blackout_dates)
+        self.media_profile = media_profile or MediaProfile()
 
 PLATFORMS = {
     "facebook": PlatformConfig(
         sheet_name="Facebook_Workflow",
-        steps=["Step 1", "Step 2", "Step 3", "Step 4", "Step 5"]
+        steps=["Step 1", "Step 2", "Step 3", "Step 4", "Step 5"],
+        media_profile=MediaProfile(max_size=(2048, 2048), max_bytes=4 * 1024 * 1024)
     ),
     "instagram": PlatformConfig(
         sheet_name="Instagram_Workflow",
-        steps=["Step 1", "Step 2", "Step 3", "Step 4", "Step 5"]
+        steps=["Step 1", "Step 2", "Step 3", "Step 4", "Step 5"],
+        media_profile=MediaProfile(max_size=(1080, 1350), min_aspect=4 / 5, max_aspect=1.91,
+                                   max_bytes=8 * 1024 * 1024)
     ),
     "twitter": PlatformConfig(
         sheet_name="Google_Workflow",
-        steps=["Step 1", "Step 2", "Step 3", "Step 4", "Step 5"]
+        steps=["Step 1", "Step 2", "Step 3", "Step 4", "Step 5"],
+        media_profile=MediaProfile(max_size=(1600, 1600), max_bytes=5 * 1024 * 1024)
     )
 }
 
@@ -42,4 +79,107 @@ PROMPT_FACEBOOK_POST = os.path.join(PROMPT_FILES_DIR, "facebook_prompt.txt")
 PROMPT_TWITTER_TWEET = os.path.join(PROMPT_FILES_DIR, "prompt_that_creates_tweet_text.txt")
 
 # --- Scheduling ---
-TIMEZONE = "Europe/Berlin"
\ No newline at end of file
+TIMEZONE = "Europe/Berlin"
+
+# --- Change Feed ---
+CHANGEFEED_DB_PATH = os.path.join(DATA_DIR, "changefeed.sqlite3")
+CHANGEFEED_RETENTION_DAYS = 7
+# How often the API and the publisher daemon drop changes older than the retention window
+CHANGEFEED_PRUNE_INTERVAL_SECONDS = float(os.getenv("CHANGEFEED_PRUNE_INTERVAL_SECONDS", "3600"))
+
+# --- Google Sheets quota ---
+# Sheets allows 60 read and 60 write requests per minute per user; stay below it
+SHEETS_REQUESTS_PER_MINUTE = int(os.getenv("SHEETS_REQUESTS_PER_MINUTE", "55"))
+SHEETS_BURST = int(os.getenv("SHEETS_BURST", "10"))
+SHEETS_MAX_RETRIES = 5
+SHEETS_BACKOFF_BASE_SECONDS = 1.0
+SHEETS_BACKOFF_MAX_SECONDS = 32.0
+
+# --- Archive (published Step 4 rows) ---
+ARCHIVE_DIR = os.path.join(DATA_DIR, "archive")
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", "14"))
+
+# --- Publisher daemon ---
+# At most this many due posts are published per cycle; when a backlog is
+# being caught up, the daemon pauses between cycles
+PUBLISHER_MAX_POSTS_PER_CYCLE = int(os.getenv("PUBLISHER_MAX_POSTS_PER_CYCLE", "10"))
+PUBLISHER_CATCHUP_PAUSE_SECONDS = float(os.getenv("PUBLISHER_CATCHUP_PAUSE_SECONDS", "2"))
+# How often the (cheap, local) change feed is checked for schedule changes
+PUBLISHER_CHANGE_CHECK_SECONDS = float(os.getenv("PUBLISHER_CHANGE_CHECK_SECONDS", "30"))
+# Posts published at the same time by the async publishing engine
+PUBLISHER_CONCURRENCY = int(os.getenv("PUBLISHER_CONCURRENCY", "8"))
+# Instagram container polling: first delay, max delay and overall deadline (seconds)
+IG_POLL_INITIAL_DELAY = 1.0
+IG_POLL_MAX_DELAY = 8.0
+IG_CONTAINER_TIMEOUT = 60.0
+# Facebook posts due together are sent as one Graph API batch request
+# (the API accepts at most 50 operations per batch)
+FB_BATCH_PUBLISHING = os.getenv("FB_BATCH_PUBLISHING", "true").lower() == "true"
+FB_BATCH_MAX_SIZE = 50
+
+# --- Publish outbox ---
+# Posts are claimed one at a time, so a lease must outlive the slowest single
+# publish (Instagram containers take up to IG_CONTAINER_TIMEOUT); posts the
+# platform refused are retried with exponential backoff
+OUTBOX_DB_PATH = os.path.join(DATA_DIR, "outbox.sqlite3")
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "4"))
+OUTBOX_RETRY_BASE_SECONDS = 60
+OUTBOX_RETRY_MAX_SECONDS = 3600
+
+# --- Notifications ---
+# SMTP server for approval emails; point it at a local stand-in (e.g. aiosmtpd
+# with SMTP_SECURITY=none) for testing. EMAIL_SENDER / EMAIL_PASSWORD come from the env.
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+SMTP_SECURITY = os.getenv("SMTP_SECURITY", "ssl")  # 'ssl', 'starttls' or 'none'
+SMTP_NOOP_AFTER_SECONDS = 30
+SMTP_IDLE_CLOSE_SECONDS = 120
+APPROVAL_QUEUE_URL = os.getenv("APPROVAL_QUEUE_URL", "http://localhost:8501/Approval_Queue")
+# Notifications for a recipient are gathered into one digest over this window
+NOTIFY_DB_PATH = os.path.join(DATA_DIR, "notifications.sqlite3")
+NOTIFY_DIGEST_WINDOW_SECONDS = float(os.getenv("NOTIFY_DIGEST_WINDOW_SECONDS", "300"))
+NOTIFY_POLL_SECONDS = 5
+# Failed digests are retried with exponential backoff until NOTIFY_MAX_ATTEMPTS
+NOTIFY_MAX_ATTEMPTS = 5
+NOTIFY_RETRY_BASE_SECONDS = 60
+NOTIFY_RETRY_MAX_SECONDS = 3600
+# Start a dispatcher in any process that enqueues a notification
+NOTIFY_AUTOSTART_DISPATCHER = os.getenv("NOTIFY_AUTOSTART_DISPATCHER", "true").lower() == "true"
+
+# --- Workflow jobs (API) ---
+JOBS_MAX_WORKERS = int(os.getenv("JOBS_MAX_WORKERS", "4"))
+JOBS_HISTORY_SIZE = 200
+JOBS_MAX_EVENTS = 200
+
+# --- Event check-in ---
+TICKETS_DB_PATH = os.getenv("TICKETS_DB_PATH", os.path.join(DATA_DIR, "tickets.sqlite3"))
+# Longest side of the image the scanner's fast path decodes; a code filling a
+# tenth of the frame still has a few pixels per module at this size
+QR_FAST_PATH_MAX_SIDE = int(os.getenv("QR_FAST_PATH_MAX_SIDE", "960"))
+
+# --- Dashboard ---
+# How long the Streamlit pages reuse a worksheet snapshot before reading it again
+DASHBOARD_CACHE_TTL_SECONDS = int(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "120"))
+# The API the dashboard submits workflow jobs to
+BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
+JOB_POLL_SECONDS = 2
+# Thumbnails kept in memory by the dashboard process (least recently used are dropped)
+DASHBOARD_THUMBNAIL_CACHE_SIZE = 512
+
+# --- Tracing ---
+# Finished spans are written here as JSON lines ('-' for stderr, empty to disable).
+# The file is rotated at TRACE_LOG_MAX_BYTES, keeping TRACE_LOG_BACKUP_COUNT old files
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH", os.path.join(DATA_DIR, "traces.jsonl"))
+TRACE_LOG_MAX_BYTES = int(os.getenv("TRACE_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+TRACE_LOG_BACKUP_COUNT = int(os.getenv("TRACE_LOG_BACKUP_COUNT", "3"))
+
+# --- Outbound HTTP ---
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))
+HTTP_MAX_RETRIES = 3
+
+# --- Twitter ---
+# Media ids are valid for 24 hours after upload; reuse them for a bit less
+TWITTER_MEDIA_ID_TTL_SECONDS = 23 * 3600
@@ -2,34 +2,116 @@
 import os
 import smtplib
 import ssl
+import threading
+import time
 from email.mime.text import MIMEText
+from . import config
 
-def send_approval_notification(article_title: str, recipient_emails: list):
-    """Sends an email notifying users that content is ready for approval."""
-    
-    # Load credentials from the environment
+
+class SmtpConnection:
+    """
+    One authenticated SMTP connection, reused across messages.
+
+    The connection is opened on first use, checked with NOOP when it has been
+    idle for a while, reopened once if the server dropped it, and closed after
+    SMTP_IDLE_CLOSE_SECONDS without traffic (see close_if_idle).
+    """
+
+    def __init__(self, host: str = None, port: int = None, security: str = None):
+        self.host = host or config.SMTP_HOST
+        self.port = port or config.SMTP_PORT
+        self.security = (security or config.SMTP_SECURITY).lower()
+        self._server = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+    def _open(self):
+        sender_email, password = os.getenv("EMAIL_SENDER"), os.getenv("EMAIL_PASSWORD")
+        if self.security == 'ssl':
+            server = smtplib.SMTP_SSL(self.host, self.port, context=ssl.create_default_context(), timeout=30)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=30)
+            if self.security == 'starttls':
+                server.starttls(context=ssl.create_default_context())
+        # A local stand-in (e.g. aiosmtpd) needs no login
+        if password:
+            server.login(sender_email, password)
+        return server
+
+    def _connection(self):
+        if self._server is not None and time.monotonic() - self._last_used > config.SMTP_NOOP_AFTER_SECONDS:
+            try:
+                if self._server.noop()[0] != 250:
+                    raise smtplib.SMTPServerDisconnected("NOOP failed")
+            except (smtplib.SMTPException, OSError):
+                self._discard()
+        if self._server is None:
+            self._server = self._open()
+        return self._server
+
+    def _discard(self):
+        try:
+            self._server.close()
+        except Exception:
+            pass
+        self._server = None
+
+    def send(self, message: MIMEText, recipients: list):
+        """Sends a message, reconnecting once if the server closed the connection."""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    self._connection().sendmail(message["From"], recipients, message.as_string())
+                    self._last_used = time.monotonic()
+                    return
+                except (smtplib.SMTPServerDisconnected, ConnectionError):
+                    self._discard()
+                    if attempt:
+                        raise
+
+    def close_if_idle(self, idle_seconds: float = None):
+        idle_seconds = config.SMTP_IDLE_CLOSE_SECONDS if idle_seconds is None else idle_seconds
+        with self._lock:
+            if self._server is not None and time.monotonic() - self._last_used >= idle_seconds:
+                try:
+                    self._server.quit()
+                except Exception:
+                    pass
+                self._server = None
+
+    def close(self):
+        self.close_if_idle(0)
+
+
+def build_approval_message(article_titles: list, recipient_emails: list) -> MIMEText:
+    """
+    Builds the approval request email for one or more articles.
+
+    Args:
+        article_titles: The titles of the articles whose posts await approval.
+        recipient_emails: The addresses the message goes to.
+
+    Returns:
+        The message, ready to send.
+    """
     sender_email = os.getenv("EMAIL_SENDER")
-    password = os.getenv("EMAIL_PASSWORD")
-    
-    if not all([sender_email, password, recipient_emails]):
-        print("EMAIL_SENDER: Missing sender, password, or recipients. Skipping email.")
-        return
+    if len(article_titles) == 1:
+        subject = f"Action Required: Content for '{article_titles[0]}' is Ready for Approval"
+        intro = f'The automated content generation for the article "{article_titles[0]}" is complete.'
+    else:
+        subject = f"Action Required: Content for {len(article_titles)} Articles is Ready for Approval"
+        listing = "\n".join(f"  - {title}" for title in article_titles)
+        intro = f"The automated content generation is complete for these articles:\n{listing}"
 
-    subject = f"Action Required: Content for '{article_title}' is Ready for Approval"
-    
-    # We will need the URL to our Streamlit app. For now, it's a placeholder.
-    # In a real deployment, this would be your public URL.
-    STREAMLIT_URL = "http://localhost:8501/Approval_Queue"
-    
     body = f"""
 Dear Communication Manager,
 
-The automated content generation for the article "{article_title}" is complete.
+{intro}
 
 The new posts are now waiting for your review in the approval dashboard.
 
 Please click the link below to access the queue:
-{STREAMLIT_URL}
+{config.APPROVAL_QUEUE_URL}
 
 Thank you,
 Your Friendly Automation Bot
@@ -38,12 +120,35 @@ Your Friendly Automation Bot
     message["Subject"] = subject
     message["From"] = sender_email
     message["To"] = ", ".join(recipient_emails)
+    return message
+
+
+_connection = None
+_connection_lock = threading.Lock()
+
+
+def get_connection() -> SmtpConnection:
+    """Returns the process-wide SMTP connection."""
+    global _connection
+    with _connection_lock:
+        if _connection is None:
+            _connection = SmtpConnection()
+        return _connection
+
+
+def send_approval_notification(article_title: str, recipient_emails: list):
+    """
+    Sends an email notifying users that content is ready for approval, right away.
+
+    The workflow enqueues notifications instead (see notifications.py), which
+    are sent as digests by a background dispatcher.
+    """
+    if not all([os.getenv("EMAIL_SENDER"), recipient_emails]):
+        print("EMAIL_SENDER: Missing sender or recipients. Skipping email.")
+        return
 
     try:
-        context = ssl.create_default_context()
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465, context=context) as server:
-            server.login(sender_email, password)
-            server.sendmail(sender_email, recipient_emails, message.as_string())
+        get_connection().send(build_approval_message([article_title], recipient_emails), recipient_emails)
         print(f"EMAIL_SENDER: Successfully sent approval notification to: {', '.join(recipient_emails)}")
     except Exception as e:
-        print(f"EMAIL_SENDER: FAILED to send email. Error: {e}")
\ No newline at end of file
+        print(f"EMAIL_SENDER: FAILED to send email. Error: {e}")
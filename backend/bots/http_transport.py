@@ -0,0 +1,91 @@
+# backend/bots/http_transport.py
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from . import config
+
+# Shared transport for all outbound HTTP made by the bots (Graph API, article
+# pages, image downloads). One keep-alive requests.Session per host, so
+# connections are pooled and TLS handshakes reused; a default (connect, read)
+# timeout on every call; automatic retries only for idempotent methods; and
+# per-host counters.
+
+DEFAULT_TIMEOUT = (config.HTTP_CONNECT_TIMEOUT, config.HTTP_READ_TIMEOUT)
+_IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+_sessions = {}
+_metrics = {}
+_lock = threading.Lock()
+
+
+def _new_session() -> requests.Session:
+    retry = Retry(
+        total=config.HTTP_MAX_RETRIES,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=_IDEMPOTENT_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config.HTTP_POOL_MAXSIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session(url: str) -> requests.Session:
+    """Returns the pooled session for the URL's host, creating it on first use."""
+    parts = urlsplit(url)
+    host = f"{parts.scheme}://{parts.netloc}"
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = _sessions[host] = _new_session()
+            _metrics[parts.netloc] = {'requests': 0, 'errors': 0, 'seconds': 0.0, 'status': {}}
+    return session
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Sends a request through the host's pooled session.
+
+    Takes the same arguments as requests.request; `timeout` defaults to
+    (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT). Errors are raised as the usual
+    requests exceptions.
+    """
+    kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+    session = get_session(url)
+    host = urlsplit(url).netloc
+    started = time.perf_counter()
+    status = None
+    try:
+        response = session.request(method, url, **kwargs)
+        status = response.status_code
+        return response
+    finally:
+        with _lock:
+            host_metrics = _metrics[host]
+            host_metrics['requests'] += 1
+            host_metrics['seconds'] += time.perf_counter() - started
+            if status is None or status >= 400:
+                host_metrics['errors'] += 1
+            if status is not None:
+                host_metrics['status'][status] = host_metrics['status'].get(status, 0) + 1
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request('POST', url, **kwargs)
+
+
+def get_metrics() -> dict:
+    """Returns per-host counters: requests, errors, total seconds and responses by status code."""
+    with _lock:
+        return {host: {**m, 'status': dict(m['status'])} for host, m in _metrics.items()}
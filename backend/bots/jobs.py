@@ -0,0 +1,109 @@
+# backend/bots/jobs.py
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from . import config
+
+# In-process registry of workflow jobs started through the API. Each job runs
+# on a worker pool (so several workflows run at once) and reports per-stage
+# progress through a callback; clients poll GET /api/v1/workflow/jobs/{id}.
+# Only the most recent JOBS_HISTORY_SIZE jobs are kept.
+
+STATUSES = ['queued', 'running', 'succeeded', 'failed']
+
+_jobs = {}
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=config.JOBS_MAX_WORKERS, thread_name_prefix="workflow-job")
+
+
+class JobProgress:
+    """
+    Progress callback handed to the orchestrator: progress(stage, message, **counters).
+
+    Counters are merged into the job's 'progress' dict; 'posts_generated' and
+    'images_matched' are per-platform counts that are incremented.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+
+    def __call__(self, stage: str, message: str = '', **counters):
+        with _lock:
+            job = _jobs.get(self.job_id)
+            if job is None:
+                return
+            job['stage'] = stage
+            progress = job['progress']
+            for platform in counters.pop('post_generated_for', ()):
+                progress['posts_generated'][platform] = progress['posts_generated'].get(platform, 0) + 1
+            for platform in counters.pop('image_matched_for', ()):
+                progress['images_matched'][platform] = progress['images_matched'].get(platform, 0) + 1
+            progress.update(counters)
+            job['events'].append({'at': time.time(), 'stage': stage, 'message': message})
+            del job['events'][:-config.JOBS_MAX_EVENTS]
+
+
+def submit(kind: str, func, **kwargs) -> str:
+    """
+    Runs func(**kwargs, progress=JobProgress) on the worker pool.
+
+    Args:
+        kind: What the job does (e.g. 'ingestion'), shown to clients.
+        func: The workflow function; it must accept a `progress` callback.
+        kwargs: The arguments for func, also stored as the job's 'params'.
+
+    Returns:
+        The new job's id.
+    """
+    job_id = uuid.uuid4().hex
+    with _lock:
+        _jobs[job_id] = {
+            'job_id': job_id, 'kind': kind, 'status': 'queued', 'stage': 'queued',
+            'params': kwargs, 'created_at': time.time(), 'started_at': None, 'finished_at': None,
+            'progress': {'posts_generated': {}, 'images_matched': {}}, 'events': [], 'error': None,
+        }
+        for old_id in list(_jobs)[:-config.JOBS_HISTORY_SIZE]:
+            if _jobs[old_id]['status'] in ('succeeded', 'failed'):
+                del _jobs[old_id]
+    _executor.submit(_run, job_id, func, kwargs)
+    return job_id
+
+
+def _run(job_id: str, func, kwargs: dict):
+    _set(job_id, status='running', started_at=time.time())
+    try:
+        func(**kwargs, progress=JobProgress(job_id))
+        _set(job_id, status='succeeded', stage='done', finished_at=time.time())
+    except Exception as e:
+        print(f"JOBS: -> ERROR! Job {job_id} failed. Error: {e}")
+        _set(job_id, status='failed', error=str(e), finished_at=time.time())
+
+
+def _set(job_id: str, **fields):
+    with _lock:
+        if job_id in _jobs:
+            _jobs[job_id].update(fields)
+
+
+def _snapshot(job: dict, with_events: bool = True) -> dict:
+    # Copied under the lock, so the API can serialize it while the job runs
+    snapshot = {**job, 'progress': {k: (dict(v) if isinstance(v, dict) else v) for k, v in job['progress'].items()}}
+    if with_events:
+        snapshot['events'] = list(job['events'])
+    else:
+        del snapshot['events']
+    return snapshot
+
+
+def get_job(job_id: str) -> dict | None:
+    """Returns a snapshot of the job, or None if it is unknown (or expired)."""
+    with _lock:
+        job = _jobs.get(job_id)
+        return _snapshot(job) if job is not None else None
+
+
+def list_jobs(limit: int = 50) -> list[dict]:
+    """Returns the most recent jobs, newest first, without their event logs."""
+    with _lock:
+        return [_snapshot(job, with_events=False) for job in reversed(list(_jobs.values())[-limit:])]
@@ -0,0 +1,137 @@
+# backend/bots/media_preparation.py
+import hashlib
+import io
+import threading
+from PIL import Image, ImageOps
+from .clients import get_gcs_client
+from . import config, http_transport, tracing
+
+# Ahead-of-time media preparation. When posts are scheduled, each post's image
+# is turned into a ready-to-publish variant for its platform (see
+# config.MediaProfile): EXIF-rotated, flattened to RGB, padded to the allowed
+# aspect ratio, scaled down to the max dimensions and re-encoded below the
+# byte limit. Variants are stored in GCS under their content hash, so the same
+# chart prepared twice is uploaded once, and the URL is recorded on the Step 4
+# row ('Prepared_Image_Path') for the publisher.
+
+PREPARED_IMAGE_COLUMN = 'Prepared_Image_Path'
+_JPEG_QUALITIES = (90, 85, 80, 70, 60, 50)
+_CONTENT_TYPES = {'JPEG': 'image/jpeg', 'PNG': 'image/png', 'WEBP': 'image/webp'}
+_EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+
+# (platform, source_url) -> prepared URL, for the life of the process
+_prepared = {}
+_prepared_lock = threading.Lock()
+
+
+def _pad_to_aspect(image: Image.Image, min_aspect, max_aspect) -> Image.Image:
+    """Pads the image with white so its width/height ratio lies within [min_aspect, max_aspect]."""
+    width, height = image.size
+    aspect = width / height
+    if min_aspect and aspect < min_aspect:
+        target = (round(height * min_aspect), height)
+    elif max_aspect and aspect > max_aspect:
+        target = (width, round(width / max_aspect))
+    else:
+        return image
+    canvas = Image.new('RGB', target, 'white')
+    canvas.paste(image, ((target[0] - width) // 2, (target[1] - height) // 2))
+    return canvas
+
+
+def prepare_variant(image_bytes: bytes, profile: config.MediaProfile) -> bytes:
+    """
+    Produces the platform variant of an image.
+
+    Args:
+        image_bytes: The source image, in any format Pillow can read.
+        profile: The platform's MediaProfile.
+
+    Returns:
+        The encoded variant, in profile.image_format.
+
+    Raises:
+        ValueError: If the image cannot be brought below profile.max_bytes.
+    """
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(image_bytes)))
+    if image.mode != 'RGB':
+        # Charts often come as PNGs with transparency: flatten onto white
+        rgba = image.convert('RGBA')
+        image = Image.new('RGB', rgba.size, 'white')
+        image.paste(rgba, mask=rgba.getchannel('A'))
+    image = _pad_to_aspect(image, profile.min_aspect, profile.max_aspect)
+    image.thumbnail(profile.max_size, Image.LANCZOS)
+
+    qualities = _JPEG_QUALITIES if profile.image_format in ('JPEG', 'WEBP') else (None,)
+    for quality in qualities:
+        buffer = io.BytesIO()
+        options = {'optimize': True}
+        if quality is not None:
+            options['quality'] = quality
+        if profile.image_format == 'JPEG':
+            options['progressive'] = True
+        image.save(buffer, format=profile.image_format, **options)
+        if buffer.tell() <= profile.max_bytes:
+            return buffer.getvalue()
+    raise ValueError(f"Image is still {buffer.tell()} bytes at the lowest quality (limit {profile.max_bytes}).")
+
+
+def store_variant(data: bytes, image_format: str) -> str:
+    """Uploads a variant to GCS under its content hash (unless already there) and returns its public URL."""
+    digest = hashlib.sha256(data).hexdigest()
+    bucket = get_gcs_client().bucket(config.GCS_BUCKET_NAME)
+    blob = bucket.blob(f"{config.GCS_PREPARED_MEDIA_PREFIX}/{digest}.{_EXTENSIONS[image_format]}")
+    if not blob.exists():
+        with tracing.span('upload', blob=blob.name, bytes=len(data)):
+            blob.upload_from_file(io.BytesIO(data), content_type=_CONTENT_TYPES[image_format])
+    return blob.public_url
+
+
+def prepare_media(platform_name: str, image_url: str) -> str:
+    """
+    Returns the URL of the platform variant of an image, preparing it if needed.
+
+    Args:
+        platform_name: 'facebook', 'instagram' or 'twitter'.
+        image_url: The URL of the source image (usually 'Matched_Image_Path').
+
+    Returns:
+        The prepared variant's URL, or '' if the image could not be prepared
+        (the publisher then falls back to the source image).
+    """
+    if not image_url:
+        return ''
+    key = (platform_name, image_url)
+    with _prepared_lock:
+        if key in _prepared:
+            return _prepared[key]
+    try:
+        with tracing.span('fetch', url=image_url):
+            response = http_transport.get(image_url)
+            response.raise_for_status()
+        profile = config.PLATFORMS[platform_name].media_profile
+        url = store_variant(prepare_variant(response.content, profile), profile.image_format)
+    except Exception as e:
+        print(f"MEDIA_PREPARATION: -> WARNING! Could not prepare {image_url} for {platform_name}. Error: {e}")
+        return ''
+    with _prepared_lock:
+        _prepared[key] = url
+    return url
+
+
+def prepare_media_for_posts(platform_name: str, image_urls) -> list:
+    """
+    Prepares the images of several posts; each distinct image is processed once.
+
+    Args:
+        platform_name: The platform the posts are scheduled on.
+        image_urls: An iterable of source image URLs, one per post.
+
+    Returns:
+        A list with the prepared URL ('' where preparation failed) for each post.
+    """
+    image_urls = [str(u or '').strip() for u in image_urls]
+    prepared = {u: prepare_media(platform_name, u) for u in dict.fromkeys(image_urls) if u}
+    ready = sum(1 for v in prepared.values() if v)
+    print(f"  - Prepared {ready}/{len(prepared)} image(s) for {platform_name.capitalize()}.")
+    return [prepared.get(u, '') for u in image_urls]
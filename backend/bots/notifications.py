@@ -0,0 +1,216 @@
+# backend/bots/notifications.py
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from . import config, email_sender
+
+# Notification queue. The workflow only enqueues ("these articles need
+# approval, tell these people"); a background dispatcher gathers everything
+# queued for a recipient over NOTIFY_DIGEST_WINDOW_SECONDS into one digest
+# email and sends all digests over a single pooled SMTP connection. The queue
+# is a local SQLite file, so notifications enqueued by the dashboard or the
+# API survive restarts and are sent by whichever process runs a dispatcher.
+# A digest that could not be sent is retried on an exponential backoff, so a
+# mail server outage does not use up NOTIFY_MAX_ATTEMPTS in a few polls.
+#
+# Run a standalone dispatcher with:  python -m backend.bots.notifications
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notifications (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    recipient  TEXT NOT NULL,
+    kind       TEXT NOT NULL,
+    payload    TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    claimed_by TEXT,
+    claimed_at REAL,
+    sent_at    REAL,
+    attempts   INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    error      TEXT
+);
+CREATE INDEX IF NOT EXISTS notifications_unsent ON notifications (sent_at, recipient);
+"""
+
+KINDS = ['approval_request']
+
+_DISPATCHER_ID = f"{os.getpid()}:{uuid.uuid4().hex[:6]}"
+# Claims older than this are assumed to belong to a dispatcher that died
+_CLAIM_TIMEOUT_SECONDS = 300
+
+
+def _connect():
+    os.makedirs(os.path.dirname(config.NOTIFY_DB_PATH), exist_ok=True)
+    conn = sqlite3.connect(config.NOTIFY_DB_PATH, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(notifications)")}
+    if 'next_attempt_at' not in columns:
+        # Queue files created before retries were backed off
+        conn.execute("ALTER TABLE notifications ADD COLUMN next_attempt_at REAL NOT NULL DEFAULT 0")
+    return conn
+
+
+def enqueue_approval_request(article_title: str, recipient_emails: list) -> int:
+    """
+    Queues an "posts are ready for approval" notification for each recipient.
+
+    Args:
+        article_title: The title of the article whose posts await approval.
+        recipient_emails: The approvers to notify.
+
+    Returns:
+        The number of notifications queued.
+    """
+    recipients = [r.strip() for r in dict.fromkeys(recipient_emails or []) if r and r.strip()]
+    if not recipients:
+        return 0
+    now = time.time()
+    payload = json.dumps({'article_title': article_title})
+    conn = _connect()
+    try:
+        conn.executemany(
+            "INSERT INTO notifications (recipient, kind, payload, created_at) VALUES (?, 'approval_request', ?, ?)",
+            [(r, payload, now) for r in recipients]
+        )
+    finally:
+        conn.close()
+    if config.NOTIFY_AUTOSTART_DISPATCHER:
+        start_dispatcher()
+    return len(recipients)
+
+
+def _claim_due(window_seconds: float) -> dict:
+    """
+    Claims the unsent notifications of every recipient whose oldest one has
+    waited for the digest window, leaving out failed ones whose retry time
+    has not come. Returns {recipient: [(id, kind, payload), ...]}.
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        unclaimed = ("sent_at IS NULL AND attempts < ? AND next_attempt_at <= ? "
+                     "AND (claimed_by IS NULL OR claimed_at < ?)")
+        params = (config.NOTIFY_MAX_ATTEMPTS, now, now - _CLAIM_TIMEOUT_SECONDS)
+        recipients = [r for (r,) in conn.execute(
+            f"SELECT recipient FROM notifications WHERE {unclaimed} GROUP BY recipient HAVING MIN(created_at) <= ?",
+            (*params, now - window_seconds)
+        )]
+        due = {}
+        for recipient in recipients:
+            rows = conn.execute(
+                f"SELECT id, kind, payload FROM notifications WHERE recipient = ? AND {unclaimed} ORDER BY id",
+                (recipient, *params)
+            ).fetchall()
+            conn.executemany("UPDATE notifications SET claimed_by = ?, claimed_at = ? WHERE id = ?",
+                             [(_DISPATCHER_ID, now, row[0]) for row in rows])
+            due[recipient] = rows
+        conn.execute("COMMIT")
+        return due
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def _mark(ids: list, error: str | None):
+    conn = _connect()
+    try:
+        if error is None:
+            conn.executemany("UPDATE notifications SET sent_at = ?, attempts = attempts + 1 WHERE id = ?",
+                             [(time.time(), i) for i in ids])
+        else:
+            # Backs off NOTIFY_RETRY_BASE_SECONDS * 2^(attempts - 1), capped at NOTIFY_RETRY_MAX_SECONDS
+            conn.executemany(
+                "UPDATE notifications SET claimed_by = NULL, attempts = attempts + 1, error = ?, "
+                "next_attempt_at = ? + MIN(? * (1 << attempts), ?) WHERE id = ?",
+                [(error, time.time(), config.NOTIFY_RETRY_BASE_SECONDS, config.NOTIFY_RETRY_MAX_SECONDS, i)
+                 for i in ids]
+            )
+    finally:
+        conn.close()
+
+
+def dispatch_due(window_seconds: float = None, connection: email_sender.SmtpConnection = None) -> int:
+    """
+    Sends one digest per recipient with pending notifications older than the window.
+
+    Args:
+        window_seconds: The digest window (defaults to NOTIFY_DIGEST_WINDOW_SECONDS);
+                        0 sends everything that is queued.
+        connection: The SMTP connection to use (defaults to the shared one).
+
+    Returns:
+        The number of digest emails sent.
+    """
+    window_seconds = config.NOTIFY_DIGEST_WINDOW_SECONDS if window_seconds is None else window_seconds
+    connection = connection or email_sender.get_connection()
+    sent = 0
+    for recipient, rows in _claim_due(window_seconds).items():
+        titles = list(dict.fromkeys(json.loads(payload)['article_title'] for _, _, payload in rows))
+        ids = [row[0] for row in rows]
+        try:
+            connection.send(email_sender.build_approval_message(titles, [recipient]), [recipient])
+            _mark(ids, None)
+            sent += 1
+            print(f"NOTIFICATIONS: Sent a digest of {len(titles)} article(s) to {recipient}.")
+        except Exception as e:
+            _mark(ids, str(e))
+            print(f"NOTIFICATIONS: -> ERROR! Could not send digest to {recipient}. Error: {e}")
+    return sent
+
+
+def pending_count() -> int:
+    conn = _connect()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM notifications WHERE sent_at IS NULL AND attempts < ?",
+                            (config.NOTIFY_MAX_ATTEMPTS,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+class NotificationDispatcher:
+    """Background loop that drains the queue every NOTIFY_POLL_SECONDS."""
+
+    def __init__(self, poll_seconds: float = config.NOTIFY_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_forever(self):
+        connection = email_sender.get_connection()
+        while not self._stop.is_set():
+            try:
+                dispatch_due(connection=connection)
+                connection.close_if_idle()
+            except Exception as e:
+                print(f"NOTIFICATIONS: -> ERROR! Dispatch cycle failed. Error: {e}")
+            self._stop.wait(self.poll_seconds)
+        connection.close()
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def start_dispatcher() -> NotificationDispatcher:
+    """Starts the process-wide dispatcher on a background thread (idempotent)."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = NotificationDispatcher()
+            threading.Thread(target=_dispatcher.run_forever, name="notification-dispatcher", daemon=True).start()
+    return _dispatcher
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+    NotificationDispatcher().run_forever()
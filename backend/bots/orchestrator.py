@@ -2,18 +2,39 @@
 import uuid
 import json
 import pandas as pd
+from gspread.utils import rowcol_to_a1
 from . import config, clients
-from . import step1_ingestion, step2_decomposition, step3_generation, step4_scheduling, email_sender
+from . import step1_ingestion, step2_decomposition, step3_generation, step4_scheduling, notifications, changefeed, outbox, tracing
 
 # Initialize the Google Sheets client once for the orchestrator
 gspread_client = clients.get_gspread_client()
 
-def run_ingestion_to_generation(article_url: str, platforms: list[str], approver_emails: list[str]):
+def _no_progress(stage, message='', **counters):
+    pass
+
+
+@tracing.traced('workflow.ingestion')
+def run_ingestion_to_generation(article_url: str, platforms: list[str], approver_emails: list[str], progress=None):
     """
-    Runs the full workflow and sends a notification email at the end.
+    Runs the full workflow and queues a notification email at the end.
+
+    Args:
+        article_url: The article to turn into posts.
+        platforms: The platforms to generate posts for.
+        approver_emails: Who to notify once the posts await approval.
+        progress: Optional callback, progress(stage, message, **counters),
+                  called as each stage completes (see jobs.JobProgress).
     """
+    progress = progress or _no_progress
+    tracing.annotate(article_url=article_url, platforms=platforms)
+    progress('ingesting', f"Fetching {article_url}")
     article_data = step1_ingestion.process_article_url(article_url)
+    progress('ingested', f"Fetched '{article_data['title']}'", title=article_data['title'],
+             images_found=len(article_data['image_urls']))
     conclusions = step2_decomposition.extract_conclusions_from_summary(article_data['summary'])
+    tracing.annotate(images=len(article_data['image_urls']), conclusions=len(conclusions))
+    progress('decomposed', f"Found {len(conclusions)} conclusion(s)", conclusions_found=len(conclusions),
+             posts_expected=len(conclusions) * len(platforms))
     if not conclusions:
         print("ORCHESTRATOR: No conclusions found. Workflow for this URL will stop.")
         return
@@ -42,6 +63,8 @@ def run_ingestion_to_generation(article_url: str, platforms: list[str], approver
                 row_to_add['Tweet'] = post_content['text']
             best_image = step3_generation.find_best_image_for_post(post_content['text'], article_data['image_urls'])
             row_to_add["Matched_Image_Path"] = best_image if best_image else ""
+            progress('generating', f"Generated a {platform_name.capitalize()} post", post_generated_for=[platform_name],
+                     image_matched_for=[platform_name] if best_image else [])
             try:
                 platform_config = config.PLATFORMS[platform_name]
                 spreadsheet = gspread_client.open(platform_config.sheet_name)
@@ -49,17 +72,20 @@ def run_ingestion_to_generation(article_url: str, platforms: list[str], approver
                 headers = worksheet_step3.row_values(1)
                 ordered_values = [row_to_add.get(h, "") for h in headers]
                 worksheet_step3.append_row(ordered_values, value_input_option='USER_ENTERED')
+                changefeed.record_change(platform_name, row_to_add['post_id'], 'step3', 'insert', row_to_add)
                 print(f"ORCHESTRATOR: -> Successfully added post to '{platform_name.capitalize()}' Step 3 sheet.")
             except Exception as e:
                 print(f"ORCHESTRATOR: -> ERROR! Failed to write to Google Sheet for {platform_name}. Error: {e}")
+                progress('generating', f"Could not save the {platform_name.capitalize()} post: {e}")
 
-    # --- SEND NOTIFICATION EMAIL AT THE END ---
+    # --- QUEUE THE APPROVAL NOTIFICATION (sent as a digest by the dispatcher) ---
     if approver_emails:
-        print("\nORCHESTRATOR: All posts generated. Sending approval notification email...")
-        email_sender.send_approval_notification(
+        print("\nORCHESTRATOR: All posts generated. Queuing approval notification...")
+        notifications.enqueue_approval_request(
             article_title=article_data['title'],
             recipient_emails=approver_emails
         )
+        progress('notifying', f"Queued approval notification for {len(approver_emails)} approver(s)")
 
     print("\nORCHESTRATOR: All conclusions processed. Workflow complete.")
 
@@ -71,49 +97,241 @@ def run_scheduling_for_all_platforms():
     print("\nORCHESTRATOR: Starting scheduling run for all platforms...")
     for platform_name in config.PLATFORMS:
         try:
-            step4_scheduling.create_posting_schedule(platform_name)
+            with tracing.span('workflow.scheduling', platform=platform_name):
+                step4_scheduling.create_posting_schedule(platform_name)
         except Exception as e:
             print(f"ORCHESTRATOR: -> ERROR! Failed to run scheduling for {platform_name}. Error: {e}")
 
 
-def run_publishing_for_all_platforms():
+def run_archival_for_all_platforms(retention_days: int = config.ARCHIVE_RETENTION_DAYS):
     """
-    Checks the schedule for all platforms and publishes any post that is due.
+    Moves published Step 4 rows older than the retention window into the archive.
+    """
+    print("\nORCHESTRATOR: Starting archival run for all platforms...")
+    from . import archive
+    for platform_name in config.PLATFORMS:
+        try:
+            archive.archive_posted_rows(gspread_client, platform_name, retention_days)
+        except Exception as e:
+            print(f"ORCHESTRATOR: -> ERROR! Failed to run archival for {platform_name}. Error: {e}")
+
+
+def _write_publish_results(platform_name, worksheet, headers, results):
+    """
+    Writes the outcome of published posts back to a 'Step 4' sheet.
+
+    Only the 'Posted_Status' and 'Post_Link' cells of the affected rows are
+    touched, all in a single batch_update, so the rest of the schedule is
+    never re-uploaded (or overwritten if a scheduler run happened meanwhile).
+    The rows are looked up by post_id just before writing: the row numbers
+    read before publishing are stale once the archival run deletes rows.
+
+    Args:
+        platform_name: The platform the worksheet belongs to.
+        worksheet: The gspread 'Step 4' worksheet.
+        headers: The header row of the worksheet, in sheet order.
+        results: A list of (sheet_row_number, post_id, posted_status, post_link) tuples.
+    """
+    if not results:
+        return
+    missing = [h for h in ('Posted_Status', 'Post_Link', 'post_id') if h not in headers]
+    if missing:
+        raise ValueError(f"'Step 4' sheet is missing the column(s): {', '.join(missing)}")
+
+    status_col = headers.index('Posted_Status') + 1
+    link_col = headers.index('Post_Link') + 1
+    post_ids = worksheet.col_values(headers.index('post_id') + 1)
+    row_of = {str(pid).strip(): i + 1 for i, pid in enumerate(post_ids) if i > 0}
+    data, written = [], []
+    for _, post_id, posted_status, post_link in results:
+        row_number = row_of.get(str(post_id).strip())
+        if row_number is None:
+            print(f"ORCHESTRATOR: -> WARNING! Post {post_id} is no longer in the {platform_name} schedule. "
+                  f"Its result ('{posted_status}') stays in the outbox only.")
+            continue
+        data.append({'range': rowcol_to_a1(row_number, status_col), 'values': [[posted_status]]})
+        data.append({'range': rowcol_to_a1(row_number, link_col), 'values': [[post_link]]})
+        written.append((row_number, post_id, posted_status, post_link))
+    if data:
+        worksheet.batch_update(data, value_input_option='RAW')
+    for _, post_id, posted_status, post_link in written:
+        changefeed.record_change(platform_name, post_id, 'step4', 'update',
+                                 {'Posted_Status': posted_status, 'Post_Link': post_link})
+
+
+def uses_facebook_batch(platform_name, rows) -> bool:
+    """True when the rows should go out as Graph API batch requests."""
+    return platform_name == 'facebook' and config.FB_BATCH_PUBLISHING and len(rows) > 1
+
+
+def drop_unready_posts(platform_name, due_df: pd.DataFrame) -> pd.DataFrame:
+    """Drops due rows the outbox would not hand out now (leased elsewhere, backing off, or failed)."""
+    if due_df.empty or 'post_id' not in due_df.columns:
+        return due_df
+    post_ids = due_df['post_id'].astype(str)
+    return due_df[post_ids.isin(outbox.ready_post_ids(platform_name, post_ids.tolist()))]
+
+
+def claim_rows(platform_name, rows):
+    """
+    Claims Step 4 rows in the publish outbox right before they are published.
+    The lease only covers OUTBOX_LEASE_SECONDS, so callers claim each row (or
+    each Graph API batch) just before its publish call, never a whole run.
+
+    Args:
+        platform_name: The platform the rows belong to.
+        rows: A list of (sheet_row_number, post) pairs.
+
+    Returns:
+        A tuple of (claimed_rows, recovered_results): the rows this worker may
+        publish, and the (sheet_row_number, post_id, 'Posted', post_link)
+        results of rows that were already published but not logged to the sheet.
+    """
+    claim = outbox.claim(platform_name, [str(post.get('post_id', '')) for _, post in rows])
+    claimed, recovered = [], []
+    for row_number, post in rows:
+        post_id = str(post.get('post_id', ''))
+        if post_id in claim['claimed']:
+            claimed.append((row_number, post))
+        elif post_id in claim['published']:
+            print(f"  - Row {row_number} was already published. Logging the stored result.")
+            recovered.append((row_number, post_id, "Posted", claim['published'][post_id]))
+    skipped = len(rows) - len(claimed) - len(recovered)
+    if skipped:
+        print(f"  - Skipped {skipped} row(s) claimed by another publisher or waiting for a retry.")
+    return claimed, recovered
+
+
+def settle_result(platform_name, row_number, post, success, result):
+    """
+    Records a publish outcome in the outbox.
+
+    Args:
+        success: True, False or None (outcome unknown), as returned by
+                 step5_publishing.publish_post.
+
+    Returns:
+        The (sheet_row_number, post_id, posted_status, post_link) result to
+        log, or None when the post failed and will be retried (the row stays
+        pending in the sheet).
+    """
+    post_id = str(post.get('post_id', ''))
+    state = outbox.complete(platform_name, post_id, success, result)
+    if state == 'retry':
+        print(f"  - Row {row_number} failed and will be retried. Error: {result}")
+        return None
+    if state == 'review':
+        print(f"  - Row {row_number} may have been published. It will not be retried. Error: {result}")
+        return (row_number, post_id, f"Error (may have been published, check before re-posting): {result}", "")
+    posted_status = "Posted" if success else f"Error: {result}"
+    return (row_number, post_id, posted_status, result if success else "")
+
+
+def publish_facebook_batch_rows(rows):
+    """
+    Publishes Facebook Step 4 rows in Graph API batches, claiming each batch
+    in the outbox right before it is sent.
+
+    Args:
+        rows: A list of (sheet_row_number, post) pairs.
+
+    Returns:
+        The list of (sheet_row_number, post_id, posted_status, post_link)
+        results, without the rows that will be retried.
     """
-    print("\nORCHESTRATOR: Starting publishing run for all platforms...")
     from . import step5_publishing
-    from datetime import datetime
-    import pytz
+    results = []
+    for start in range(0, len(rows), config.FB_BATCH_MAX_SIZE):
+        claimed, recovered = claim_rows('facebook', rows[start:start + config.FB_BATCH_MAX_SIZE])
+        results += recovered
+        if not claimed:
+            continue
+        try:
+            outcomes = step5_publishing.publish_facebook_batch([post for _, post in claimed])
+        except Exception as e:
+            # The batch may have been sent: its outcome is unknown
+            outcomes = [(None, str(e))] * len(claimed)
+        for (row_number, post), (success, result) in zip(claimed, outcomes):
+            settled = settle_result('facebook', row_number, post, success, result)
+            if settled:
+                results.append(settled)
+                print(f"  - Published row {row_number}. Status: {settled[2]}")
+    return results
+
+
+def publish_rows(platform_name, worksheet, headers, rows):
+    """
+    Publishes the given Step 4 rows and logs all results in one batch.
+
+    Each row is claimed in the publish outbox right before it is published,
+    so overlapping runs do not publish it twice. A post whose outcome is
+    unknown (e.g. a timeout after the request went out) is marked for review
+    instead of being retried (see outbox.complete).
 
-    target_tz = pytz.timezone(config.TIMEZONE)
-    now_tz = datetime.now(target_tz)
-    print(f"Current time is {now_tz.strftime('%Y-%m-%d %H:%M:%S')}")
+    Args:
+        platform_name: The platform to publish to.
+        worksheet: The platform's gspread 'Step 4' worksheet.
+        headers: The header row of the worksheet, in sheet order.
+        rows: An iterable of (sheet_row_number, post) pairs, where post is a
+              dict-like row of the schedule.
+
+    Returns:
+        The list of (sheet_row_number, post_id, posted_status, post_link)
+        results. Rows that failed and will be retried are not included.
+    """
+    from . import step5_publishing
+    rows, results = list(rows), []
+    if uses_facebook_batch(platform_name, rows):
+        results += publish_facebook_batch_rows(rows)
+        rows = []
+    for row in rows:
+        claimed, recovered = claim_rows(platform_name, [row])
+        results += recovered
+        for row_number, post in claimed:
+            try:
+                print(f"  - POSTING DUE: Row {row_number}, '{str(post.get('Name', 'N/A'))[:40]}...'")
+                success, result = step5_publishing.publish_post(platform_name, post)
+            except Exception as e:
+                print(f"  - ERROR processing row {row_number}. Error: {e}")
+                success, result = None, str(e)
+            settled = settle_result(platform_name, row_number, post, success, result)
+            if settled:
+                results.append(settled)
+                print(f"  - Published. Status: {settled[2]}")
+    _write_publish_results(platform_name, worksheet, headers, results)
+    return results
+
+
+def run_publishing_for_all_platforms(max_posts_per_platform: int = 1):
+    """
+    Checks the schedule for all platforms and publishes any post that is due.
+
+    Args:
+        max_posts_per_platform: How many due posts to publish per platform in
+                                this run. The results for a platform are
+                                written back in one batch once it is done.
+    """
+    print("\nORCHESTRATOR: Starting publishing run for all platforms...")
+    now = pd.Timestamp.now(tz=config.TIMEZONE)
+    print(f"Current time is {now.strftime('%Y-%m-%d %H:%M:%S')}")
 
     for platform_name in config.PLATFORMS:
         print(f"--- Checking schedule for {platform_name.capitalize()} ---")
         try:
-            platform_config = config.PLATFORMS[platform_name]
-            spreadsheet = gspread_client.open(platform_config.sheet_name)
-            worksheet_schedule = spreadsheet.worksheet(platform_config.steps['step4'])
-            all_posts_df = pd.DataFrame(worksheet_schedule.get_all_records())
-            if all_posts_df.empty:
-                print("  - Schedule is empty. Nothing to post.")
-                continue
-            for idx, post in all_posts_df.iterrows():
-                if post.get("Posted_Status", "").strip() == "":
-                    try:
-                        scheduled_time_str = " ".join(post.get("Scheduled_Time").split(" ")[0:2])
-                        naive_dt = pd.to_datetime(scheduled_time_str).tz_localize(None)
-                        scheduled_time = target_tz.localize(naive_dt)
-                        if now_tz >= scheduled_time:
-                            print(f"  - POSTING DUE: Row {idx + 2}, '{post.get('Name', 'N/A')[:40]}...'")
-                            success, result = step5_publishing.publish_post(platform_name, post)
-                            all_posts_df.loc[idx, 'Posted_Status'] = "Posted" if success else f"Error: {result}"
-                            all_posts_df.loc[idx, 'Post_Link'] = result if success else ""
-                            worksheet_schedule.update([all_posts_df.columns.values.tolist()] + all_posts_df.fillna('').values.tolist())
-                            print(f"  - Result logged to sheet. Status: {all_posts_df.loc[idx, 'Posted_Status']}")
-                            break
-                    except Exception as e:
-                        print(f"  - ERROR processing row {idx + 2}. Error: {e}")
+            with tracing.span('workflow.publishing', platform=platform_name) as span:
+                platform_config = config.PLATFORMS[platform_name]
+                spreadsheet = gspread_client.open(platform_config.sheet_name)
+                worksheet_schedule = spreadsheet.worksheet(platform_config.steps['step4'])
+                all_posts_df = pd.DataFrame(worksheet_schedule.get_all_records())
+                if all_posts_df.empty:
+                    print("  - Schedule is empty. Nothing to post.")
+                    continue
+                due_df = step4_scheduling.find_due_posts(all_posts_df, now)
+                due_df = drop_unready_posts(platform_name, due_df)
+                due_rows = [(idx + 2, post) for idx, post in due_df.head(max_posts_per_platform).iterrows()]
+                results = publish_rows(platform_name, worksheet_schedule, list(all_posts_df.columns), due_rows)
+                span.set(due=len(due_rows), logged=len(results))
+                if results:
+                    print(f"  - Logged {len(results)} result(s) to sheet.")
         except Exception as e:
-            print(f"ORCHESTRATOR: -> ERROR! Failed to run publishing for {platform_name}. Error: {e}")
\ No newline at end of file
+            print(f"ORCHESTRATOR: -> ERROR! Failed to run publishing for {platform_name}. Error: {e}")
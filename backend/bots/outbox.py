@@ -0,0 +1,225 @@
+# backend/bots/outbox.py
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from . import config
+
+# Publish outbox. Right before a post is published, the worker claims it here
+# under its idempotency key (platform + post_id) with a time-limited lease;
+# only one worker can hold the lease, and a post recorded as published is
+# never claimed again. That makes overlapping publish runs (API + dashboard,
+# several daemons) safe, and lets a run whose sheet write failed write the
+# stored permalink instead of posting a second time.
+#
+# Only posts that certainly did not go out (refused by the platform, or never
+# sent) are retried, on an exponential backoff until OUTBOX_MAX_ATTEMPTS is
+# reached. When the outcome of a publish is unknown (a timeout or a server
+# error after the request was sent) the post may be live, so it is set to
+# 'review' and never sent again automatically.
+#
+# States: 'pending' -> 'leased' -> 'published' | 'retry' | 'failed' | 'review'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    idempotency_key TEXT PRIMARY KEY,
+    platform        TEXT NOT NULL,
+    post_id         TEXT NOT NULL,
+    state           TEXT NOT NULL,
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    lease_owner     TEXT,
+    lease_expires   REAL,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    result          TEXT NOT NULL DEFAULT '',
+    updated_at      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outbox_state ON outbox (state);
+"""
+
+STATES = ['pending', 'leased', 'published', 'retry', 'failed', 'review']
+
+# Identifies this process; leases taken by it carry this owner
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+def _connect():
+    os.makedirs(os.path.dirname(config.OUTBOX_DB_PATH), exist_ok=True)
+    # Autocommit mode: claims open their own BEGIN IMMEDIATE transaction
+    conn = sqlite3.connect(config.OUTBOX_DB_PATH, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def idempotency_key(platform: str, post_id) -> str:
+    return f"{platform}:{post_id}"
+
+
+def _retry_delay(attempts: int) -> float:
+    return min(config.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), config.OUTBOX_RETRY_MAX_SECONDS)
+
+
+def claim(platform: str, post_ids: list, worker_id: str = WORKER_ID,
+          lease_seconds: float = config.OUTBOX_LEASE_SECONDS) -> dict:
+    """
+    Leases the given posts to a worker for publishing.
+
+    A post is claimed if it is new, waiting for a retry whose time has come,
+    or leased by a worker whose lease has expired.
+
+    Args:
+        platform: 'facebook', 'instagram' or 'twitter'.
+        post_ids: The post_ids the worker wants to publish.
+        worker_id: The claiming worker.
+        lease_seconds: How long the lease holds; it must cover the publish
+                       calls made under it, so claim posts one at a time
+                       (or one Graph API batch at a time) right before
+                       publishing them.
+
+    Returns:
+        A dict with 'claimed' (set of post_ids now leased to the worker) and
+        'published' ({post_id: permalink} of posts that already went out).
+    """
+    post_ids = [str(p) for p in dict.fromkeys(post_ids) if str(p).strip()]
+    now = time.time()
+    claimed, published = set(), {}
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            "INSERT OR IGNORE INTO outbox (idempotency_key, platform, post_id, state, updated_at) VALUES (?, ?, ?, 'pending', ?)",
+            [(idempotency_key(platform, p), platform, p, now) for p in post_ids]
+        )
+        for post_id in post_ids:
+            key = idempotency_key(platform, post_id)
+            state, lease_expires, next_attempt_at, result = conn.execute(
+                "SELECT state, lease_expires, next_attempt_at, result FROM outbox WHERE idempotency_key = ?", (key,)
+            ).fetchone()
+            if state == 'published':
+                published[post_id] = result
+            elif (state == 'pending' or (state == 'retry' and next_attempt_at <= now)
+                  or (state == 'leased' and lease_expires < now)):
+                conn.execute(
+                    "UPDATE outbox SET state = 'leased', lease_owner = ?, lease_expires = ?, updated_at = ? WHERE idempotency_key = ?",
+                    (worker_id, now + lease_seconds, now, key)
+                )
+                claimed.add(post_id)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return {'claimed': claimed, 'published': published}
+
+
+def complete(platform: str, post_id, success: bool | None, result: str, worker_id: str = WORKER_ID) -> str:
+    """
+    Records the outcome of a claimed post and releases its lease.
+
+    Args:
+        platform: The post's platform.
+        post_id: The post's post_id.
+        success: True if the platform accepted the post, False if it refused
+                 it or it was never sent, None if the outcome is unknown
+                 (see step5_publishing.publish_post).
+        result: The permalink on success, the error message otherwise.
+        worker_id: The worker holding the lease.
+
+    Returns:
+        The new state: 'published', 'retry' (it will be claimable again after
+        the backoff), 'failed' (attempts exhausted) or 'review' (it may have
+        gone out; a person has to check the platform).
+    """
+    key = idempotency_key(platform, post_id)
+    now = time.time()
+    conn = _connect()
+    try:
+        if success or success is None:
+            # A post that went out (or may have) is recorded even if the lease was lost meanwhile
+            state = 'published' if success else 'review'
+            conn.execute(
+                "UPDATE outbox SET state = ?, result = ?, attempts = attempts + 1, lease_owner = NULL, "
+                "lease_expires = NULL, updated_at = ? WHERE idempotency_key = ?",
+                (state, result or '', now, key)
+            )
+            return state
+        row = conn.execute("SELECT attempts, lease_owner FROM outbox WHERE idempotency_key = ?", (key,)).fetchone()
+        if row is None or row[1] != worker_id:
+            return 'retry'  # another worker owns the post now
+        attempts = row[0] + 1
+        state = 'failed' if attempts >= config.OUTBOX_MAX_ATTEMPTS else 'retry'
+        conn.execute(
+            "UPDATE outbox SET state = ?, result = ?, attempts = ?, next_attempt_at = ?, lease_owner = NULL, "
+            "lease_expires = NULL, updated_at = ? WHERE idempotency_key = ?",
+            (state, result or '', attempts, now + _retry_delay(attempts), now, key)
+        )
+        return state
+    finally:
+        conn.close()
+
+
+def ready_post_ids(platform: str, post_ids: list) -> set:
+    """
+    Returns the post_ids a publish run should attempt now: unknown posts,
+    posts whose retry time has come or whose lease expired, and published
+    posts (so their result can be written to the sheet). Failed posts and
+    posts waiting for review are left out.
+    """
+    post_ids = [str(p) for p in post_ids]
+    now = time.time()
+    conn = _connect()
+    try:
+        blocked = set()
+        for i in range(0, len(post_ids), 500):
+            chunk = post_ids[i:i + 500]
+            rows = conn.execute(
+                f"SELECT post_id, state, lease_expires, next_attempt_at FROM outbox WHERE platform = ? "
+                f"AND post_id IN ({','.join('?' * len(chunk))})", [platform, *chunk]
+            ).fetchall()
+            for post_id, state, lease_expires, next_attempt_at in rows:
+                if (state in ('failed', 'review') or (state == 'retry' and next_attempt_at > now)
+                        or (state == 'leased' and lease_expires >= now)):
+                    blocked.add(post_id)
+    finally:
+        conn.close()
+    return {p for p in post_ids if p not in blocked}
+
+
+def next_attempt_at(platform: str, post_id, unclaimed: float | None = None) -> float | None:
+    """
+    Returns when the post can be claimed again (epoch seconds), or None if
+    it is done. For a post that was never claimed `unclaimed` is returned:
+    the outbox knows nothing about it (by default None).
+    """
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "SELECT state, lease_expires, next_attempt_at FROM outbox WHERE idempotency_key = ?",
+            (idempotency_key(platform, post_id),)
+        ).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return unclaimed
+    if row[0] == 'pending':
+        return time.time()
+    if row[0] == 'retry':
+        return row[2]
+    if row[0] == 'leased':
+        return row[1]
+    return None
+
+
+def get_stats() -> dict:
+    """Returns the number of outbox entries per platform and state."""
+    conn = _connect()
+    try:
+        rows = conn.execute("SELECT platform, state, COUNT(*) FROM outbox GROUP BY platform, state").fetchall()
+    finally:
+        conn.close()
+    stats = {}
+    for platform, state, count in rows:
+        stats.setdefault(platform, {})[state] = count
+    return stats
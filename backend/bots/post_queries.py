@@ -0,0 +1,177 @@
+# backend/bots/post_queries.py
+import base64
+import json
+import pandas as pd
+from . import config, archive
+from .step4_scheduling import scheduled_times_utc
+
+# Heavy columns that are left out of listings unless explicitly requested with fields=
+LIST_EXCLUDED_FIELDS = ['Summary', 'Image_Paths']
+STATUS_FILTERS = ['pending', 'posted', 'error']
+MAX_PAGE_SIZE = 500
+
+# Sort key used for rows whose Scheduled_Time cannot be parsed (sorted last)
+_NO_TIMESTAMP = 2 ** 62
+
+
+def encode_cursor(ts: int, platform: str, post_id: str) -> str:
+    """Encodes a keyset position as an opaque, URL-safe cursor string."""
+    raw = json.dumps([int(ts), platform, post_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> tuple[int, str, str]:
+    """Decodes a cursor produced by encode_cursor. Raises ValueError if it is malformed."""
+    try:
+        ts, platform, post_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return int(ts), str(platform), str(post_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def load_schedule_df(gspread_client, platforms: list[str] | None = None) -> pd.DataFrame:
+    """
+    Loads the 'Step 4' sheets of the given platforms into one DataFrame with
+    a 'platform' column and a parsed '_ts' sort key (UTC epoch seconds).
+    """
+    frames = []
+    for platform_name in platforms or list(config.PLATFORMS):
+        platform_cfg = config.PLATFORMS[platform_name]
+        try:
+            worksheet = gspread_client.open(platform_cfg.sheet_name).worksheet(platform_cfg.steps['step4'])
+            records = worksheet.get_all_records()
+        except Exception as e:
+            print(f"POST_QUERIES: -> WARNING! Could not read schedule for {platform_name}. Error: {e}")
+            continue
+        if not records:
+            continue
+        df = pd.DataFrame(records)
+        df['platform'] = platform_name
+        frames.append(df)
+
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True).fillna('')
+    if 'post_id' not in df.columns:
+        df['post_id'] = ''
+    df['post_id'] = df['post_id'].astype(str)
+    scheduled = scheduled_times_utc(df)
+    epoch_seconds = (scheduled - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)
+    df['_ts'] = epoch_seconds.fillna(_NO_TIMESTAMP).astype('int64')
+    return df
+
+
+def filter_posts(df: pd.DataFrame, status: str | None = None, since=None, until=None) -> pd.DataFrame:
+    """
+    Applies the status and time-range filters to a DataFrame from load_schedule_df.
+
+    Args:
+        status: 'pending' (not posted yet), 'posted', 'error', or None for all.
+        since / until: Inclusive bounds on Scheduled_Time as datetimes; naive
+                       values are interpreted in config.TIMEZONE.
+    """
+    if df.empty:
+        return df
+    if status is not None and status not in STATUS_FILTERS:
+        raise ValueError(f"Invalid status '{status}'. Expected one of: {', '.join(STATUS_FILTERS)}.")
+
+    mask = pd.Series(True, index=df.index)
+    posted_status = df.get('Posted_Status', pd.Series('', index=df.index)).astype(str).str.strip()
+    if status == 'pending':
+        mask &= posted_status == ''
+    elif status == 'posted':
+        mask &= posted_status == 'Posted'
+    elif status == 'error':
+        mask &= posted_status.str.startswith('Error')
+
+    if since is not None:
+        mask &= df['_ts'] >= _to_epoch(since)
+    if until is not None:
+        mask &= df['_ts'] <= _to_epoch(until)
+    return df[mask]
+
+
+def paginate(df: pd.DataFrame, cursor: str | None = None, limit: int = 50,
+             fields: list[str] | None = None, descending: bool = False) -> dict:
+    """
+    Returns one keyset-paginated page of posts, ordered by (Scheduled_Time, platform, post_id).
+
+    Returns:
+        A dict with 'posts' (list of row dicts, projected to `fields`) and
+        'next_cursor' (None on the last page).
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    if df.empty:
+        return {'posts': [], 'next_cursor': None}
+
+    if cursor:
+        c_ts, c_platform, c_post_id = decode_cursor(cursor)
+        cmp = (lambda a, b: a < b) if descending else (lambda a, b: a > b)
+        after = cmp(df['_ts'], c_ts) | (
+            (df['_ts'] == c_ts) & (cmp(df['platform'], c_platform) |
+                                   ((df['platform'] == c_platform) & cmp(df['post_id'], c_post_id)))
+        )
+        df = df[after]
+
+    # Only the rows that can fall on this page (plus one look-ahead row) are sorted
+    keys = ['_ts', 'platform', 'post_id']
+    if len(df) > limit + 1:
+        if descending:
+            df = df[df['_ts'] >= df['_ts'].nlargest(limit + 1).iloc[-1]]
+        else:
+            df = df[df['_ts'] <= df['_ts'].nsmallest(limit + 1).iloc[-1]]
+    page = df.sort_values(keys, ascending=not descending).iloc[:limit + 1]
+
+    next_cursor = None
+    if len(page) > limit:
+        page = page.iloc[:limit]
+        last = page.iloc[-1]
+        next_cursor = encode_cursor(last['_ts'], last['platform'], last['post_id'])
+
+    columns = _project_columns(page.columns, fields)
+    return {'posts': page[columns].to_dict('records'), 'next_cursor': next_cursor}
+
+
+def load_posts_df(gspread_client, platforms=None, status=None, since=None, until=None,
+                  schedule_df: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Loads and filters Step 4 posts. Published posts ('posted') also come from
+    the archive, since published rows are moved out of the sheets over time.
+
+    A `schedule_df` already loaded with load_schedule_df (e.g. from a cache)
+    is used instead of reading the sheets again.
+    """
+    if schedule_df is None:
+        schedule_df = load_schedule_df(gspread_client, platforms)
+    elif platforms and not schedule_df.empty:
+        schedule_df = schedule_df[schedule_df['platform'].isin(platforms)]
+    df = filter_posts(schedule_df, status=status, since=since, until=until)
+    if status != 'posted':
+        return df
+    archived = archive.query_archive(platforms, since=since, until=until)
+    if archived.empty:
+        return df
+    archived['_ts'] = archived.pop('scheduled_epoch').astype('int64')
+    # A row can briefly exist in both places while it is being archived
+    combined = pd.concat([archived, df], ignore_index=True).fillna('')
+    return combined.drop_duplicates(['platform', 'post_id'], keep='last')
+
+
+def list_posts(gspread_client, platforms=None, status=None, since=None, until=None,
+               cursor=None, limit=50, fields=None, descending=False) -> dict:
+    """Loads, filters and paginates the Step 4 posts in one call (see the helpers above)."""
+    df = load_posts_df(gspread_client, platforms, status=status, since=since, until=until)
+    return paginate(df, cursor=cursor, limit=limit, fields=fields, descending=descending)
+
+
+def _project_columns(columns, fields):
+    if fields:
+        return [c for c in fields if c in columns]
+    return [c for c in columns if c not in LIST_EXCLUDED_FIELDS and not c.startswith('_')]
+
+
+def _to_epoch(value) -> int:
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize(config.TIMEZONE, ambiguous=False, nonexistent='shift_forward')
+    return int(ts.timestamp())
@@ -0,0 +1,224 @@
+# backend/bots/publisher_daemon.py
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+import pandas as pd
+from . import config, changefeed, orchestrator, outbox, step4_scheduling, async_publishing
+
+# A long-running publisher. It loads the pending Step 4 rows once, keeps their
+# due times in a min-heap and sleeps until the earliest one is due. Schedule
+# changes arrive through the change feed (a local SQLite query), so the sheets
+# are only re-read in full on start-up or when the feed asks for a reset.
+# Due posts are published concurrently through the async publishing engine.
+#
+# Run it with:  python -m backend.bots.publisher_daemon
+
+
+class PublisherDaemon:
+    def __init__(self, gspread_client,
+                 max_posts_per_cycle: int = config.PUBLISHER_MAX_POSTS_PER_CYCLE,
+                 catchup_pause_seconds: float = config.PUBLISHER_CATCHUP_PAUSE_SECONDS,
+                 change_check_seconds: float = config.PUBLISHER_CHANGE_CHECK_SECONDS):
+        self.gspread_client = gspread_client
+        self.max_posts_per_cycle = max_posts_per_cycle
+        self.catchup_pause_seconds = catchup_pause_seconds
+        self.change_check_seconds = change_check_seconds
+        self._heap = []            # (due_epoch, seq, platform, post_id)
+        self._pending = {}         # (platform, post_id) -> (due_epoch, post dict)
+        self._seq = itertools.count()
+        self._change_token = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    # --- Heap maintenance ---
+
+    def _push(self, platform_name, post: dict, due_at):
+        if pd.isna(due_at):
+            return
+        key = (platform_name, str(post.get('post_id', '')))
+        due_epoch = due_at if isinstance(due_at, float) else pd.Timestamp(due_at).timestamp()
+        self._pending[key] = (due_epoch, post)
+        heapq.heappush(self._heap, (due_epoch, next(self._seq), *key))
+
+    def reload(self):
+        """Rebuilds the heap from the pending rows of every platform's Step 4 sheet."""
+        print("PUBLISHER_DAEMON: Loading pending posts from all schedules...")
+        self._change_token = changefeed.current_token()
+        self._heap, self._pending = [], {}
+        for platform_name, platform_cfg in config.PLATFORMS.items():
+            try:
+                worksheet = self.gspread_client.open(platform_cfg.sheet_name).worksheet(platform_cfg.steps['step4'])
+                df = pd.DataFrame(worksheet.get_all_records())
+            except Exception as e:
+                print(f"PUBLISHER_DAEMON: -> ERROR! Could not load schedule for {platform_name}. Error: {e}")
+                continue
+            if df.empty:
+                continue
+            pending = df[df.get('Posted_Status', pd.Series('', index=df.index)).astype(str).str.strip() == '']
+            due_at = step4_scheduling.scheduled_times_utc(pending)
+            for post, due in zip(pending.to_dict('records'), due_at):
+                self._push(platform_name, post, due)
+        heapq.heapify(self._heap)
+        print(f"PUBLISHER_DAEMON: {len(self._pending)} pending posts loaded.")
+
+    def _apply_schedule_changes(self):
+        """Folds Step 4 changes from the change feed into the heap (or reloads on reset)."""
+        changefeed.prune_if_due()
+        delta = changefeed.changes_since(self._change_token, stage='step4')
+        if delta['reset']:
+            self.reload()
+            return
+        for change in delta['changes']:
+            key = (change['platform'], str(change['post_id']))
+            if change['kind'] == 'delete' or str(change['data'].get('Posted_Status', '')).strip():
+                self._pending.pop(key, None)  # stale heap entries are skipped when popped
+            elif change['kind'] == 'insert':
+                post = dict(change['data'])
+                due_at = step4_scheduling.scheduled_times_utc(pd.DataFrame([post])).iloc[0]
+                self._push(change['platform'], post, due_at)
+            elif key in self._pending:
+                due_epoch, post = self._pending[key]
+                post.update(change['data'])
+        self._change_token = delta['next_token']
+
+    def _pop_due(self, now_epoch: float) -> list:
+        due = []
+        while self._heap and self._heap[0][0] <= now_epoch and len(due) < self.max_posts_per_cycle:
+            due_epoch, _, platform_name, post_id = heapq.heappop(self._heap)
+            entry = self._pending.get((platform_name, post_id))
+            if entry is None or entry[0] != due_epoch:
+                continue  # published, removed or rescheduled since it was pushed
+            del self._pending[(platform_name, post_id)]
+            due.append((platform_name, due_epoch, entry[1]))
+        return due
+
+    # --- Publishing ---
+
+    def _publish(self, due: list):
+        by_platform = {}
+        for platform_name, due_epoch, post in due:
+            by_platform.setdefault(platform_name, []).append((due_epoch, post))
+        asyncio.run(self._publish_all(by_platform))
+
+    async def _publish_all(self, by_platform: dict):
+        # All platforms are published concurrently (see async_publishing)
+        semaphore = asyncio.Semaphore(config.PUBLISHER_CONCURRENCY)
+        await asyncio.gather(*(self._publish_platform(platform_name, entries, semaphore)
+                               for platform_name, entries in by_platform.items()))
+
+    async def _publish_platform(self, platform_name, entries, semaphore):
+        try:
+            worksheet, headers, rows = await asyncio.to_thread(self._resolve_rows, platform_name, [p for _, p in entries])
+            # Posts no longer in the sheet were deleted or moved by hand: drop them instead of retrying
+            found = {str(post['post_id']) for _, post in rows}
+            entries = [(due_epoch, post) for due_epoch, post in entries if str(post.get('post_id', '')) in found]
+            results = await async_publishing.publish_rows_async(platform_name, worksheet, headers, rows, semaphore)
+            for post, retry_at in await asyncio.to_thread(self._unsettled, platform_name, entries, results):
+                self._push(platform_name, post, retry_at)
+        except Exception as e:
+            print(f"PUBLISHER_DAEMON: -> ERROR! Failed to publish for {platform_name}. Error: {e}")
+            # Some posts may have gone out before the failure (e.g. when only the
+            # sheet write-back failed). The outbox knows which: only the ones
+            # not published are put back. Published posts keep their permalink
+            # in the outbox and are written to the sheet on the next reload.
+            # Posts never claimed are tried again after the next change check.
+            retry_unclaimed_at = time.time() + self.change_check_seconds
+            for post, retry_at in self._unsettled(platform_name, entries, [], retry_unclaimed_at):
+                self._push(platform_name, post, retry_at)
+
+    def _unsettled(self, platform_name, entries, results, retry_unclaimed_at: float = None) -> list:
+        """
+        Returns (post, retry_epoch) for posts without a final result: failed
+        ones waiting for a retry, or ones leased by another publisher. Posts
+        the outbox has never seen are only returned if `retry_unclaimed_at`
+        is given (the run failed before reaching them).
+        """
+        settled = {str(r[1]) for r in results}
+        unsettled = []
+        for _, post in entries:
+            post_id = str(post.get('post_id', ''))
+            retry_at = None if post_id in settled else outbox.next_attempt_at(platform_name, post_id, retry_unclaimed_at)
+            if retry_at is not None:
+                unsettled.append((post, float(retry_at)))
+        return unsettled
+
+    def _resolve_rows(self, platform_name, posts):
+        """Looks up the current sheet row of each post: rows may have moved since the heap was built."""
+        platform_cfg = config.PLATFORMS[platform_name]
+        worksheet = self.gspread_client.open(platform_cfg.sheet_name).worksheet(platform_cfg.steps['step4'])
+        headers = worksheet.row_values(1)
+        post_ids = worksheet.col_values(headers.index('post_id') + 1)
+        row_of = {str(pid): i + 1 for i, pid in enumerate(post_ids) if i > 0}
+        rows = [(row_of[str(p['post_id'])], p) for p in posts if str(p['post_id']) in row_of]
+        for p in posts:
+            if str(p['post_id']) not in row_of:
+                print(f"PUBLISHER_DAEMON: -> WARNING! Due post {p['post_id']} is no longer in the {platform_name} "
+                      f"schedule. Dropping it.")
+        return worksheet, headers, rows
+
+    # --- Main loop ---
+
+    def wake(self):
+        """Makes the daemon look at the change feed now (e.g. right after a scheduling run)."""
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def run_forever(self):
+        self.reload()
+        last_change_check = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                last_change_check = self._cycle(last_change_check)
+            except Exception as e:
+                print(f"PUBLISHER_DAEMON: -> ERROR! Cycle failed. Error: {e}")
+                self._stop.wait(self.change_check_seconds)
+        print("PUBLISHER_DAEMON: Stopped.")
+
+    def _cycle(self, last_change_check: float) -> float:
+        """Publishes what is due, or sleeps until the next due time or change check."""
+        due = self._pop_due(time.time())
+        if due:
+            self._publish(due)
+            # Our own results come back through the change feed as well
+            self._apply_schedule_changes()
+            if self._heap and self._heap[0][0] <= time.time():
+                self._stop.wait(self.catchup_pause_seconds)
+            return time.monotonic()
+
+        timeout = self.change_check_seconds - (time.monotonic() - last_change_check)
+        if self._heap:
+            timeout = min(timeout, self._heap[0][0] - time.time())
+        if self._wake.wait(max(0.0, timeout)):
+            self._wake.clear()
+        self._apply_schedule_changes()
+        return time.monotonic()
+
+
+_daemon = None
+
+
+def start_in_background(gspread_client=None) -> PublisherDaemon:
+    """Starts the process-wide daemon on a background thread (idempotent)."""
+    global _daemon
+    if _daemon is None:
+        _daemon = PublisherDaemon(gspread_client or orchestrator.gspread_client)
+        threading.Thread(target=_daemon.run_forever, name="publisher-daemon", daemon=True).start()
+    return _daemon
+
+
+def wake():
+    """Wakes the in-process daemon, if one is running."""
+    if _daemon is not None:
+        _daemon.wake()
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+    PublisherDaemon(orchestrator.gspread_client).run_forever()
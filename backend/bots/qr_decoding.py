@@ -0,0 +1,144 @@
+# backend/bots/qr_decoding.py
+import time
+import numpy as np
+from PIL import Image, ImageOps
+from pyzbar.pyzbar import ZBarSymbol, decode as zbar_decode
+from . import config
+
+# QR decoding for the check-in scanner. Phone frames are large and zbar's time
+# grows with the pixel count, so the fast path decodes a small grayscale copy
+# of the whole frame. Only when it finds nothing are the slower stages tried:
+# the part of the full-resolution frame that looks like a code (for codes too
+# small to survive the downscale), the whole full-resolution frame, and an
+# adaptively thresholded copy (for glare, shadows and low contrast).
+#
+#   result = qr_decoding.decode_codes(Image.open(buffer))
+#   result['codes']  -> [{'data': 'TKT-...', 'rect': (left, top, width, height)}, ...]
+#   result['stage']  -> which stage found them ('downscaled', 'crop', 'full', 'threshold')
+
+# Grid cells used to find the high-contrast (code-like) region of the frame
+_REGION_GRID = 24
+_SYMBOLS = [ZBarSymbol.QRCODE]
+
+
+def to_grayscale(image: Image.Image) -> Image.Image:
+    """Applies the EXIF orientation of camera photos and converts to 8-bit grayscale."""
+    return ImageOps.exif_transpose(image).convert('L')
+
+
+def downscale(image: Image.Image, max_side: int | None = None) -> tuple[Image.Image, float]:
+    """
+    Returns the image shrunk so its longest side is at most max_side (default
+    config.QR_FAST_PATH_MAX_SIDE), and the scale factor used.
+    """
+    scale = min(1.0, (max_side or config.QR_FAST_PATH_MAX_SIDE) / max(image.size))
+    if scale == 1.0:
+        return image, 1.0
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(size, Image.BILINEAR), scale
+
+
+def find_code_region(gray: Image.Image) -> tuple[int, int, int, int] | None:
+    """
+    Returns the (left, top, right, bottom) box around the high-contrast parts
+    of a grayscale image, where QR codes (dense black/white modules) are, with
+    a margin of half their size on every side, or None if the contrast is
+    spread over the whole frame.
+    """
+    # Measured on a half-size copy: averaging 2x2 pixels cancels most sensor
+    # noise, while code modules (several pixels wide) keep their edges
+    pixels = np.asarray(gray.reduce(2), dtype=np.int16)
+    height, width = pixels.shape
+    if height < _REGION_GRID * 2 or width < _REGION_GRID * 2:
+        return None
+    # Edge energy: absolute differences to the right and lower neighbours
+    energy = np.zeros_like(pixels, dtype=np.int32)
+    energy[:, :-1] += np.abs(np.diff(pixels, axis=1))
+    energy[:-1, :] += np.abs(np.diff(pixels, axis=0))
+
+    cell_h, cell_w = height // _REGION_GRID, width // _REGION_GRID
+    cells = energy[:cell_h * _REGION_GRID, :cell_w * _REGION_GRID]
+    cells = cells.reshape(_REGION_GRID, cell_h, _REGION_GRID, cell_w).sum(axis=(1, 3))
+    threshold = max(cells.mean() * 2, np.percentile(cells, 90) * 0.5)
+    rows, cols = np.nonzero(cells >= threshold)
+    if rows.size == 0:
+        return None
+
+    # Back to the coordinates of `gray`
+    top, bottom = int(rows.min()) * cell_h * 2, (int(rows.max()) + 1) * cell_h * 2
+    left, right = int(cols.min()) * cell_w * 2, (int(cols.max()) + 1) * cell_w * 2
+    # Cells along a code's edges can fall below the threshold, so the box may
+    # only span its middle: the margin is sized to the code, not the frame
+    margin = max(cell_h * 2, cell_w * 2, max(bottom - top, right - left) // 2)
+    box = (max(0, left - margin), max(0, top - margin), min(gray.width, right + margin), min(gray.height, bottom + margin))
+    if (box[2] - box[0]) * (box[3] - box[1]) > 0.8 * gray.width * gray.height:
+        return None  # nothing stands out: cropping would not save anything
+    return box
+
+
+def adaptive_threshold(gray: Image.Image, block_fraction: float = 1 / 16, offset: int = 7) -> Image.Image:
+    """
+    Binarizes against the local mean (box filter via an integral image), so
+    codes under uneven light or glare come out as clean black and white.
+    """
+    pixels = np.asarray(gray, dtype=np.float64)
+    height, width = pixels.shape
+    radius = max(3, int(min(height, width) * block_fraction) // 2)
+    integral = np.pad(pixels.cumsum(axis=0).cumsum(axis=1), ((1, 0), (1, 0)))
+    y0 = np.clip(np.arange(height) - radius, 0, height)
+    y1 = np.clip(np.arange(height) + radius + 1, 0, height)
+    x0 = np.clip(np.arange(width) - radius, 0, width)
+    x1 = np.clip(np.arange(width) + radius + 1, 0, width)
+    area = (y1 - y0)[:, None] * (x1 - x0)[None, :]
+    local_sum = (integral[y1][:, x1] - integral[y0][:, x1] - integral[y1][:, x0] + integral[y0][:, x0])
+    binary = pixels > (local_sum / area - offset)
+    return Image.fromarray((binary * 255).astype(np.uint8), mode='L')
+
+
+def _decode(gray: Image.Image, scale: float = 1.0, origin=(0, 0)) -> list[dict]:
+    codes = []
+    for symbol in zbar_decode(gray, symbols=_SYMBOLS):
+        left, top, width, height = symbol.rect
+        codes.append({
+            'data': symbol.data.decode('utf-8', errors='replace'),
+            # Mapped back to full-frame pixel coordinates
+            'rect': (round(origin[0] + left / scale), round(origin[1] + top / scale),
+                     round(width / scale), round(height / scale)),
+        })
+    return codes
+
+
+def decode_codes(image: Image.Image) -> dict:
+    """
+    Decodes the QR codes in a camera frame (one, or several for a group check-in).
+
+    Args:
+        image: The frame (any Pillow image).
+
+    Returns:
+        A dict with 'codes' (list of {'data', 'rect'}, in reading order),
+        'stage' (the stage that found them, or None) and 'elapsed_ms'.
+    """
+    started = time.perf_counter()
+    gray = to_grayscale(image)
+    small, scale = downscale(gray)
+    codes, stage = _decode(small, scale), 'downscaled'
+
+    # Slow paths, only when the fast path found nothing
+    if not codes and scale < 1.0:
+        region = find_code_region(small)
+        if region is not None:
+            # The code-like region at (up to) full resolution, for codes too small for the downscaled frame
+            full_box = tuple(round(v / scale) for v in region)
+            crop, crop_scale = downscale(gray.crop(full_box))
+            codes, stage = _decode(crop, crop_scale, origin=full_box[:2]), 'crop'
+    if not codes and scale < 1.0:
+        codes, stage = _decode(gray), 'full'
+    if not codes:
+        codes, stage = _decode(adaptive_threshold(small), scale), 'threshold'
+    if not codes and scale < 1.0:
+        codes, stage = _decode(adaptive_threshold(gray)), 'threshold'
+
+    codes.sort(key=lambda c: (c['rect'][1] // max(1, c['rect'][3]), c['rect'][0]))
+    return {'codes': codes, 'stage': stage if codes else None,
+            'elapsed_ms': (time.perf_counter() - started) * 1000}
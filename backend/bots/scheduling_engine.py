@@ -0,0 +1,162 @@
+# backend/bots/scheduling_engine.py
+import math
+import numpy as np
+import pandas as pd
+from . import config
+
+# Slot allocation for Step 4, done in bulk with NumPy/pandas:
+#   1. build_slot_calendar() lays out every posting slot of a platform in
+#      local time and localizes them in one go (DST-correct: 09:00 stays
+#      09:00 local on both sides of a clock change);
+#   2. assign_slots() interleaves articles round-robin and maps posts onto
+#      calendar indices, enforcing same-article spacing and slot uniqueness
+#      with vectorized fixed-point passes instead of a per-post loop.
+
+# Upper bound on repair passes in assign_slots; a handful is typical
+_MAX_PASSES = 100
+
+
+def _parse_clock(value: str) -> pd.Timedelta:
+    hours, minutes = (int(part) for part in value.split(':'))
+    return pd.Timedelta(hours=hours, minutes=minutes)
+
+
+def _slots_per_day(platform_cfg) -> int:
+    window_start, window_end = (_parse_clock(v) for v in platform_cfg.posting_window)
+    per_day = int((window_end - window_start) / pd.Timedelta(minutes=platform_cfg.interval_minutes)) + 1
+    if platform_cfg.daily_cap is not None:
+        per_day = min(per_day, platform_cfg.daily_cap)
+    return max(1, per_day)
+
+
+def build_slot_calendar(platform_cfg, start, days: int, occupied=None, tz: str = config.TIMEZONE) -> pd.DatetimeIndex:
+    """
+    Returns the free posting slots of a platform from `start` onwards.
+
+    Args:
+        platform_cfg: The PlatformConfig providing the posting window,
+                      interval, daily cap and blackout dates.
+        start: Timezone-aware datetime; only slots at or after it are returned.
+        days: Number of local calendar days to lay out.
+        occupied: Optional timestamps already used by the schedule. They are
+                  removed from the calendar and count towards the daily cap.
+        tz: The timezone the posting window is expressed in.
+
+    Returns:
+        A sorted, timezone-aware DatetimeIndex of free slots.
+    """
+    start = pd.Timestamp(start).tz_convert(tz)
+    window_start, window_end = (_parse_clock(v) for v in platform_cfg.posting_window)
+    offsets = pd.timedelta_range(window_start, window_end, freq=f"{platform_cfg.interval_minutes}min")
+
+    # Wall-clock slots for every day, localized all at once
+    local_days = pd.date_range(start.tz_localize(None).normalize(), periods=days, freq='D')
+    if platform_cfg.blackout_dates:
+        local_days = local_days[~local_days.isin(pd.to_datetime(list(platform_cfg.blackout_dates)))]
+    naive = (local_days.values[:, None] + offsets.values[None, :]).ravel()
+    slots = pd.DatetimeIndex(naive).tz_localize(
+        tz, ambiguous=np.zeros(len(naive), dtype=bool), nonexistent='shift_forward'
+    )
+    slots = slots[slots >= start]
+
+    occupied_index = pd.DatetimeIndex([]) if occupied is None else pd.DatetimeIndex(occupied).dropna()
+    if len(occupied_index):
+        occupied_index = occupied_index.tz_convert(tz)
+        slots = slots[~slots.isin(occupied_index)]
+
+    if platform_cfg.daily_cap is not None:
+        slot_days = pd.Series(slots.normalize(), index=np.arange(len(slots)))
+        used = pd.Series(occupied_index.normalize()).value_counts() if len(occupied_index) else pd.Series(dtype='int64')
+        remaining = platform_cfg.daily_cap - slot_days.map(used).fillna(0).to_numpy()
+        slots = slots[slot_days.groupby(slot_days).cumcount().to_numpy() < remaining]
+    return slots
+
+
+def assign_slots(posts: pd.DataFrame, platform_cfg, start, occupied=None, last_scheduled=None,
+                 group_column: str = 'article_url', tz: str = config.TIMEZONE) -> pd.Series:
+    """
+    Assigns a posting slot to every post.
+
+    Posts of different articles are interleaved round-robin so one article
+    does not monopolise consecutive slots, and posts of the same article are
+    kept at least `min_article_spacing_minutes` apart, also from the posts
+    of that article already on the schedule.
+
+    Args:
+        posts: The posts to schedule, in priority order.
+        platform_cfg: The PlatformConfig of the target platform.
+        start: Timezone-aware datetime of the earliest allowed slot.
+        occupied: Optional timestamps already used by the existing schedule.
+        last_scheduled: Optional mapping of article -> latest timestamp of
+                        that article on the existing schedule.
+        group_column: Column identifying the article a post belongs to.
+
+    Returns:
+        A Series of timezone-aware timestamps aligned with `posts.index`.
+    """
+    n = len(posts)
+    if n == 0:
+        return pd.Series([], index=posts.index, dtype=f"datetime64[ns, {tz}]")
+
+    groups = posts[group_column] if group_column in posts.columns else pd.Series(np.arange(n), index=posts.index)
+    group_codes = pd.factorize(groups.astype(str))[0]
+    rank = pd.Series(group_codes).groupby(group_codes).cumcount().to_numpy()
+
+    # Round-robin order: first post of every article, then the second, ...
+    order = np.lexsort((np.arange(n), rank))
+    codes_o, rank_o = group_codes[order], rank[order]
+
+    # Minimum distance, in calendar slots, between posts of the same article.
+    # Consecutive slots are at least one interval apart, so k slots >= spacing.
+    k = max(1, math.ceil(platform_cfg.min_article_spacing_minutes / platform_cfg.interval_minutes))
+
+    # Lay out enough calendar days for all posts; grown further below if needed
+    days = math.ceil(n / _slots_per_day(platform_cfg)) + len(platform_cfg.blackout_dates) + 2
+    calendar = build_slot_calendar(platform_cfg, start, days, occupied=occupied, tz=tz)
+
+    # Articles already on the schedule: their first new post goes to the first
+    # slot at least the spacing after their latest scheduled one
+    floor = np.zeros(n, dtype=np.int64)
+    if last_scheduled is not None and len(last_scheduled):
+        latest = pd.Series(last_scheduled)
+        latest.index = latest.index.astype(str)
+        earliest = pd.to_datetime(groups.astype(str).map(latest), utc=True) + pd.Timedelta(
+            minutes=platform_cfg.min_article_spacing_minutes)
+        known = earliest.notna().to_numpy()
+        if known.any():
+            while len(calendar) and calendar[-1] < earliest.max():
+                days *= 2
+                calendar = build_slot_calendar(platform_cfg, start, days, occupied=occupied, tz=tz)
+            floor[known] = calendar.searchsorted(pd.DatetimeIndex(earliest[known]).tz_convert(tz))
+    floored = floor[order] > 0
+    floor_o = floor[order] + rank_o * k
+
+    # Start from the round-robin positions; posts held back by a floor start
+    # there and do not keep a position the other posts could use
+    positions = np.arange(n)
+    idx = np.where(floored, floor_o, np.cumsum(~floored) - 1)
+    for _ in range(_MAX_PASSES):
+        # Same-article spacing: idx_r >= idx_{r-1} + k, as a per-article running max
+        if k > 1:
+            spaced = pd.Series(idx - rank_o * k).groupby(codes_o).cummax().to_numpy() + rank_o * k
+        else:
+            spaced = idx
+        spaced = np.maximum(spaced, floor_o)
+        # One post per slot: push collisions forward while keeping the order
+        by_slot = np.lexsort((positions, spaced))
+        unique = np.empty(n, dtype=np.int64)
+        unique[by_slot] = np.maximum.accumulate(spaced[by_slot] - positions) + positions
+        if np.array_equal(unique, idx):
+            break
+        idx = unique
+    else:
+        print(f"SCHEDULING_ENGINE: -> WARNING! Spacing not fully resolved after {_MAX_PASSES} passes.")
+
+    # Grow the calendar until it reaches the highest slot index
+    while len(calendar) <= idx.max():
+        days *= 2
+        calendar = build_slot_calendar(platform_cfg, start, days, occupied=occupied, tz=tz)
+
+    assigned = np.empty(n, dtype=np.int64)
+    assigned[order] = idx
+    return pd.Series(calendar[assigned], index=posts.index)
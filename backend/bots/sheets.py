@@ -0,0 +1,210 @@
+# backend/bots/sheets.py
+import copy
+import random
+import threading
+import time
+import gspread
+import requests
+from . import config, tracing
+
+# Every Google Sheets call in the process goes through one access layer:
+# a shared token bucket keeps us under the per-user-per-minute quota,
+# 429/5xx responses are retried with jittered exponential backoff, and
+# identical reads that are already in flight are merged into one request.
+
+# Reads that can be shared between concurrent callers
+_COALESCED_READS = {
+    'open', 'open_by_key', 'open_by_url', 'worksheet', 'worksheets',
+    'get_all_records', 'get_all_values', 'get_values', 'get', 'batch_get',
+    'row_values', 'col_values', 'find', 'findall', 'acell', 'cell',
+}
+# Reads whose results are plain data; followers get their own copy
+_DATA_READS = {
+    'get_all_records', 'get_all_values', 'get_values', 'get', 'batch_get',
+    'row_values', 'col_values', 'findall',
+}
+# Writes that must not be repeated if the first attempt may have been applied
+_NON_IDEMPOTENT = {
+    'append_row', 'append_rows', 'insert_row', 'insert_rows', 'insert_cols',
+    'delete_rows', 'delete_columns', 'add_rows', 'add_cols', 'add_worksheet',
+    'duplicate_sheet', 'create',
+}
+
+
+class _TokenBucket:
+    """A thread-safe token bucket refilled continuously at `rate_per_minute`."""
+
+    def __init__(self, rate_per_minute: int, burst: int):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Blocks until a token is available. Returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SheetsAccessLayer:
+    """Rate limiting, retries, read coalescing and counters for gspread calls."""
+
+    def __init__(self, rate_per_minute=config.SHEETS_REQUESTS_PER_MINUTE, burst=config.SHEETS_BURST,
+                 max_retries=config.SHEETS_MAX_RETRIES):
+        self.bucket = _TokenBucket(rate_per_minute, burst)
+        self.max_retries = max_retries
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            'requests': 0, 'reads': 0, 'writes': 0, 'coalesced_reads': 0,
+            'retries': 0, 'rate_limited_responses': 0, 'errors': 0,
+            'throttle_wait_seconds': 0.0, 'backoff_seconds': 0.0,
+        }
+
+    def metrics(self) -> dict:
+        """Returns a snapshot of the quota and throttling counters."""
+        with self._metrics_lock:
+            return dict(self._metrics)
+
+    def _count(self, **increments):
+        with self._metrics_lock:
+            for name, value in increments.items():
+                self._metrics[name] += value
+
+    def call(self, owner, method_name, method, args, kwargs):
+        kind = 'sheet_read' if method_name in _COALESCED_READS else 'sheet_write'
+        with tracing.span(kind, method=method_name):
+            return self._call(owner, method_name, method, args, kwargs)
+
+    def _call(self, owner, method_name, method, args, kwargs):
+        if method_name not in _COALESCED_READS:
+            self._count(writes=1)
+            return self._execute(method_name, method, args, kwargs)
+
+        key = (_identity(owner._target), method_name, repr(args), repr(sorted(kwargs.items())))
+        with self._inflight_lock:
+            pending = self._inflight.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._inflight[key] = _InFlight()
+
+        if not leader:
+            self._count(coalesced_reads=1)
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return copy.deepcopy(pending.result) if method_name in _DATA_READS else pending.result
+
+        self._count(reads=1)
+        try:
+            pending.result = self._execute(method_name, method, args, kwargs)
+            return pending.result
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+            pending.done.set()
+
+    def _execute(self, method_name, method, args, kwargs):
+        attempt = 0
+        while True:
+            waited = self.bucket.acquire()
+            self._count(requests=1, throttle_wait_seconds=waited)
+            try:
+                return _wrap(method(*args, **kwargs), self)
+            except gspread.exceptions.APIError as e:
+                status = getattr(e.response, 'status_code', None)
+                if status == 429:
+                    self._count(rate_limited_responses=1)
+                # A 429 means the request was rejected, so even appends are safe to repeat
+                retryable = status == 429 or (
+                    status is not None and status >= 500 and method_name not in _NON_IDEMPOTENT
+                )
+                if not retryable or attempt >= self.max_retries:
+                    self._count(errors=1)
+                    raise
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if method_name in _NON_IDEMPOTENT or attempt >= self.max_retries:
+                    self._count(errors=1)
+                    raise
+            delay = random.uniform(0, min(config.SHEETS_BACKOFF_MAX_SECONDS,
+                                          config.SHEETS_BACKOFF_BASE_SECONDS * 2 ** attempt))
+            attempt += 1
+            self._count(retries=1, backoff_seconds=delay)
+            print(f"SHEETS: -> Retrying {method_name} in {delay:.1f}s (attempt {attempt}/{self.max_retries}).")
+            time.sleep(delay)
+
+
+class _SheetsProxy:
+    """Wraps a gspread Client/Spreadsheet/Worksheet so its calls go through the access layer."""
+
+    def __init__(self, target, layer):
+        self._target = target
+        self._layer = layer
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            return self._layer.call(self, name, attr, args, kwargs)
+        return call
+
+    def __repr__(self):
+        return f"<SheetsProxy {self._target!r}>"
+
+
+def _identity(target):
+    """A key that is equal for two gspread objects pointing at the same (work)sheet."""
+    if isinstance(target, gspread.Worksheet):
+        spreadsheet_id = getattr(target, 'spreadsheet_id', None) or target.spreadsheet.id
+        return ('worksheet', spreadsheet_id, target.id)
+    if isinstance(target, gspread.Spreadsheet):
+        return ('spreadsheet', target.id)
+    return ('client',)
+
+
+def _wrap(result, layer):
+    if isinstance(result, (gspread.Client, gspread.Spreadsheet, gspread.Worksheet)):
+        return _SheetsProxy(result, layer)
+    if isinstance(result, list) and result and isinstance(result[0], (gspread.Spreadsheet, gspread.Worksheet)):
+        return [_SheetsProxy(r, layer) for r in result]
+    return result
+
+
+# One layer per process, shared by every client it hands out
+_layer = SheetsAccessLayer()
+
+
+def wrap_client(gspread_client):
+    """Returns the gspread client wrapped in the process-wide access layer."""
+    return _SheetsProxy(gspread_client, _layer)
+
+
+def get_metrics() -> dict:
+    """Returns the process-wide Sheets quota and throttling counters."""
+    return _layer.metrics()
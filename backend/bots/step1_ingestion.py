@@ -1,5 +1,4 @@
 # backend/bots/step1_ingestion.py
-import requests
 from bs4 import BeautifulSoup
 import json
 import io
@@ -9,7 +8,7 @@ from urllib.parse import urljoin
 
 # Use direct imports to avoid circular dependency issues
 from .clients import get_openai_client, get_gcs_client
-from . import config
+from . import config, http_transport, thumbnails, tracing
 
 
 def _load_prompt(file_path):
@@ -21,8 +20,10 @@ def _get_text_from_url(url):
     """Scrapes the title and main text content from a URL."""
     try:
         headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, timeout=20)
-        response.raise_for_status()
+        with tracing.span('fetch', url=url) as s:
+            response = http_transport.get(url, headers=headers, timeout=20)
+            response.raise_for_status()
+            s.set(bytes=len(response.content))
         soup = BeautifulSoup(response.content, 'lxml')
         title_tag = soup.find('h1')
         title = title_tag.get_text(strip=True) if title_tag else soup.title.string.strip()
@@ -37,11 +38,13 @@ def _get_summary_from_text(text):
     """Generates a summary and conclusions using OpenAI."""
     openai_client = get_openai_client()  # lazy init
     prompt = _load_prompt(config.PROMPT_SUMMARIZE)
-    response = openai_client.chat.completions.create(
-        model="gpt-4-turbo",
-        messages=[{"role": "system", "content": prompt},
-                  {"role": "user", "content": text}]
-    )
+    with tracing.span('summarize', chars=len(text)):
+        response = openai_client.chat.completions.create(
+            model="gpt-4-turbo",
+            messages=[{"role": "system", "content": prompt},
+                      {"role": "user", "content": text}]
+        )
+        tracing.record_tokens('summarize', response)
     return response.choices[0].message.content.strip()
 
 
@@ -50,38 +53,57 @@ def _is_image_a_chart(image_url):
     openai_client = get_openai_client()  # lazy init
     prompt = _load_prompt(config.PROMPT_IS_CHART)
     try:
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": prompt},
-                {"role": "user", "content": [
-                    {"type": "image_url", "image_url": {"url": image_url}}
-                ]}
-            ],
-            max_tokens=50,
-        )
-        result = json.loads(response.choices[0].message.content)
-        is_chart = result.get("is_chart", False)
-        confidence = result.get("confidence", 0.0)
+        with tracing.span('chart_detection', image_url=image_url) as s:
+            response = openai_client.chat.completions.create(
+                model="gpt-4o",
+                response_format={"type": "json_object"},
+                messages=[
+                    {"role": "system", "content": prompt},
+                    {"role": "user", "content": [
+                        {"type": "image_url", "image_url": {"url": image_url}}
+                    ]}
+                ],
+                max_tokens=50,
+            )
+            tracing.record_tokens('chart_detection', response)
+            result = json.loads(response.choices[0].message.content)
+            is_chart = result.get("is_chart", False)
+            confidence = result.get("confidence", 0.0)
+            s.set(is_chart=bool(is_chart), confidence=confidence)
         return is_chart and confidence >= 0.7
     except Exception:
         return False
 
 
 def _upload_image_to_gcs(image_url, article_name):
-    """Downloads an image from a URL and uploads it to GCS, returning the public URL."""
+    """
+    Downloads an image from a URL and uploads it to GCS, returning the public URL.
+    A small WebP thumbnail for the dashboard is stored next to it (see thumbnails.py).
+    """
     gcs_client = get_gcs_client()  # lazy init
     try:
-        response = requests.get(image_url, stream=True, timeout=15)
-        response.raise_for_status()
+        with tracing.span('fetch', url=image_url) as span:
+            response = http_transport.get(image_url, stream=True, timeout=15)
+            response.raise_for_status()
+            # With stream=True the body is only downloaded here
+            content = response.content
+            span.set(bytes=len(content))
 
         safe_name = re.sub(r'[^a-zA-Z0-9]', '', article_name)
         filename = f"{safe_name[:50]}_{uuid.uuid4().hex[:8]}.jpg"
 
         bucket = gcs_client.bucket(config.GCS_BUCKET_NAME)
         blob = bucket.blob(filename)
-        blob.upload_from_file(io.BytesIO(response.content), content_type='image/jpeg')
+        with tracing.span('upload', blob=filename, bytes=len(content)):
+            blob.upload_from_file(io.BytesIO(content), content_type='image/jpeg')
+        try:
+            thumb_blob = bucket.blob(thumbnails.thumbnail_name(filename))
+            thumb_bytes = thumbnails.make_thumbnail(content)
+            with tracing.span('upload', blob=thumb_blob.name, bytes=len(thumb_bytes)):
+                thumb_blob.upload_from_file(io.BytesIO(thumb_bytes), content_type='image/webp')
+        except Exception as e:
+            # The dashboard falls back to resizing the original
+            print(f"WARNING: Could not create a thumbnail for {image_url}. Error: {e}")
         return blob.public_url
     except Exception as e:
         print(f"ERROR: Failed to download or upload image {image_url}. Error: {e}")
@@ -105,7 +127,8 @@ def process_article_url(url: str):
     image_urls = []
     try:
         headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, timeout=15)
+        with tracing.span('fetch', url=url):
+            response = http_transport.get(url, headers=headers, timeout=15)
         soup = BeautifulSoup(response.content, 'lxml')
         img_tags = soup.find_all('img')
 
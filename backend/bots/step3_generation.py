@@ -2,7 +2,7 @@
 import re
 import json
 from .clients import get_openai_client
-from . import config
+from . import config, tracing
 
 # Initialize the OpenAI client once for this module
 openai_client = get_openai_client()
@@ -46,13 +46,15 @@ def generate_post_for_platform(conclusion_text: str, summary_text: str, platform
     user_prompt = f"CONTEXTUAL SUMMARY:\n{summary_text}\n\nCONCLUSION TO FOCUS ON:\n{conclusion_text}"
 
     try:
-        response = openai_client.chat.completions.create(
-            model="gpt-4-turbo",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        )
+        with tracing.span('generate', platform=platform_name):
+            response = openai_client.chat.completions.create(
+                model="gpt-4-turbo",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ]
+            )
+            tracing.record_tokens('generate', response)
         content = response.choices[0].message.content.strip()
 
         # Robustly parse the AI's response for different tag formats
@@ -93,21 +95,23 @@ def find_best_image_for_post(post_text: str, image_urls: list) -> str | None:
     for url in image_urls:
         print(f"  - Analyzing image: {url.split('/')[-1][:40]}...")
         try:
-            response = openai_client.chat.completions.create(
-                model="gpt-4o",
-                response_format={"type": "json_object"},
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": f"Social Media Post Text: \"{post_text}\""},
-                            {"type": "image_url", "image_url": {"url": url}},
-                        ],
-                    }
-                ],
-                max_tokens=80, # Increased for safety with JSON
-            )
+            with tracing.span('match', image_url=url):
+                response = openai_client.chat.completions.create(
+                    model="gpt-4o",
+                    response_format={"type": "json_object"},
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {
+                            "role": "user",
+                            "content": [
+                                {"type": "text", "text": f"Social Media Post Text: \"{post_text}\""},
+                                {"type": "image_url", "image_url": {"url": url}},
+                            ],
+                        }
+                    ],
+                    max_tokens=80, # Increased for safety with JSON
+                )
+                tracing.record_tokens('match', response)
             response_text = response.choices[0].message.content.strip()
             
             score = 0
@@ -1,17 +1,74 @@
 # backend/bots/step4_scheduling.py
 import pandas as pd
-from datetime import datetime, time, timedelta
-import pytz
 from .clients import get_gspread_client
-from . import config
+from . import config, changefeed, scheduling_engine, media_preparation
 
 # Initialize the Google Sheets client
 gspread_client = get_gspread_client()
 
+# Columns Step 4 adds on top of the Step 3 columns. 'Scheduled_Time' is the
+# local display string, 'Scheduled_Time_UTC' the machine-readable ISO-8601 value.
+SCHEDULE_COLUMNS = ['Scheduled_Time', 'Scheduled_Time_UTC', 'Posted_Status', 'Post_Link',
+                    media_preparation.PREPARED_IMAGE_COLUMN]
+SCHEDULED_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+SCHEDULED_TIME_UTC_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+def parse_scheduled_time_series(values: pd.Series) -> pd.Series:
+    """
+    Parses a column of 'Scheduled_Time' strings as written by this module
+    (e.g. '2025-01-01 09:00:00 CET').
+
+    Returns:
+        A Series of UTC timestamps (NaT where the value cannot be parsed).
+    """
+    naive = pd.to_datetime(values.astype(str).str.slice(0, 19), format=SCHEDULED_TIME_FORMAT, errors='coerce')
+    local = naive.dt.tz_localize(config.TIMEZONE, ambiguous='NaT', nonexistent='NaT')
+    return local.dt.tz_convert('UTC')
+
+
+def scheduled_times_utc(df: pd.DataFrame) -> pd.Series:
+    """
+    Returns the scheduled time of every Step 4 row as a UTC timestamp.
+
+    Reads the typed 'Scheduled_Time_UTC' column; only rows without it
+    (scheduled before the column existed) fall back to parsing the
+    'Scheduled_Time' display string.
+    """
+    empty = pd.Series('', index=df.index)
+    utc = pd.to_datetime(df.get('Scheduled_Time_UTC', empty).astype(str), format=SCHEDULED_TIME_UTC_FORMAT,
+                         utc=True, errors='coerce')
+    missing = utc.isna()
+    if missing.any():
+        utc[missing] = parse_scheduled_time_series(df.get('Scheduled_Time', empty)[missing])
+    return utc
+
+
+def find_due_posts(df: pd.DataFrame, now=None) -> pd.DataFrame:
+    """
+    Returns the unpublished Step 4 rows whose scheduled time has passed,
+    most overdue first, with a '_due_at' UTC timestamp column.
+
+    The DataFrame index is preserved, so `index + 2` is still the sheet row.
+    """
+    if df.empty:
+        return df
+    now = pd.Timestamp.now(tz='UTC') if now is None else pd.Timestamp(now).tz_convert('UTC')
+    due_at = scheduled_times_utc(df)
+    pending = df.get('Posted_Status', pd.Series('', index=df.index)).astype(str).str.strip() == ''
+    due = df[pending & (due_at <= now)].assign(_due_at=due_at)
+    return due.sort_values('_due_at', kind='stable')
+
+
 def create_posting_schedule(platform_name: str):
     """
-    Reads approved posts from 'Step 3', creates a smart schedule,
-    and saves it to the 'Step 4' worksheet for a given platform.
+    Appends newly approved posts from 'Step 3' to the 'Step 4' schedule
+    of a given platform.
+
+    The existing schedule is left untouched: only approved posts whose
+    post_id is not yet in 'Step 4' (or already archived from it) are
+    scheduled, in the next free slots after the current tail of the
+    schedule, and appended to the sheet.
 
     Args:
         platform_name: The platform to schedule posts for ('facebook', 'instagram', 'twitter').
@@ -27,7 +84,7 @@ def create_posting_schedule(platform_name: str):
         print(f"ERROR: Could not access Google Sheets for {platform_name}. Error: {e}")
         raise
 
-    # Load approved but unscheduled posts from Step 3
+    # Load approved posts from Step 3
     records_step3 = worksheet_step3.get_all_records()
     if not records_step3:
         print("  - 'Step 3' is empty. Nothing to schedule.")
@@ -36,53 +93,69 @@ def create_posting_schedule(platform_name: str):
     df = pd.DataFrame(records_step3)
     df['Requires_human_approval'] = df['Requires_human_approval'].astype(str).str.lower().str.strip()
     df['Approved_by_human'] = df['Approved_by_human'].astype(str).str.lower().str.strip()
+    df['post_id'] = df['post_id'].astype(str).str.strip()
 
     approved_df = df[
-        (df['Requires_human_approval'].isin(['no', ''])) | (df['Approved_by_human'] == 'yes')
-    ].copy()
-
-    if approved_df.empty:
-        print("  - No approved posts found in 'Step 3'. Clearing schedule.")
-        worksheet_step4.clear()
-        # Ensure headers are set even when empty
-        headers = list(df.columns) + ['Scheduled_Time', 'Posted_Status', 'Post_Link']
-        worksheet_step4.update([headers])
+        ((df['Requires_human_approval'].isin(['no', ''])) | (df['Approved_by_human'] == 'yes'))
+        & (df['post_id'] != '')
+    ]
+
+    # Load the existing schedule so only new approvals get a slot
+    headers_step4 = worksheet_step4.row_values(1)
+    records_step4 = worksheet_step4.get_all_records() if headers_step4 else []
+    scheduled_ids = {str(r.get('post_id', '')).strip() for r in records_step4}
+    # Published rows moved to the archive are no longer in 'Step 4' but must not be scheduled again
+    from . import archive
+    scheduled_ids |= archive.archived_post_ids(platform_name)
+
+    new_df = approved_df[~approved_df['post_id'].isin(scheduled_ids)].drop_duplicates('post_id').copy()
+    if new_df.empty:
+        print("  - No newly approved posts found in 'Step 3'. Schedule unchanged.")
         return
 
-    print(f"  - Found {len(approved_df)} approved posts to schedule.")
+    print(f"  - Found {len(new_df)} newly approved posts to schedule.")
 
-    # Unified Scheduling Algorithm
-    tz = pytz.timezone(config.TIMEZONE)
-    now = datetime.now(tz)
-    
-    # Define posting window
-    start_time = time(9, 0)
-    end_time = time(21, 0)
-    interval = timedelta(hours=4) # You can adjust this or make it platform-specific in config.py
-    
-    last_scheduled_time = now
-    
-    # Find the next valid starting slot
-    if now.time() > end_time:
-        last_scheduled_time = (now + timedelta(days=1)).replace(hour=start_time.hour, minute=start_time.minute, second=0)
-    elif now.time() < start_time:
-        last_scheduled_time = now.replace(hour=start_time.hour, minute=start_time.minute, second=0)
-
-    scheduled_times = []
-    for _ in range(len(approved_df)):
-        # Ensure the current slot is not outside the posting window
-        if last_scheduled_time.time() > end_time:
-            last_scheduled_time = (last_scheduled_time + timedelta(days=1)).replace(hour=start_time.hour, minute=start_time.minute)
-        
-        scheduled_times.append(last_scheduled_time.strftime('%Y-%m-%d %H:%M:%S %Z'))
-        last_scheduled_time += interval
-
-    approved_df['Scheduled_Time'] = scheduled_times
-    approved_df['Posted_Status'] = ''
-    approved_df['Post_Link'] = ''
-
-    # Save the new schedule to the Step 4 sheet, overwriting the old one
-    print("  - Writing final schedule to 'Step 4' sheet...")
-    worksheet_step4.clear()
-    worksheet_step4.update([approved_df.columns.values.tolist()] + approved_df.fillna('').values.tolist())
-    print(f"  - Successfully scheduled {len(approved_df)} posts.")
\ No newline at end of file
+    # Slot allocation (posting window, interval, caps and spacing come from PlatformConfig)
+    now = pd.Timestamp.now(tz=config.TIMEZONE)
+    existing_df = pd.DataFrame(records_step4)
+    existing_utc = scheduled_times_utc(existing_df)
+    existing_times = pd.DatetimeIndex(existing_utc.dropna())
+    # Latest slot of every article already on the schedule, for the same-article spacing
+    last_scheduled = (existing_utc.groupby(existing_df['article_url'].astype(str)).max().dropna()
+                      if 'article_url' in existing_df.columns else None)
+
+    # Continue after the current tail of the schedule (or from now if it lies in the past)
+    start = now
+    if len(existing_times) and existing_times.max() >= now:
+        start = existing_times.max() + pd.Timedelta(seconds=1)
+
+    slots = scheduling_engine.assign_slots(new_df, platform_config, start, occupied=existing_times,
+                                           last_scheduled=last_scheduled)
+    scheduled_times = slots.dt.tz_convert(config.TIMEZONE).dt.strftime(f'{SCHEDULED_TIME_FORMAT} %Z')
+
+    new_df['Scheduled_Time'] = scheduled_times
+    new_df['Scheduled_Time_UTC'] = slots.dt.tz_convert('UTC').dt.strftime(SCHEDULED_TIME_UTC_FORMAT)
+    new_df['Posted_Status'] = ''
+    new_df['Post_Link'] = ''
+
+    # Prepare the platform's image variants now, so publishing only sends ready-made assets
+    new_df[media_preparation.PREPARED_IMAGE_COLUMN] = media_preparation.prepare_media_for_posts(
+        platform_name, new_df.get('Matched_Image_Path', pd.Series('', index=new_df.index))
+    )
+
+    # Initialise the header row if the Step 4 sheet is still blank, and add
+    # any schedule column that an older sheet does not have yet
+    if not headers_step4:
+        headers_step4 = list(df.columns) + [c for c in SCHEDULE_COLUMNS if c not in df.columns]
+        worksheet_step4.update([headers_step4])
+    elif any(c not in headers_step4 for c in SCHEDULE_COLUMNS):
+        headers_step4 = headers_step4 + [c for c in SCHEDULE_COLUMNS if c not in headers_step4]
+        worksheet_step4.update([headers_step4])
+
+    # Append the new rows in the column order of the existing sheet
+    print("  - Appending new slots to 'Step 4' sheet...")
+    new_df = new_df.reindex(columns=headers_step4).fillna('')
+    worksheet_step4.append_rows(new_df.values.tolist(), value_input_option='RAW')
+    for row in new_df.to_dict('records'):
+        changefeed.record_change(platform_name, row.get('post_id', ''), 'step4', 'insert', row)
+    print(f"  - Successfully scheduled {len(new_df)} posts.")
@@ -1,118 +1,317 @@
 # backend/bots/step5_publishing.py
 import os
+import io
+import json
+import hashlib
+import threading
 import requests
 import time
-import tempfile
+import urllib3
+from urllib.parse import urlparse, urlencode
 from .clients import get_tweepy_clients
+from . import config, http_transport, tracing
 
 # --- Platform-Specific Publishing Functions ---
+#
+# Every publish returns (success, result). success is True when the post went
+# out (result is its permalink), False when the platform refused it or it was
+# never sent (result is the error; trying again is safe), and None when the
+# outcome is unknown: the request went out but no clear answer came back, so
+# the post may be live and must not be sent again automatically.
+
+def _rejected(error) -> bool:
+    """
+    True when a failed request certainly did not publish anything: the
+    platform answered with a 4xx, or no connection could be made. Timeouts,
+    5xx answers and dropped connections can happen after the post was created.
+    """
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if status is not None:
+        return 400 <= status < 500
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        return isinstance(getattr(error.args[0], 'reason', None), urllib3.exceptions.NewConnectionError)
+    return False
 
 def _post_to_facebook(page_id, access_token, image_url, caption):
     """Posts an image and caption to a Facebook Page."""
-    post_url = f"https://graph.facebook.com/v19.0/{page_id}/photos"
+    post_url = f"{config.GRAPH_API_BASE}/{page_id}/photos"
     payload = {'url': image_url, 'caption': caption, 'access_token': access_token}
     try:
-        response = requests.post(post_url, data=payload)
+        response = http_transport.post(post_url, data=payload)
         response.raise_for_status()
-        res_json = response.json()
-        post_id = res_json.get('post_id')
-        permalink = f"https://www.facebook.com/{post_id}" if post_id else "Link not available"
-        return True, permalink
     except requests.exceptions.RequestException as e:
         print(f"ERROR: Facebook post failed. Response: {e.response.text if e.response else e}")
-        return False, str(e)
+        return (False if _rejected(e) else None), str(e)
+    try:
+        post_id = response.json().get('post_id')
+    except ValueError:
+        post_id = None  # the photo is posted; only the answer is unreadable
+    permalink = f"https://www.facebook.com/{post_id}" if post_id else "Link not available"
+    return True, permalink
+
+def _post_to_facebook_batch(page_id, access_token, items):
+    """
+    Posts several images to a Facebook Page with one Graph API batch request.
+
+    Args:
+        page_id: The Facebook Page id.
+        access_token: The Page access token.
+        items: A list of (image_url, caption) pairs, at most FB_BATCH_MAX_SIZE.
+
+    Returns:
+        A list of (success, result_string) tuples, in the order of `items`.
+    """
+    batch = [
+        {'method': 'POST', 'relative_url': f"{page_id}/photos",
+         'body': urlencode({'url': image_url, 'caption': caption})}
+        for image_url, caption in items
+    ]
+    try:
+        response = http_transport.post(f"{config.GRAPH_API_BASE}/",
+                                       data={'batch': json.dumps(batch), 'access_token': access_token})
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"ERROR: Facebook batch post failed. Response: {e.response.text if e.response else e}")
+        return [(False if _rejected(e) else None, str(e))] * len(items)
+    try:
+        responses = response.json()
+    except ValueError as e:
+        print(f"ERROR: Facebook batch answer could not be read. Error: {e}")
+        return [(None, f"Unreadable Facebook batch response: {e}")] * len(items)
+
+    results = []
+    for item in responses + [None] * (len(items) - len(responses)):
+        # An item is null when Facebook did not finish it before the batch
+        # timed out; it may still go out
+        if item is None:
+            results.append((None, "Facebook batch item did not complete."))
+            continue
+        try:
+            body = json.loads(item.get('body') or '{}')
+        except ValueError:
+            body = {}
+        code = item.get('code')
+        if code != 200:
+            message = body.get('error', {}).get('message', f"HTTP {code}")
+            print(f"ERROR: Facebook post failed in batch. Response: {message}")
+            results.append((False if isinstance(code, int) and 400 <= code < 500 else None, message))
+            continue
+        post_id = body.get('post_id')
+        results.append((True, f"https://www.facebook.com/{post_id}" if post_id else "Link not available"))
+    return results
+
+# Instagram publishing is a three-step flow: create a media container, wait
+# until Instagram has processed it, then publish it. The steps are separate
+# functions so the async engine can drive them without blocking.
+
+def _ig_create_container(account_id, access_token, image_url, caption):
+    """Creates an Instagram media container and returns its id."""
+    container_url = f"{config.GRAPH_API_BASE}/{account_id}/media"
+    container_payload = {'image_url': image_url, 'caption': caption, 'access_token': access_token}
+    container_res = http_transport.post(container_url, data=container_payload)
+    container_res.raise_for_status()
+    return container_res.json()['id']
+
+def _ig_container_status(container_id, access_token):
+    """Returns the container's status_code ('IN_PROGRESS', 'FINISHED', 'ERROR', ...)."""
+    status_res = http_transport.get(f"{config.GRAPH_API_BASE}/{container_id}?fields=status_code&access_token={access_token}")
+    return status_res.json().get('status_code')
+
+def _ig_publish_container(account_id, access_token, container_id):
+    """
+    Publishes a processed container and returns the post permalink. Errors
+    raised come from the media_publish call: once it succeeded the post is
+    live, and a failed permalink lookup only loses the link.
+    """
+    publish_url = f"{config.GRAPH_API_BASE}/{account_id}/media_publish"
+    publish_payload = {'creation_id': container_id, 'access_token': access_token}
+    publish_res = http_transport.post(publish_url, data=publish_payload)
+    publish_res.raise_for_status()
+
+    try:
+        permalink_id = publish_res.json().get('id')
+        permalink_res = http_transport.get(f"{config.GRAPH_API_BASE}/{permalink_id}?fields=permalink&access_token={access_token}")
+        return permalink_res.json().get('permalink', 'Link not available')
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"WARNING: Instagram post is published but its permalink could not be fetched. Error: {e}")
+        return 'Link not available'
 
 def _post_to_instagram(account_id, access_token, image_url, caption):
     """Posts an image and caption to an Instagram Business Account."""
-    base_url = "https://graph.facebook.com/v19.0"
     try:
         # Step 1: Create media container
-        container_url = f"{base_url}/{account_id}/media"
-        container_payload = {'image_url': image_url, 'caption': caption, 'access_token': access_token}
-        container_res = requests.post(container_url, data=container_payload)
-        container_res.raise_for_status()
-        container_id = container_res.json()['id']
+        container_id = _ig_create_container(account_id, access_token, image_url, caption)
         
         # Step 2: Poll for container readiness
         for _ in range(10): # Poll for ~50 seconds
-            status_res = requests.get(f"{base_url}/{container_id}?fields=status_code&access_token={access_token}")
-            if status_res.json().get('status_code') == 'FINISHED':
+            if _ig_container_status(container_id, access_token) == 'FINISHED':
                 break
             time.sleep(5)
         else:
             return False, "Instagram media container did not finish processing in time."
-            
+    except Exception as e:
+        # Nothing is live before media_publish, so this can be tried again
+        print(f"ERROR: Instagram post failed before publishing. Error: {e}")
+        return False, str(e)
+
+    try:
         # Step 3: Publish the container
-        publish_url = f"{base_url}/{account_id}/media_publish"
-        publish_payload = {'creation_id': container_id, 'access_token': access_token}
-        publish_res = requests.post(publish_url, data=publish_payload)
-        publish_res.raise_for_status()
-        
-        permalink_id = publish_res.json().get('id')
-        permalink_res = requests.get(f"{base_url}/{permalink_id}?fields=permalink&access_token={access_token}")
-        permalink = permalink_res.json().get('permalink', 'Link not available')
-        return True, permalink
+        return True, _ig_publish_container(account_id, access_token, container_id)
     except requests.exceptions.RequestException as e:
         print(f"ERROR: Instagram post failed. Response: {e.response.text if e.response else e}")
-        return False, str(e)
+        return (False if _rejected(e) else None), str(e)
+
+# Uploaded media ids, keyed by image URL and by content hash, so a chart used
+# by several tweets is uploaded once. Twitter lets a media id be attached for
+# 24 hours after upload; entries expire a bit earlier.
+_twitter_media_cache = {}
+_twitter_media_lock = threading.Lock()
+
+def _cached_media_id(key):
+    with _twitter_media_lock:
+        entry = _twitter_media_cache.get(key)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        _twitter_media_cache.pop(key, None)
+        return None
+
+def _cache_media_id(media_id, *keys):
+    expires_at = time.monotonic() + config.TWITTER_MEDIA_ID_TTL_SECONDS
+    with _twitter_media_lock:
+        for key in keys:
+            _twitter_media_cache[key] = (media_id, expires_at)
+
+def _upload_twitter_media(api_v1, image_url):
+    """Uploads an image to Twitter from memory (no temp file) and returns its media id."""
+    media_id = _cached_media_id(('url', image_url))
+    if media_id:
+        return media_id
+
+    response = http_transport.get(image_url)
+    response.raise_for_status()
+    content_key = ('sha256', hashlib.sha256(response.content).hexdigest())
+    media_id = _cached_media_id(content_key)
+    if not media_id:
+        # Tweepy picks the upload type from the file name's extension
+        filename = os.path.basename(urlparse(image_url).path) or "image.jpg"
+        with tracing.span('upload', platform='twitter', bytes=len(response.content)):
+            media = api_v1.media_upload(filename=filename, file=io.BytesIO(response.content))
+        media_id = media.media_id_string
+    _cache_media_id(media_id, ('url', image_url), content_key)
+    return media_id
 
 def _post_to_twitter(image_url, text):
     """Posts a text and optional image to Twitter."""
-    api_v1, client_v2 = get_tweepy_clients()
+    try:
+        api_v1, client_v2 = get_tweepy_clients()
+    except Exception as e:
+        print(f"ERROR: Twitter clients could not be created. Error: {e}")
+        return False, str(e)
     media_id = None
     
-    # Twitter requires downloading the image locally before uploading
     if image_url:
         try:
-            response = requests.get(image_url, stream=True)
-            response.raise_for_status()
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp_file:
-                tmp_file.write(response.content)
-                temp_path = tmp_file.name
-            
-            media = api_v1.media_upload(filename=temp_path)
-            media_id = media.media_id_string
-            os.remove(temp_path) # Clean up the temp file
+            media_id = _upload_twitter_media(api_v1, image_url)
         except Exception as e:
             print(f"WARNING: Twitter image upload failed. Posting as text-only. Error: {e}")
 
     try:
         media_ids = [media_id] if media_id else None
         tweet_response = client_v2.create_tweet(text=text, media_ids=media_ids)
-        tweet_id = tweet_response.data['id']
-        permalink = f"https://twitter.com/anyuser/status/{tweet_id}"
-        return True, permalink
     except Exception as e:
         print(f"ERROR: Twitter post failed. Error: {e}")
-        return False, str(e)
+        return (False if _rejected(e) else None), str(e)
+    tweet_id = (getattr(tweet_response, 'data', None) or {}).get('id')
+    permalink = f"https://twitter.com/anyuser/status/{tweet_id}" if tweet_id else "Link not available"
+    return True, permalink
 
 # --- Main Dispatcher Function ---
 
-def publish_post(platform_name: str, post_data: dict) -> tuple[bool, str]:
+def build_post_content(platform_name: str, post_data: dict) -> tuple[str, str, str]:
     """
-    Publishes content to the specified platform by dispatching to the correct function.
-
-    Args:
-        platform_name: 'facebook', 'instagram', or 'twitter'.
-        post_data: A dictionary-like object (e.g., a Pandas Series)
-                   containing all necessary data for the post.
+    Builds the text to publish for a Step 4 row.
 
     Returns:
-        A tuple of (success_boolean, result_string), where the string is
-        either the permalink on success or an error message on failure.
+        A tuple of (text, full_caption, image_url); the caption adds the
+        hashtags and, for Facebook, a link to the article.
     """
-    print(f"--- Starting Step 5: Publishing to {platform_name.capitalize()} ---")
-    
     # Construct the full post content
     text = post_data.get('Facebook_Post_Text') or post_data.get('Instagram_Caption') or post_data.get('Tweet')
     hashtags = post_data.get('Facebook_Hashtags') or post_data.get('Instagram_Hashtags', '')
     article_url = post_data.get('article_url', '')
-    image_url = post_data.get('Matched_Image_Path', '')
+    # Prefer the variant prepared for the platform at scheduling time
+    image_url = post_data.get('Prepared_Image_Path') or post_data.get('Matched_Image_Path', '')
     
     # Format the caption with hashtags and a link (if applicable)
     full_caption = f"{text}\n\n{hashtags}"
     if platform_name == 'facebook':
         full_caption += f"\n\nRead the full article here:\n{article_url}"
+    return text, full_caption, image_url
+
+def publish_facebook_batch(posts: list) -> list:
+    """
+    Publishes several Facebook posts through Graph API batch requests of up
+    to FB_BATCH_MAX_SIZE posts each.
+
+    Args:
+        posts: A list of dict-like Step 4 rows.
+
+    Returns:
+        A list of (success, result_string) tuples, one per post, in order;
+        success is True, False or None as for publish_post.
+    """
+    print(f"--- Starting Step 5: Publishing {len(posts)} post(s) to Facebook in batches ---")
+    items = []
+    for post_data in posts:
+        _, full_caption, image_url = build_post_content('facebook', post_data)
+        items.append((image_url, full_caption))
+
+    results = []
+    for start in range(0, len(items), config.FB_BATCH_MAX_SIZE):
+        chunk = items[start:start + config.FB_BATCH_MAX_SIZE]
+        with tracing.span('publish', platform='facebook', batch_size=len(chunk)) as span:
+            try:
+                chunk_results = _post_to_facebook_batch(
+                    page_id=os.getenv("FB_PAGE_ID"),
+                    access_token=os.getenv("FB_ACCESS_TOKEN"),
+                    items=chunk
+                )
+            except Exception as e:
+                # The batch may have been sent: its outcome is unknown
+                chunk_results = [(None, f"An unexpected error occurred in the dispatcher: {e}")] * len(chunk)
+            failed = sum(1 for success, _ in chunk_results if not success)
+            span.set(failed=failed)
+            if failed:
+                span.fail(f"{failed} of {len(chunk)} post(s) failed")
+        results.extend(chunk_results)
+    return results
+
+def publish_post(platform_name: str, post_data: dict) -> tuple[bool | None, str]:
+    """
+    Publishes content to the specified platform by dispatching to the correct function.
+
+    Args:
+        platform_name: 'facebook', 'instagram', or 'twitter'.
+        post_data: A dictionary-like object (e.g., a Pandas Series)
+                   containing all necessary data for the post.
+
+    Returns:
+        A tuple of (success, result_string), where the string is either the
+        permalink on success or an error message on failure. success is
+        True (published), False (refused or never sent, safe to try again)
+        or None (outcome unknown, the post may be live).
+    """
+    print(f"--- Starting Step 5: Publishing to {platform_name.capitalize()} ---")
+    with tracing.span('publish', platform=platform_name, post_id=str(post_data.get('post_id', ''))) as span:
+        success, result = _dispatch_post(platform_name, post_data)
+        if not success:
+            span.fail(result)
+    return success, result
+
+def _dispatch_post(platform_name: str, post_data: dict) -> tuple[bool | None, str]:
+    text, full_caption, image_url = build_post_content(platform_name, post_data)
 
     try:
         if platform_name == 'facebook':
@@ -137,4 +336,5 @@ def publish_post(platform_name: str, post_data: dict) -> tuple[bool, str]:
         else:
             return False, "Invalid platform name provided."
     except Exception as e:
-        return False, f"An unexpected error occurred in the dispatcher: {e}"
\ No newline at end of file
+        # The platform functions handle their own errors; where this one came from is unknown
+        return None, f"An unexpected error occurred in the dispatcher: {e}"
\ No newline at end of file
@@ -0,0 +1,33 @@
+# backend/bots/thumbnails.py
+import io
+from PIL import Image, ImageOps
+from . import config
+
+# Small previews for the dashboard. Step 1 stores a WebP thumbnail next to
+# every uploaded image as '<name>_thumb.webp'; thumbnail_url() derives the
+# thumbnail's URL from the original's, so no extra sheet column is needed.
+
+THUMBNAIL_SUFFIX = "_thumb.webp"
+
+
+def make_thumbnail(image_bytes: bytes, max_size=None) -> bytes:
+    """Returns a WebP thumbnail that fits in max_size (default config.THUMBNAIL_MAX_SIZE)."""
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(image_bytes)))
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+    image.thumbnail(max_size or config.THUMBNAIL_MAX_SIZE, Image.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, format='WEBP', quality=config.THUMBNAIL_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def thumbnail_name(blob_name: str) -> str:
+    """'charts/Report_ab12.jpg' -> 'charts/Report_ab12_thumb.webp'"""
+    stem = blob_name.rsplit('.', 1)[0] if '.' in blob_name.rsplit('/', 1)[-1] else blob_name
+    return stem + THUMBNAIL_SUFFIX
+
+
+def thumbnail_url(image_url: str) -> str:
+    """Returns the URL of the thumbnail stored next to an uploaded image."""
+    path, sep, query = image_url.partition('?')
+    return thumbnail_name(path) + sep + query
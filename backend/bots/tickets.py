@@ -0,0 +1,142 @@
+# backend/bots/tickets.py
+import csv
+import io
+import os
+import sqlite3
+import threading
+import time
+from . import config
+
+# Ticket registry for the check-in scanner. Attendee lists are imported from
+# CSV; scanners look tickets up by id (the primary key index) and check them
+# in with a single compare-and-set UPDATE, so a ticket is admitted once even
+# when several scanners at several doors read it at the same moment. SQLite
+# in WAL mode lets lookups run while another scanner is writing.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    ticket_id     TEXT PRIMARY KEY,
+    name          TEXT NOT NULL DEFAULT '',
+    email         TEXT NOT NULL DEFAULT '',
+    event         TEXT NOT NULL DEFAULT '',
+    status        TEXT NOT NULL DEFAULT 'valid',
+    checked_in_at REAL,
+    checked_in_by TEXT,
+    imported_at   REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tickets_event_status ON tickets (event, status);
+"""
+
+STATUSES = ['valid', 'used', 'void']
+
+# One connection per thread: opening SQLite for every scan would dominate its cost
+_local = threading.local()
+
+
+def _connect():
+    conn = getattr(_local, 'conn', None)
+    if conn is None or getattr(_local, 'path', None) != config.TICKETS_DB_PATH:
+        os.makedirs(os.path.dirname(config.TICKETS_DB_PATH), exist_ok=True)
+        conn = sqlite3.connect(config.TICKETS_DB_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode NORMAL only risks the last commits on power loss, never corruption
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _local.conn, _local.path = conn, config.TICKETS_DB_PATH
+    return conn
+
+
+def import_csv(source, event: str = '') -> dict:
+    """
+    Imports an attendee list in one transaction.
+
+    Args:
+        source: A file path, a text/binary file object or the CSV text. It
+                needs a 'ticket_id' column; 'name' and 'email' are optional
+                (header names are matched case-insensitively).
+        event: The event the tickets belong to.
+
+    Returns:
+        A dict with the number of 'imported' rows and 'skipped' rows (no ticket_id).
+        Re-importing a ticket updates its name/email but keeps its check-in state.
+    """
+    if isinstance(source, str) and '\n' not in source and os.path.exists(source):
+        with open(source, newline='', encoding='utf-8-sig') as f:
+            return import_csv(f.read(), event)
+    text = source if isinstance(source, str) else source.read()
+    if isinstance(text, bytes):
+        text = text.decode('utf-8-sig')
+
+    reader = csv.DictReader(io.StringIO(text))
+    rows, skipped, now = [], 0, time.time()
+    for record in reader:
+        record = {(k or '').strip().lower(): (v or '').strip() for k, v in record.items()}
+        if not record.get('ticket_id'):
+            skipped += 1
+            continue
+        rows.append((record['ticket_id'], record.get('name', ''), record.get('email', ''), event, now))
+
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany(
+            "INSERT INTO tickets (ticket_id, name, email, event, imported_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(ticket_id) DO UPDATE SET name = excluded.name, email = excluded.email, event = excluded.event",
+            rows
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    print(f"TICKETS: Imported {len(rows)} ticket(s){f' for {event}' if event else ''}; skipped {skipped}.")
+    return {'imported': len(rows), 'skipped': skipped}
+
+
+def lookup(ticket_id: str) -> dict | None:
+    """Returns the ticket's row as a dict, or None if it is not registered."""
+    cur = _connect().execute("SELECT * FROM tickets WHERE ticket_id = ?", (ticket_id.strip(),))
+    row = cur.fetchone()
+    return dict(zip([c[0] for c in cur.description], row)) if row else None
+
+
+def check_in(ticket_id: str, scanner_id: str = '') -> dict:
+    """
+    Admits a ticket, at most once across all scanners.
+
+    Args:
+        ticket_id: The id read from the QR code.
+        scanner_id: Which scanner/door admitted it (stored with the check-in).
+
+    Returns:
+        {"status": "success", "name": ...} for the first valid scan, otherwise
+        {"status": "error", "message": ...} (not found, already checked in, void).
+    """
+    ticket_id = ticket_id.strip()
+    conn = _connect()
+    # Compare-and-set: only the scan that sees status 'valid' flips it to 'used'
+    cur = conn.execute(
+        "UPDATE tickets SET status = 'used', checked_in_at = ?, checked_in_by = ? "
+        "WHERE ticket_id = ? AND status = 'valid' RETURNING name",
+        (time.time(), scanner_id, ticket_id)
+    )
+    row = cur.fetchone()
+    cur.close()
+    if row is not None:
+        return {"status": "success", "name": row[0]}
+
+    ticket = lookup(ticket_id)
+    if ticket is None:
+        return {"status": "error", "message": "Ticket not found."}
+    if ticket['status'] == 'used':
+        at = time.strftime('%H:%M:%S', time.localtime(ticket['checked_in_at'])) if ticket['checked_in_at'] else '?'
+        by = f" at {ticket['checked_in_by']}" if ticket['checked_in_by'] else ''
+        return {"status": "error", "message": f"Ticket already checked in ({at}{by})."}
+    return {"status": "error", "message": f"Ticket is {ticket['status']}."}
+
+
+def get_stats(event: str | None = None) -> dict:
+    """Returns the number of tickets per status (optionally for one event)."""
+    query, params = "SELECT status, COUNT(*) FROM tickets", ()
+    if event is not None:
+        query, params = query + " WHERE event = ?", (event,)
+    return dict(_connect().execute(query + " GROUP BY status", params).fetchall())
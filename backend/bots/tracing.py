@@ -0,0 +1,173 @@
+# backend/bots/tracing.py
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import sys
+import time
+import uuid
+from . import config
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+    _HAS_PROMETHEUS = True
+except Exception:
+    _HAS_PROMETHEUS = False
+
+# Span-based instrumentation for the pipeline. Every stage and external call
+# (fetch, summarize, chart detection, upload, generate, match, sheet
+# read/write, publish) runs inside a span:
+#
+#   with tracing.span('generate', platform=platform_name) as s:
+#       response = openai_client.chat.completions.create(...)
+#       tracing.record_tokens('generate', response)
+#
+# A span that ends with an exception, or that is marked with s.fail(), counts
+# as an error. Each finished span is written as one JSON line to
+# TRACE_LOG_PATH (with trace/parent ids, so one article's run can be followed
+# end to end; rotated at TRACE_LOG_MAX_BYTES) and observed in the Prometheus
+# metrics served on /metrics.
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+if _HAS_PROMETHEUS:
+    SPAN_DURATION = Histogram(
+        'social_bots_span_duration_seconds', "Duration of pipeline stages and external calls.", ['span'],
+        buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+    )
+    SPAN_ERRORS = Counter('social_bots_span_errors_total', "Pipeline stages and external calls that failed.", ['span'])
+    OPENAI_TOKENS = Counter('social_bots_openai_tokens_total', "OpenAI tokens used, by operation.",
+                            ['operation', 'model', 'kind'])
+
+
+def _build_logger() -> logging.Logger:
+    logger = logging.getLogger('social_bots.trace')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if logger.handlers or not config.TRACE_LOG_PATH:
+        return logger
+    if config.TRACE_LOG_PATH == '-':
+        handler = logging.StreamHandler(sys.stderr)
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(config.TRACE_LOG_PATH)), exist_ok=True)
+        # Rotated, so a long-running API or daemon does not fill the disk
+        handler = logging.handlers.RotatingFileHandler(
+            config.TRACE_LOG_PATH, maxBytes=config.TRACE_LOG_MAX_BYTES,
+            backupCount=config.TRACE_LOG_BACKUP_COUNT, encoding='utf-8'
+        )
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    return logger
+
+
+_logger = _build_logger()
+
+
+class Span:
+    def __init__(self, name: str, attributes: dict):
+        parent = _current_span.get()
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.error = None
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+
+    def set(self, **attributes):
+        """Adds attributes to the span's log record."""
+        self.attributes.update(attributes)
+
+    def fail(self, error):
+        """Marks the span as failed without raising (e.g. a publish that returned an error)."""
+        self.error = str(error)
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes):
+    """Times a stage or external call; see the module comment. Yields the Span."""
+    current = Span(name, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        if current.error is None:
+            current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        _finish(current)
+
+
+def traced(name: str, **attributes):
+    """Decorator form of span()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def annotate(**attributes):
+    """Adds attributes to the current span, if any (e.g. counts only known at the end of a stage)."""
+    current = _current_span.get()
+    if current is not None:
+        current.attributes.update(attributes)
+
+
+def _finish(s: Span):
+    duration = time.perf_counter() - s._started
+    if _HAS_PROMETHEUS:
+        SPAN_DURATION.labels(s.name).observe(duration)
+        if s.error is not None:
+            SPAN_ERRORS.labels(s.name).inc()
+    if _logger.handlers:
+        record = {
+            'ts': s.started_at, 'trace_id': s.trace_id, 'span_id': s.span_id, 'parent_id': s.parent_id,
+            'span': s.name, 'duration_ms': round(duration * 1000, 2),
+            'status': 'error' if s.error is not None else 'ok', **s.attributes,
+        }
+        if s.error is not None:
+            record['error'] = s.error
+        _logger.info(json.dumps(record, default=str))
+
+
+def record_tokens(operation: str, response):
+    """
+    Records the token usage of an OpenAI chat completion.
+
+    Args:
+        operation: What the call was for ('summarize', 'generate', ...).
+        response: The completion; responses without a `usage` are ignored.
+    """
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+    completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+    model = getattr(response, 'model', None) or 'unknown'
+    if _HAS_PROMETHEUS:
+        OPENAI_TOKENS.labels(operation, model, 'prompt').inc(prompt_tokens)
+        OPENAI_TOKENS.labels(operation, model, 'completion').inc(completion_tokens)
+    current = _current_span.get()
+    if current is not None:
+        current.attributes['prompt_tokens'] = current.attributes.get('prompt_tokens', 0) + prompt_tokens
+        current.attributes['completion_tokens'] = current.attributes.get('completion_tokens', 0) + completion_tokens
+        current.attributes['model'] = model
+
+
+def metrics_available() -> bool:
+    return _HAS_PROMETHEUS
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Returns the Prometheus exposition of this process's metrics and its content type."""
+    if not _HAS_PROMETHEUS:
+        raise RuntimeError("prometheus_client is not installed.")
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -8,12 +8,13 @@ load_dotenv(dotenv_path=dotenv_path)
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, Response
 from pydantic import BaseModel, HttpUrl
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 import pandas as pd
 
-from .bots import orchestrator, config, clients
+from .bots import orchestrator, config, clients, post_queries, changefeed, sheets, publisher_daemon, async_publishing, http_transport, outbox, notifications, approvals, jobs, tracing
 
 # --- API Data Models ---
 class StartWorkflowRequest(BaseModel):
@@ -23,10 +24,32 @@ class StartWorkflowRequest(BaseModel):
 class PostActionRequest(BaseModel):
     platform: str
     post_id: str
+class PostDecision(PostActionRequest):
+    decision: str  # 'approve' or 'reject'
+class PostDecisionsRequest(BaseModel):
+    decisions: List[PostDecision]
 
 # --- FastAPI Application ---
 app = FastAPI(title="Social Media Admin Dashboard API")
 
+@app.on_event("startup")
+def start_publisher_daemon():
+    # Opt-in: run the heap-based publisher inside the API process
+    if os.getenv("PUBLISHER_DAEMON_ENABLED", "").lower() in ("1", "true", "yes"):
+        publisher_daemon.start_in_background()
+
+
+@app.on_event("startup")
+def start_notification_dispatcher():
+    # Sends the approval digests queued by workflow runs
+    notifications.start_dispatcher()
+
+
+@app.on_event("startup")
+def prune_change_feed():
+    # Further prunes happen from GET /api/v1/changes (see changefeed.prune_if_due)
+    changefeed.prune_if_due()
+
 # ... (The first 5 endpoints are the same) ...
 @app.get("/")
 def read_root(): return {"status": "Social Media API is running!"}
@@ -45,28 +68,51 @@ def start_ingestion_workflow(request: StartWorkflowRequest, background_tasks: Ba
     
     print(f"API: Received request to start workflow for URL: {request.article_url} with emails: {emails}")
     
-    # --- THE FIX IS HERE ---
-    # We now pass the 'emails' list to the orchestrator.
-    background_tasks.add_task(
+    # Runs on the job pool; progress is polled via /api/v1/workflow/jobs/{job_id}
+    job_id = jobs.submit(
+        'ingestion',
         orchestrator.run_ingestion_to_generation,
         article_url=str(request.article_url),
         platforms=request.platforms,
-        approver_emails=emails # This argument was missing
+        approver_emails=emails
     )
     
     return {
         "status": "success",
-        "message": f"Workflow started in the background for {request.article_url}."
+        "message": f"Workflow started in the background for {request.article_url}.",
+        "job_id": job_id
     }
 
+@app.get("/api/v1/workflow/jobs")
+def list_workflow_jobs(limit: int = Query(50, ge=1, le=200)):
+    """The most recent workflow jobs of this API process, newest first."""
+    return jobs.list_jobs(limit)
+
+@app.get("/api/v1/workflow/jobs/{job_id}")
+def get_workflow_job(job_id: str):
+    """
+    Status and per-stage progress of a workflow job: conclusions found, posts
+    generated and images matched per platform, and an event log.
+    """
+    job = jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    return job
+
 @app.post("/api/v1/workflow/schedule")
 def schedule_approved_posts(background_tasks: BackgroundTasks):
     background_tasks.add_task(orchestrator.run_scheduling_for_all_platforms)
+    background_tasks.add_task(publisher_daemon.wake)
     return {"status": "success", "message": "Scheduling has started."}
 @app.post("/api/v1/workflow/publish")
 def publish_due_posts(background_tasks: BackgroundTasks):
-    background_tasks.add_task(orchestrator.run_publishing_for_all_platforms)
+    # Platforms are published concurrently, so a slow Instagram container does not hold up the others
+    background_tasks.add_task(async_publishing.run_publishing_for_all_platforms_async)
     return {"status": "success", "message": "Publishing run has started."}
+@app.post("/api/v1/workflow/archive")
+def archive_published_posts(background_tasks: BackgroundTasks):
+    background_tasks.add_task(orchestrator.run_archival_for_all_platforms)
+    return {"status": "success", "message": "Archival run has started."}
 @app.get("/api/v1/posts/awaiting-approval")
 def get_posts_awaiting_approval():
     all_posts = []
@@ -80,71 +126,115 @@ def get_posts_awaiting_approval():
             for _, post in awaiting_df.iterrows():
                 post_data = post.to_dict(); post_data['platform'] = platform_name
                 all_posts.append(post_data)
-        except Exception: continue
+        except Exception as e:
+            print(f"API: -> WARNING! Could not read approval queue for {platform_name}. Error: {e}")
     return all_posts
+def _list_step4_posts(platform, status, since, until, cursor, limit, fields, descending):
+    """Shared implementation of the Step 4 listing endpoints (see post_queries.list_posts)."""
+    for p in platform or []:
+        if p not in config.PLATFORMS:
+            raise HTTPException(status_code=400, detail=f"Invalid platform '{p}' provided.")
+    field_list = [f.strip() for f in fields.split(',') if f.strip()] if fields else None
+    try:
+        return post_queries.list_posts(
+            clients.get_gspread_client(), platforms=platform, status=status,
+            since=since, until=until, cursor=cursor, limit=limit,
+            fields=field_list, descending=descending
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 @app.get("/api/v1/posts/scheduled")
-def get_scheduled_posts():
-    all_scheduled = []
-    gspread_client = clients.get_gspread_client()
-    for platform_name, platform_cfg in config.PLATFORMS.items():
-        try:
-            worksheet = gspread_client.open(platform_cfg.sheet_name).worksheet(platform_cfg.steps['step4'])
-            records = worksheet.get_all_records()
-            if not records: continue
-            for post in records:
-                post['platform'] = platform_name; all_scheduled.append(post)
-        except Exception: continue
-    if all_scheduled: all_scheduled.sort(key=lambda x: x.get('Scheduled_Time', ''))
-    return all_scheduled
+def get_scheduled_posts(
+    platform: Optional[List[str]] = Query(None), status: Optional[str] = None,
+    since: Optional[datetime] = None, until: Optional[datetime] = None,
+    cursor: Optional[str] = None, limit: int = Query(50, ge=1, le=post_queries.MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+):
+    """
+    Lists Step 4 posts ordered by Scheduled_Time, oldest first.
+    Pass the returned 'next_cursor' back as ?cursor= to get the following page.
+    """
+    return _list_step4_posts(platform, status, since, until, cursor, limit, fields, descending=False)
 @app.get("/api/v1/posts/posted")
-def get_posted_posts():
-    all_posted = []
-    gspread_client = clients.get_gspread_client()
-    for platform_name, platform_cfg in config.PLATFORMS.items():
-        try:
-            worksheet = gspread_client.open(platform_cfg.sheet_name).worksheet(platform_cfg.steps['step4'])
-            records = worksheet.get_all_records()
-            if not records: continue
-            for post in records:
-                if post.get('Posted_Status', '') == 'Posted':
-                    post['platform'] = platform_name; all_posted.append(post)
-        except Exception: continue
-    if all_posted: all_posted.sort(key=lambda x: x.get('Scheduled_Time', ''), reverse=True)
-    return all_posted
+def get_posted_posts(
+    platform: Optional[List[str]] = Query(None),
+    since: Optional[datetime] = None, until: Optional[datetime] = None,
+    cursor: Optional[str] = None, limit: int = Query(50, ge=1, le=post_queries.MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+):
+    """
+    Lists published posts ordered by Scheduled_Time, newest first (same paging
+    as /posts/scheduled). Includes posts already moved to the archive.
+    """
+    return _list_step4_posts(platform, 'posted', since, until, cursor, limit, fields, descending=True)
 
 
-# --- THIS IS THE UPGRADED FUNCTION ---
 def _update_approval_status(request: PostActionRequest, status: str):
     """Helper function to update the sheet with 'yes' or 'no'."""
-    gspread_client = clients.get_gspread_client()
-    platform_cfg = config.PLATFORMS.get(request.platform)
-    if not platform_cfg:
+    if request.platform not in config.PLATFORMS:
         raise HTTPException(status_code=404, detail="Platform not found")
+    decision = 'approve' if status == 'yes' else 'reject'
+    result = approvals.apply_decisions(clients.get_gspread_client(), [
+        {'platform': request.platform, 'post_id': request.post_id, 'decision': decision}
+    ])
+    if result['failed']:
+        failure = result['failed'][0]
+        status_code = {'platform_not_found': 404, 'post_not_found': 404, 'invalid_decision': 400}.get(failure['reason'], 500)
+        raise HTTPException(status_code=status_code, detail=f"An error occurred: {failure['error']}")
+    return {"status": "success", "message": f"Post {request.post_id} on {request.platform} status set to '{status}'."}
+
+
+@app.post("/api/v1/posts/decisions")
+def submit_decisions(request: PostDecisionsRequest):
+    """
+    Approves/rejects many posts at once, with one batched write per spreadsheet.
+    Returns the applied decisions and, per post, the ones that failed.
+    """
+    result = approvals.apply_decisions(clients.get_gspread_client(), [d.model_dump() for d in request.decisions])
+    return {"applied": len(result['applied']), "failed": result['failed']}
+
+
+@app.get("/api/v1/stats/sheets")
+def get_sheets_stats():
+    """Google Sheets quota usage, retries and throttling delay of this API process."""
+    return sheets.get_metrics()
+
+
+@app.get("/api/v1/stats/http")
+def get_http_stats():
+    """Outbound HTTP counters of this API process, per host."""
+    return http_transport.get_metrics()
+
+
+@app.get("/api/v1/stats/outbox")
+def get_outbox_stats():
+    """Publish outbox entries per platform and state (pending, leased, published, retry, failed)."""
+    return outbox.get_stats()
+
+
+@app.get("/metrics")
+def get_prometheus_metrics():
+    """Prometheus metrics of this API process: stage/call durations, error counts and OpenAI token usage."""
+    if not tracing.metrics_available():
+        raise HTTPException(status_code=503, detail="prometheus_client is not installed.")
+    content, content_type = tracing.render_metrics()
+    return Response(content=content, media_type=content_type)
+
+
+@app.get("/api/v1/changes")
+def get_changes(since: Optional[str] = None, stage: Optional[str] = None, limit: int = Query(1000, ge=1, le=5000)):
+    """
+    Returns the posts inserted or updated since the given change token.
+    Call without `since` to get the current token; when 'reset' is true the
+    token has expired and the client must reload the full queue.
+    """
+    if stage is not None and stage not in changefeed.STAGES:
+        raise HTTPException(status_code=400, detail=f"Invalid stage '{stage}' provided.")
+    changefeed.prune_if_due()
     try:
-        spreadsheet = gspread_client.open(platform_cfg.sheet_name)
-        worksheet = spreadsheet.worksheet(platform_cfg.steps['step3'])
-        cell = worksheet.find(request.post_id)
-        if not cell:
-            raise HTTPException(status_code=404, detail=f"Post with ID {request.post_id} not found.")
-        
-        # --- ROBUST COLUMN FINDER ---
-        headers = worksheet.row_values(1)
-        approval_col_index = -1
-        # Loop through headers, strip whitespace, and compare in lowercase
-        for i, header in enumerate(headers):
-            if header.strip().lower() == 'approved_by_human':
-                approval_col_index = i + 1 # Add 1 because gspread is 1-indexed
-                break
-        
-        if approval_col_index == -1:
-            raise HTTPException(status_code=500, detail="Could not find 'Approved_by_human' column in the sheet.")
-        # --- END OF ROBUST FINDER ---
-            
-        worksheet.update_cell(cell.row, approval_col_index, status)
-        return {"status": "success", "message": f"Post {request.post_id} on {request.platform} status set to '{status}'."}
-    except Exception as e:
-        # Pass along the specific error from gspread or our own logic
-        raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
+        return changefeed.changes_since(since, stage=stage, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.post("/api/v1/posts/approve")
@@ -0,0 +1,77 @@
+# frontend/data_layer.py
+"""
+Cached Google Sheets access for the dashboard pages.
+
+The gspread client is created once per server process (st.cache_resource).
+Worksheet snapshots are cached as data for DASHBOARD_CACHE_TTL_SECONDS and
+shared by every page, tab and session, so reruns triggered by widget clicks
+cost no Sheets calls. Pages call clear() after they write to the sheets and
+from their Refresh buttons.
+"""
+import functools
+import pandas as pd
+import streamlit as st
+
+from backend.bots import config, clients, post_queries, http_transport, thumbnails
+
+
+@st.cache_resource(show_spinner=False)
+def get_gspread_client():
+    return clients.get_gspread_client()
+
+
+@st.cache_data(ttl=config.DASHBOARD_CACHE_TTL_SECONDS, show_spinner=False)
+def load_worksheet_records(platform_name: str, step: str) -> list[dict]:
+    """Returns the records of one platform's worksheet ('step3', 'step4', ...)."""
+    platform_cfg = config.PLATFORMS[platform_name]
+    worksheet = get_gspread_client().open(platform_cfg.sheet_name).worksheet(platform_cfg.steps[step])
+    return worksheet.get_all_records()
+
+
+@st.cache_data(ttl=config.DASHBOARD_CACHE_TTL_SECONDS, show_spinner=False)
+def load_schedule_df() -> pd.DataFrame:
+    """The Step 4 schedule of all platforms, as post_queries.load_schedule_df returns it."""
+    return post_queries.load_schedule_df(get_gspread_client())
+
+
+@st.cache_data(ttl=config.DASHBOARD_CACHE_TTL_SECONDS, show_spinner=False)
+def load_posted_history_df() -> pd.DataFrame:
+    """Published posts from the cached schedule plus the archive, newest first."""
+    df = post_queries.load_posts_df(None, status='posted', schedule_df=load_schedule_df())
+    return df.sort_values('_ts', ascending=False) if not df.empty else df
+
+
+def clear():
+    """Drops every cached worksheet snapshot (after writes, or on Refresh)."""
+    load_worksheet_records.clear()
+    load_schedule_df.clear()
+    load_posted_history_df.clear()
+
+
+def get_thumbnail(image_url: str) -> bytes | None:
+    """
+    Returns the thumbnail of an uploaded image, or None if it cannot be had
+    right now. Only successful fetches are cached, so a transient failure is
+    tried again on the next rerun.
+    """
+    try:
+        return _fetch_thumbnail(image_url)
+    except Exception as e:
+        print(f"DATA_LAYER: -> WARNING! No thumbnail for {image_url}. Error: {e}")
+        return None
+
+
+@functools.lru_cache(maxsize=config.DASHBOARD_THUMBNAIL_CACHE_SIZE)
+def _fetch_thumbnail(image_url: str) -> bytes:
+    """
+    Fetches a thumbnail into an in-process LRU (which never stores exceptions).
+
+    Images uploaded before thumbnails existed have none stored; for those the
+    original is downloaded once and resized here. Raises if neither works.
+    """
+    response = http_transport.get(thumbnails.thumbnail_url(image_url))
+    if response.ok:
+        return response.content
+    response = http_transport.get(image_url)
+    response.raise_for_status()
+    return thumbnails.make_thumbnail(response.content)
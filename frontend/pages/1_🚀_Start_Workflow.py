@@ -11,12 +11,73 @@ if str(REPO_ROOT) not in sys.path:
 
 # now these imports will work
 # use the ones needed per page:
-from backend.bots import orchestrator, config, clients
+from backend.bots import config
+import requests
 
 
+PLATFORM_EMOJIS = {"facebook": "👍", "instagram": "📸", "twitter": "🐦"}
+
+# --- Helpers for the workflow API (the pipeline runs in the backend, not in this session) ---
+def submit_workflow(article_url: str, platforms: list[str], approver_emails: str) -> str:
+    response = requests.post(
+        f"{config.BACKEND_URL}/api/v1/workflow/start",
+        json={"article_url": article_url, "platforms": platforms, "approver_emails": approver_emails},
+        timeout=10,
+    )
+    response.raise_for_status()
+    return response.json()["job_id"]
+
+def fetch_job(job_id: str) -> dict | None:
+    response = requests.get(f"{config.BACKEND_URL}/api/v1/workflow/jobs/{job_id}", timeout=5)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+def render_job(job_id: str, job: dict | None):
+    if job is None:
+        st.warning(f"Job {job_id[:8]} is no longer known to the backend (it may have restarted).")
+        return
+    progress = job["progress"]
+    title = progress.get("title") or job["params"].get("article_url", "")
+    icon = {"queued": "⏳", "running": "⚙️", "succeeded": "✅", "failed": "❌"}.get(job["status"], "❓")
+    with st.container(border=True):
+        st.markdown(f"{icon} **{title}** — {job['status']} ({job['stage']})")
+        expected = progress.get("posts_expected") or 0
+        generated = sum(progress["posts_generated"].values())
+        if expected:
+            st.progress(min(generated / expected, 1.0), text=f"{generated}/{expected} posts generated")
+        cols = st.columns(3)
+        cols[0].metric("Conclusions found", progress.get("conclusions_found", "–"))
+        cols[1].metric("Posts generated", " ".join(
+            f"{PLATFORM_EMOJIS.get(p, '❓')} {n}" for p, n in progress["posts_generated"].items()) or "–")
+        cols[2].metric("Images matched", sum(progress["images_matched"].values()))
+        if job["error"]:
+            st.error(job["error"])
+        if job["events"]:
+            st.caption(job["events"][-1]["message"])
+
+@st.fragment(run_every=config.JOB_POLL_SECONDS)
+def show_jobs():
+    """Polls the backend for this session's jobs; only this fragment reruns."""
+    finished = st.session_state.finished_jobs
+    for job_id in reversed(st.session_state.job_ids):
+        try:
+            job = finished.get(job_id) or fetch_job(job_id)
+            if job and job["status"] in ("succeeded", "failed"):
+                finished[job_id] = job  # final: no need to ask again
+            render_job(job_id, job)
+        except requests.RequestException as e:
+            st.error(f"Cannot reach the backend at {config.BACKEND_URL}: {e}")
+            return
+
 # --- Page Setup ---
 st.set_page_config(page_title="Start Workflow", page_icon="🚀", layout="wide")
 
+if 'job_ids' not in st.session_state:
+    st.session_state.job_ids = []
+    st.session_state.finished_jobs = {}
+
 # --- Main Application ---
 st.title("🚀 Start a New Workflow")
 st.markdown("Enter an article URL, provide approver emails, and select platforms to generate content for.")
@@ -56,10 +117,14 @@ with st.form("start_workflow_form"):
             if not platforms_to_run:
                 st.warning("Please select at least one platform.")
             else:
-                with st.spinner("Starting ingestion → generation workflow..."):
-                    emails = [e.strip() for e in approver_emails.replace(";", ",").split(",") if e.strip()]
-                    orchestrator.run_ingestion_to_generation(
-                        article_url=article_url,
-                        platforms=platforms_to_run,
-                        approver_emails=emails
-                    )
+                try:
+                    job_id = submit_workflow(article_url, platforms_to_run, approver_emails)
+                    st.session_state.job_ids.append(job_id)
+                    st.success("✅ Workflow submitted. Its progress is shown below; you can start more meanwhile.")
+                except requests.RequestException as e:
+                    st.error(f"Could not submit the workflow to {config.BACKEND_URL}: {e}")
+
+if st.session_state.job_ids:
+    st.markdown("---")
+    st.header("Workflows")
+    show_jobs()
@@ -1,7 +1,7 @@
 # frontend/pages/2_✅_Approval_Queue.py
 import streamlit as st
 import pandas as pd
-import sys, os
+import sys
 from pathlib import Path
 
 # add the REPO ROOT (…/social_media_dashboard) to sys.path
@@ -9,7 +9,9 @@ REPO_ROOT = Path(__file__).resolve().parents[2]
 if str(REPO_ROOT) not in sys.path:
     sys.path.append(str(REPO_ROOT))
 
-from backend.bots import orchestrator, config, clients
+from backend.bots import config, changefeed, approvals
+from frontend import data_layer
+import requests
 
 PLATFORM_EMOJIS = {"facebook": "👍", "instagram": "📸", "twitter": "🐦"}
 
@@ -23,14 +25,12 @@ def safe_get(d: dict, key: str, default: str = "") -> str:
     s = str(v).strip()
     return s if s and s.lower() != "nan" else default
 
-# --- Helpers that read/write directly to Google Sheets ---
+# --- Helpers that read (through the cache in frontend/data_layer.py) and write Google Sheets ---
 def fetch_awaiting_approval_df() -> pd.DataFrame:
-    gc = clients.get_gspread_client()
     rows = []
-    for platform_name, platform_cfg in config.PLATFORMS.items():
+    for platform_name in config.PLATFORMS:
         try:
-            ws = gc.open(platform_cfg.sheet_name).worksheet(platform_cfg.steps['step3'])
-            recs = ws.get_all_records()  # list[dict]
+            recs = data_layer.load_worksheet_records(platform_name, 'step3')  # list[dict]
             if not recs:
                 continue
             df = pd.DataFrame(recs)
@@ -53,48 +53,127 @@ def fetch_awaiting_approval_df() -> pd.DataFrame:
             st.warning(f"[{platform_name}] cannot read approval queue: {e}")
     return pd.DataFrame(rows)
 
-def update_approval_status(platform: str, post_id: str, status: str) -> bool:
-    gc = clients.get_gspread_client()
-    platform_cfg = config.PLATFORMS.get(platform)
-    if not platform_cfg:
-        st.error("Platform not found")
-        return False
+def post_key(post: dict) -> str:
+    # The same post_id is used by every platform's post for a conclusion
+    return ":".join(changefeed.post_key(post))
+
+def queue_decision(post: dict, decision: str):
+    """Records a decision locally and drops the post from the queue; nothing is written yet."""
+    key = post_key(post)
+    st.session_state.pending_decisions[key] = {'post': post, 'decision': decision}
+    st.session_state.posts = [p for p in st.session_state.posts if post_key(p) != key]
+
+def submit_decisions():
+    """Writes all queued decisions (one batched write per spreadsheet); failed posts go back to the queue."""
+    pending = st.session_state.pending_decisions
+    result = approvals.apply_decisions(data_layer.get_gspread_client(), [
+        {'platform': p['post'].get('platform'), 'post_id': safe_get(p['post'], 'post_id'), 'decision': p['decision']}
+        for p in pending.values()
+    ])
+    failures = {post_key(f): f['error'] for f in result['failed']}
+    st.session_state.posts = [p['post'] for k, p in pending.items() if k in failures] + st.session_state.posts
+    st.session_state.pending_decisions = {}
+    st.session_state.submit_report = {'applied': len(result['applied']), 'failures': failures}
+    data_layer.clear()
+
+def discard_decisions():
+    st.session_state.posts = [p['post'] for p in st.session_state.pending_decisions.values()] + st.session_state.posts
+    st.session_state.pending_decisions = {}
+
+def is_awaiting_approval(post: dict) -> bool:
+    return safe_get(post, 'Approved_by_human', "") == ""
+
+def fetch_step3_changes(since: str | None) -> dict:
+    """Asks the backend's change feed (it lives on the backend host) for the Step 3 changes since a token."""
+    params = {'stage': 'step3'}
+    if since:
+        params['since'] = since
+    response = requests.get(f"{config.BACKEND_URL}/api/v1/changes", params=params, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+def load_full_queue():
+    # Take the token first so changes made during the download are replayed later
     try:
-        spreadsheet = gc.open(platform_cfg.sheet_name)
-        ws = spreadsheet.worksheet(platform_cfg.steps['step3'])
-        cell = ws.find(post_id)
-        if not cell:
-            st.error(f"Post ID {post_id} not found.")
-            return False
-        headers = ws.row_values(1)
-        approval_col_index = -1
-        for i, header in enumerate(headers):
-            if header.strip().lower() == 'approved_by_human':
-                approval_col_index = i + 1  # 1-indexed
-                break
-        if approval_col_index == -1:
-            st.error("Could not find 'Approved_by_human' column.")
-            return False
-        ws.update_cell(cell.row, approval_col_index, status)
-        return True
-    except Exception as e:
-        st.error(f"Update failed: {e}")
-        return False
+        st.session_state.change_token = fetch_step3_changes(None)['next_token']
+    except requests.RequestException:
+        st.session_state.change_token = None  # the next refresh reloads in full
+    st.session_state.posts = fetch_awaiting_approval_df().to_dict('records')
+
+def refresh_queue():
+    """Merges only the Step 3 changes since the last refresh into the queue."""
+    try:
+        delta = fetch_step3_changes(st.session_state.get('change_token'))
+    except requests.RequestException:
+        delta = {'reset': True}  # backend unreachable: the sheets are the source of truth
+    if delta['reset']:
+        load_full_queue()
+        return
+    merged = changefeed.apply_changes(st.session_state.posts, delta['changes'])
+    st.session_state.posts = [p for p in merged
+                              if is_awaiting_approval(p) and post_key(p) not in st.session_state.pending_decisions]
+    st.session_state.change_token = delta['next_token']
+
 
 # --- Page Setup and State ---
 st.set_page_config(page_title="Approval Queue", page_icon="✅", layout="wide")
 st.title("✅ Approval Queue")
 st.markdown("Review the generated posts below. Approve them to send to scheduling, or Reject them to remove from the queue.")
 
+if 'pending_decisions' not in st.session_state:
+    st.session_state.pending_decisions = {}  # post_key -> {'post', 'decision'}
 if 'posts' not in st.session_state:
-    st.session_state.posts = fetch_awaiting_approval_df().to_dict('records')
+    load_full_queue()
 
 if st.button("🔄 Refresh Queue"):
-    st.session_state.posts = fetch_awaiting_approval_df().to_dict('records')
+    data_layer.clear()
+    refresh_queue()
     st.rerun()
 
+# --- Decisions are applied locally and written to the sheets in one batch ---
+report = st.session_state.pop('submit_report', None)
+if report:
+    if report['applied']:
+        st.success(f"✅ Saved {report['applied']} decision(s).")
+    for key, error in report['failures'].items():
+        st.error(f"Could not save the decision for {key}: {error}. The post is back in the queue.")
+
+pending_count = len(st.session_state.pending_decisions)
+if pending_count:
+    approved = sum(1 for p in st.session_state.pending_decisions.values() if p['decision'] == 'approve')
+    st.warning(f"**{pending_count}** decision(s) not saved yet ({approved} approved, {pending_count - approved} rejected).")
+    submit_col, discard_col = st.columns(2)
+    with submit_col:
+        if st.button(f"💾 Submit decisions ({pending_count})", type="primary", use_container_width=True):
+            with st.spinner("Saving decisions..."):
+                submit_decisions()
+            st.rerun()
+    with discard_col:
+        if st.button("↩️ Discard decisions", use_container_width=True):
+            discard_decisions()
+            st.rerun()
+
+# --- Bulk actions ---
+if st.session_state.posts:
+    posts_by_key = {post_key(p): p for p in st.session_state.posts}
+    selected = st.multiselect(
+        "Select posts for a bulk action",
+        options=list(posts_by_key),
+        format_func=lambda k: f"{posts_by_key[k].get('platform', '').capitalize()} – {safe_get(posts_by_key[k], 'Name', k)[:60]}",
+    )
+    bulk_col1, bulk_col2 = st.columns(2)
+    for col, label, decision in ((bulk_col1, "👍 Approve selected", 'approve'), (bulk_col2, "👎 Reject selected", 'reject')):
+        with col:
+            if st.button(label, disabled=not selected, use_container_width=True):
+                for key in selected:
+                    queue_decision(posts_by_key[key], decision)
+                st.rerun()
+
 if not st.session_state.posts:
-    st.success("🎉 The approval queue is empty! All posts have been reviewed.")
+    if pending_count:
+        st.success("🎉 All posts have been reviewed. Submit your decisions to save them.")
+    else:
+        st.success("🎉 The approval queue is empty! All posts have been reviewed.")
 else:
     st.info(f"You have **{len(st.session_state.posts)}** posts awaiting your approval.")
     for i, post in enumerate(st.session_state.posts):
@@ -119,7 +198,12 @@ else:
             with col1:
                 image_url = safe_get(post, "Matched_Image_Path", "")
                 if image_url.startswith("http"):
-                    st.image(image_url, use_container_width=True)
+                    # Thumbnails only; the full-resolution chart is loaded when asked for
+                    thumbnail = data_layer.get_thumbnail(image_url)
+                    if thumbnail:
+                        st.image(thumbnail, use_container_width=True)
+                    if st.toggle("Full image", key=f"full-{i}-{post_key(post)}"):
+                        st.image(image_url, use_container_width=True)
                 else:
                     st.text("No Image")
 
@@ -132,16 +216,12 @@ else:
 
                 action_col1, action_col2 = st.columns(2)
                 with action_col1:
-                    approve_key = f"approve-{i}-{safe_get(post, 'post_id')}"
+                    approve_key = f"approve-{i}-{post_key(post)}"
                     if st.button("👍 Approve", key=approve_key, use_container_width=True):
-                        with st.spinner("Approving..."):
-                            if update_approval_status(platform, safe_get(post, 'post_id'), "yes"):
-                                st.session_state.posts = fetch_awaiting_approval_df().to_dict('records')
-                                st.rerun()
+                        queue_decision(post, 'approve')
+                        st.rerun()
                 with action_col2:
-                    reject_key = f"reject-{i}-{safe_get(post, 'post_id')}"
+                    reject_key = f"reject-{i}-{post_key(post)}"
                     if st.button("👎 Reject", key=reject_key, use_container_width=True):
-                        with st.spinner("Rejecting..."):
-                            if update_approval_status(platform, safe_get(post, 'post_id'), "no"):
-                                st.session_state.posts = fetch_awaiting_approval_df().to_dict('records')
-                                st.rerun()
+                        queue_decision(post, 'reject')
+                        st.rerun()
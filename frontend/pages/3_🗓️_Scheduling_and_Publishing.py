@@ -11,46 +11,74 @@ if str(REPO_ROOT) not in sys.path:
 
 # now these imports will work
 # use the ones needed per page:
-from backend.bots import orchestrator, config, clients
+from backend.bots import orchestrator, config, post_queries
+from frontend import data_layer
 
 
 PLATFORM_EMOJIS = {"facebook": "👍", "instagram": "📸", "twitter": "🐦"}
+PLATFORM_LABELS = {p: f"{PLATFORM_EMOJIS.get(p, '❓')} {p.capitalize()}" for p in config.PLATFORMS}
+PAGE_SIZES = [25, 50, 100, 250]
 
-# --- Helpers for Sheets ---
+# --- Helpers for Sheets (cached, see frontend/data_layer.py) ---
 def fetch_scheduled_posts_df() -> pd.DataFrame:
-    gc = clients.get_gspread_client()
-    rows = []
-    for platform_name, platform_cfg in config.PLATFORMS.items():
-        try:
-            ws = gc.open(platform_cfg.sheet_name).worksheet(platform_cfg.steps['step4'])
-            records = ws.get_all_records()
-            for r in records:
-                r['platform'] = platform_name
-                rows.append(r)
-        except Exception as e:
-            st.warning(f"[{platform_name}] cannot read schedule: {e}")
-    df = pd.DataFrame(rows)
-    if not df.empty and 'Scheduled_Time' in df.columns:
-        df = df.sort_values('Scheduled_Time', na_position='last')
-    return df
+    try:
+        return data_layer.load_schedule_df()
+    except Exception as e:
+        st.warning(f"Cannot read schedule: {e}")
+        return pd.DataFrame()
 
 def fetch_posted_history_df() -> pd.DataFrame:
-    gc = clients.get_gspread_client()
-    rows = []
-    for platform_name, platform_cfg in config.PLATFORMS.items():
-        try:
-            ws = gc.open(platform_cfg.sheet_name).worksheet(platform_cfg.steps['step4'])
-            records = ws.get_all_records()
-            for r in records:
-                if str(r.get('Posted_Status', '')).strip() == 'Posted':
-                    r['platform'] = platform_name
-                    rows.append(r)
-        except Exception as e:
-            st.warning(f"[{platform_name}] cannot read posted history: {e}")
-    df = pd.DataFrame(rows)
-    if not df.empty and 'Scheduled_Time' in df.columns:
-        df = df.sort_values('Scheduled_Time', ascending=False, na_position='last')
-    return df
+    # Older published posts live in the archive, not in the Step 4 sheets
+    try:
+        return data_layer.load_posted_history_df()
+    except Exception as e:
+        st.warning(f"Cannot read posted history: {e}")
+        return pd.DataFrame()
+
+# --- Paginated views (keyset pages from post_queries.paginate) ---
+def reset_pages(view: str):
+    st.session_state[f"{view}_cursors"] = [None]
+
+def show_paginated(view: str, df: pd.DataFrame, columns: list[str], descending: bool = False,
+                   column_config: dict | None = None):
+    """
+    Renders one page of `df` with Previous/Next controls. The cursors of the
+    pages visited so far are kept in session state, so only the rows of the
+    current page are formatted and sent to the browser.
+
+    This pages the display only: `df` is the cached snapshot, and a cache
+    miss still reads the whole schedule. /api/v1/posts pages the same way
+    over a full read per request (Sheets cannot read by key), so it would
+    not read less.
+    """
+    cursors = st.session_state.setdefault(f"{view}_cursors", [None])
+    size_col, info_col = st.columns([1, 3])
+    with size_col:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, key=f"{view}_page_size",
+                                 on_change=reset_pages, args=(view,))
+    page = post_queries.paginate(df, cursor=cursors[-1], limit=page_size,
+                                 fields=['platform'] + columns, descending=descending)
+    if not page['posts'] and len(cursors) > 1:
+        reset_pages(view)  # the data shrank under us (refresh/archive): start over
+        st.rerun()
+    page_df = pd.DataFrame(page['posts'])
+    # Vectorized formatting of just this page
+    page_df.insert(0, 'Platform', page_df['platform'].map(PLATFORM_LABELS).fillna('❓ ' + page_df['platform'].str.capitalize()))
+    first = (len(cursors) - 1) * page_size + 1
+    with info_col:
+        st.caption(f"Rows {first}–{first + len(page_df) - 1} of {len(df)}")
+    st.dataframe(page_df[['Platform'] + [c for c in columns if c in page_df.columns]],
+                 column_config=column_config, hide_index=True, use_container_width=True)
+
+    prev_col, next_col = st.columns(2)
+    with prev_col:
+        if st.button("◀ Previous", key=f"{view}_prev", disabled=len(cursors) == 1, use_container_width=True):
+            cursors.pop()
+            st.rerun()
+    with next_col:
+        if st.button("Next ▶", key=f"{view}_next", disabled=page['next_cursor'] is None, use_container_width=True):
+            cursors.append(page['next_cursor'])
+            st.rerun()
 
 # --- Page Setup ---
 st.set_page_config(page_title="Scheduling & Publishing", page_icon="🗓️", layout="wide")
@@ -65,12 +93,14 @@ with col1:
     if st.button("🚀 Run Scheduler (Step 4)", use_container_width=True):
         with st.spinner("Building the schedule..."):
             orchestrator.run_scheduling_for_all_platforms()
+            data_layer.clear()
             st.success("✅ Scheduling started (direct call).")
 with col2:
     st.warning("**Publish one due post per platform.**")
     if st.button("📡 Publish Next Due Posts (Step 5)", use_container_width=True):
         with st.spinner("Publishing..."):
             orchestrator.run_publishing_for_all_platforms()
+            data_layer.clear()
             st.success("✅ Publishing run started (direct call).")
 
 # --- Display Area with Tabs ---
@@ -82,29 +112,26 @@ tab1, tab2 = st.tabs(["Scheduled", "Published History"])
 with tab1:
     st.subheader("Upcoming Scheduled Posts")
     if st.button("🔄 Refresh Schedule"):
+        data_layer.clear()
+        reset_pages('schedule')
         st.rerun()
 
     df_scheduled = fetch_scheduled_posts_df()
     if df_scheduled.empty:
         st.info("The schedule is empty. Approve posts and run the scheduler.")
     else:
-        df_scheduled['Platform'] = df_scheduled['platform'].apply(lambda x: f"{PLATFORM_EMOJIS.get(x, '❓')} {x.capitalize()}")
-        columns_to_show = ['Platform', 'Scheduled_Time', 'Name', 'Conclusion', 'Posted_Status']
-        st.dataframe(df_scheduled[[c for c in columns_to_show if c in df_scheduled.columns]], use_container_width=True)
+        show_paginated('schedule', df_scheduled, ['Scheduled_Time', 'Name', 'Conclusion', 'Posted_Status'])
 
 with tab2:
     st.subheader("Published History")
     if st.button("🔄 Refresh History"):
+        data_layer.clear()
+        reset_pages('history')
         st.rerun()
 
     df_posted = fetch_posted_history_df()
     if df_posted.empty:
         st.info("No posts have been published yet.")
     else:
-        df_posted['Platform'] = df_posted['platform'].apply(lambda x: f"{PLATFORM_EMOJIS.get(x, '❓')} {x.capitalize()}")
-        if 'Post_Link' in df_posted.columns:
-            df_posted['Post_Link'] = df_posted['Post_Link'].apply(lambda x: f'<a href="{x}" target="_blank">View Post</a>' if x else "No Link")
-            cols = ['Platform', 'Scheduled_Time', 'Name', 'Post_Link']
-            st.markdown(df_posted[[c for c in cols if c in df_posted.columns]].to_html(escape=False, index=False), unsafe_allow_html=True)
-        else:
-            st.dataframe(df_posted, use_container_width=True)
+        show_paginated('history', df_posted, ['Scheduled_Time', 'Name', 'Post_Link'], descending=True,
+                       column_config={'Post_Link': st.column_config.LinkColumn("Post", display_text="View Post")})
@@ -2,18 +2,21 @@
 
 import streamlit as st
 from PIL import Image
-from pyzbar.pyzbar import decode
-import os # Just for this example, you'll import your real backend
-
-# --- ⚠️ TODO: REPLACE THIS FAKE FUNCTION ---
-#
-# This is where you connect to your *real* backend logic.
-# You might import a function from your `backend` folder,
-# or make an API call to your `backend/main.py` if it's a server.
-#
+import sys, uuid, hashlib
+from pathlib import Path
+
+# add the REPO ROOT (…/social_media_dashboard) to sys.path
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.append(str(REPO_ROOT))
+
+from backend.bots import qr_decoding, tickets
+
+
 def check_ticket_in_database(ticket_id):
     """
-    Checks the ticket ID against the database.
+    Checks the ticket in against the ticket registry (admits it at most once,
+    across all scanners).
     
     Returns: A dictionary, e.g.:
     {"status": "success", "name": "Jane Doe"}
@@ -21,24 +24,33 @@ def check_ticket_in_database(ticket_id):
     {"status": "error", "message": "Ticket not found"}
     """
     st.info(f"Checking ticket: {ticket_id}") # Displayed to user
-    
-    # --- FAKE DATABASE LOGIC ---
-    # Replace this with your actual database query
-    fake_database = {
-        "TKT-A1B2C3D4": {"name": "Alice Smith", "status": "valid"},
-        "TKT-E5F6G7H8": {"name": "Bob Johnson", "status": "used"},
-    }
-    
-    if ticket_id in fake_database:
-        registration = fake_database[ticket_id]
-        if registration["status"] == "valid":
-            # In a real app, you'd update status to "used" here
-            return {"status": "success", "name": registration["name"]}
-        else:
-            return {"status": "error", "message": "Ticket already checked in."}
-    else:
-        return {"status": "error", "message": "Ticket not found."}
-# --- END OF FAKE FUNCTION ---
+    return tickets.check_in(ticket_id, scanner_id=st.session_state.scanner_id)
+
+
+def scan_frame(img_file_buffer) -> list:
+    """
+    Decodes the QR codes in a photo (several for a group check-in) and
+    checks each ticket in.
+
+    Returns: The (level, message) lines to show, level being 'success',
+    'error' or 'info'.
+    """
+    image = Image.open(img_file_buffer)
+    decoded = qr_decoding.decode_codes(image)
+    if not decoded['codes']:
+        return [('error', "No QR code found. Please try again.")]
+
+    messages = []
+    if len(decoded['codes']) > 1:
+        messages.append(('info', f"Found {len(decoded['codes'])} tickets."))
+    with st.spinner("Verifying tickets..."):
+        for code in decoded['codes']:
+            response = check_ticket_in_database(code['data'])
+            if response["status"] == "success":
+                messages.append(('success', f"Welcome, {response['name']}!"))
+            else:
+                messages.append(('error', f"{code['data']}: {response['message']}"))
+    return messages
 
 
 # --- STREAMLIT PAGE CODE ---
@@ -46,6 +58,19 @@ def check_ticket_in_database(ticket_id):
 st.set_page_config(page_title="Check-in Scanner", layout="centered")
 st.title("🎫 Event Check-in Scanner")
 
+if 'scanner_id' not in st.session_state:
+    st.session_state.scanner_id = f"scanner-{uuid.uuid4().hex[:6]}"
+
+# --- Attendee lists ---
+with st.expander("Attendee lists"):
+    uploaded = st.file_uploader("Import attendees (CSV with a ticket_id column; name and email optional)", type="csv")
+    event_name = st.text_input("Event", value="")
+    if uploaded is not None and st.button("Import"):
+        result = tickets.import_csv(uploaded.getvalue(), event=event_name.strip())
+        st.success(f"Imported {result['imported']} ticket(s), skipped {result['skipped']} row(s) without a ticket_id.")
+    stats = tickets.get_stats()
+    st.caption(f"Checked in: {stats.get('used', 0)} · Not yet: {stats.get('valid', 0)} · Scanner: {st.session_state.scanner_id}")
+
 # 1. Create the camera input widget
 img_file_buffer = st.camera_input(
     "Point camera at the QR code and take photo:",
@@ -54,30 +79,20 @@ img_file_buffer = st.camera_input(
 )
 
 if img_file_buffer is not None:
-    # 2. Open the image buffer
-    try:
-        image = Image.open(img_file_buffer)
-        
-        # 3. Decode the QR code
-        decoded_objects = decode(image)
-        
-        if not decoded_objects:
-            st.error("No QR code found. Please try again.", icon="❌")
+    # The photo stays in the widget across reruns (e.g. typing in the attendee
+    # list), so a frame is checked in only once and its result shown again after
+    frame_hash = hashlib.sha256(img_file_buffer.getvalue()).hexdigest()
+    if st.session_state.get('last_frame_hash') != frame_hash:
+        st.session_state.last_frame_hash = frame_hash
+        try:
+            st.session_state.last_scan = scan_frame(img_file_buffer)
+        except Exception as e:
+            st.session_state.last_scan = [('error', f"An error occurred: {e}")]
+
+    for level, message in st.session_state.last_scan:
+        if level == 'success':
+            st.success(message, icon="✅")
+        elif level == 'error':
+            st.error(message, icon="❌")
         else:
-            # Get the data from the first QR code found
-            ticket_id = decoded_objects[0].data.decode("utf-8")
-            
-            # 4. Check the database
-            with st.spinner("Verifying ticket..."):
-                response = check_ticket_in_database(ticket_id)
-                
-                if response["status"] == "success":
-                    st.success(f"Welcome, {response['name']}!", icon="✅")
-                else:
-                    st.error(response["message"], icon="❌")
-            
-            # Clear the camera input so you can scan another
-            st.session_state["camera"] = None
-
-    except Exception as e:
-        st.error(f"An error occurred: {e}")
\ No newline at end of file
+            st.info(message)